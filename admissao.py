@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Controle de Admissão do Restaurante
+Recusa pedidos quando a cozinha está saturada (fila longa ou espera estimada
+alta) e limita a taxa de pedidos de cada conexão
+"""
+
+import threading
+import time
+
+# Menor intervalo sugerido ao cliente antes de tentar de novo
+TENTATIVA_MINIMA = 0.1
+
+
+def rejeicao(motivo, mensagem, tente_mais_tarde, **extras):
+    """Resposta de pedido recusado: o cliente deve tentar de novo mais tarde"""
+    return dict(
+        {
+            'erro': mensagem,
+            'status': 'rejeitado',
+            'motivo': motivo,
+            'tente_mais_tarde': round(max(tente_mais_tarde, TENTATIVA_MINIMA), 2),
+        },
+        **extras
+    )
+
+
+class ControleAdmissao:
+    """Admissão de pedidos pela carga da fila da estação que vai prepará-los.
+
+    A espera estimada de um pedido novo é a soma dos custos (tempo_base *
+    quantidade) dos pedidos ainda na fila da estação dividida pelo número de
+    chefs dela. Um pedido é recusado se essa fila já tem `max_fila` pedidos ou
+    se, com ele, a espera passaria de `max_espera` segundos; a resposta sugere
+    quando tentar de novo, pelo tempo até a fila esvaziar o suficiente.
+
+    `estacoes` é o dicionário de estações do servidor (com `fila` e `pool`),
+    lido a cada avaliação para acompanhar pools que mudam de tamanho.
+    A verificação não reserva lugar na fila, então pedidos simultâneos podem
+    ultrapassar o limite em no máximo um pedido por conexão concorrente.
+    """
+
+    def __init__(self, estacoes, max_fila=None, max_espera=None, escala_tempo=1.0):
+        self.estacoes = estacoes
+        self.max_fila = max_fila
+        self.max_espera = max_espera
+        self.escala_tempo = escala_tempo
+
+    @property
+    def ativo(self):
+        return self.max_fila is not None or self.max_espera is not None
+
+    def _segundos(self, estacao, trabalho):
+        return trabalho * self.escala_tempo / max(estacao.pool.tamanho, 1)
+
+    def espera_estimada(self, estacao=None):
+        """Segundos até um pedido que chegasse agora começar a ser preparado.
+
+        Sem `estacao`, a maior espera entre todas as estações.
+        """
+        estacoes = [estacao] if estacao is not None else list(self.estacoes.values())
+        return max((self._segundos(e, e.fila.carga()[1]) for e in estacoes), default=0.0)
+
+    def avaliar(self, estacao, custo, pedidos_extras=0, trabalho_extra=0.0):
+        """None se o pedido pode entrar, ou a resposta de rejeição.
+
+        `pedidos_extras` e `trabalho_extra` contam pedidos já admitidos na
+        estação e ainda não enfileirados (ex.: itens anteriores do mesmo lote).
+        """
+        if not self.ativo:
+            return None
+
+        pedidos, trabalho = estacao.fila.carga()
+        pedidos += pedidos_extras
+        trabalho += trabalho_extra
+        espera = self._segundos(estacao, trabalho)
+        local = f' ({estacao.nome})' if len(self.estacoes) > 1 else ''
+
+        if self.max_fila is not None and pedidos >= self.max_fila:
+            # Tempo para sair da fila o excesso, pelo custo médio dos pedidos nela
+            excesso = pedidos - self.max_fila + 1
+            medio = trabalho / pedidos if pedidos else custo
+            return rejeicao(
+                'fila_cheia',
+                f'Cozinha saturada{local}: {pedidos} pedidos na fila (máximo {self.max_fila})',
+                self._segundos(estacao, medio * excesso),
+                espera_estimada=round(espera, 2)
+            )
+
+        if self.max_espera is not None and espera + self._segundos(estacao, custo) > self.max_espera:
+            return rejeicao(
+                'espera_longa',
+                f'Cozinha saturada{local}: espera estimada de {espera:.1f}s (máximo {self.max_espera}s)',
+                espera + self._segundos(estacao, custo) - self.max_espera,
+                espera_estimada=round(espera, 2)
+            )
+
+        return None
+
+
+class LimitadorTaxa:
+    """Balde de fichas: `taxa` pedidos por segundo, com rajadas de até `rajada`.
+
+    Um lote de n pedidos consome n fichas; um lote maior que a rajada passa
+    com o balde cheio e deixa o saldo negativo, que a taxa repõe com o tempo.
+    """
+
+    def __init__(self, taxa, rajada=None):
+        self.taxa = taxa
+        self.rajada = rajada if rajada is not None else max(taxa, 1)
+        self.fichas = float(self.rajada)
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consumir(self, quantidade=1):
+        """0 se liberado, ou os segundos até haver fichas suficientes"""
+        with self.lock:
+            agora = time.monotonic()
+            self.fichas = min(self.rajada, self.fichas + (agora - self.ultimo) * self.taxa)
+            self.ultimo = agora
+
+            necessarias = min(quantidade, self.rajada)
+            if self.fichas < necessarias:
+                return (necessarias - self.fichas) / self.taxa
+            self.fichas -= quantidade
+            return 0
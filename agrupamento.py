@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Agrupamento de Pedidos do Restaurante
+Pedidos do mesmo prato que chegam juntos são preparados em uma única fornada,
+que leva menos tempo que prepará-los um a um
+"""
+
+import time
+
+# Itens de cada prato que cabem em uma fornada (pizzas no forno, sopas na panela...)
+CAPACIDADE_FORNADA = {
+    'pizza': 4,
+    'hamburguer': 6,
+    'salada': 4,
+    'sopa': 8,
+    'lasanha': 3,
+    'sanduiche': 4,
+}
+
+# Cada item além do primeiro custa esta fração do tempo base
+FATOR_FORNADA = 0.3
+
+
+def tempo_fornada(tempo_base, itens, fator=1.0, capacidade=None):
+    """Tempo de preparo de `itens` juntos, em fornadas de até `capacidade` itens.
+
+    Em uma fornada, o primeiro item custa `tempo_base` e cada outro `fator`
+    dele; com `fator` 1, o tempo é o linear `tempo_base * itens`.
+    """
+    if capacidade is None:
+        capacidade = itens
+    cheias, resto = divmod(itens, capacidade)
+    tempo = cheias * tempo_base * (1 + fator * (capacidade - 1))
+    if resto:
+        tempo += tempo_base * (1 + fator * (resto - 1))
+    return tempo
+
+
+class AgrupadorPedidos:
+    """Forma fornadas a partir da fila de uma estação.
+
+    O chef que retira um pedido junta a ele os outros do mesmo prato já na
+    fila, até a capacidade da fornada; se ela não encheu, espera o que falta
+    da `janela` (contada da chegada do pedido) e junta os que chegaram nesse
+    meio-tempo. Os itens da fila são `(preparo, quantidade)`, agrupados pelo
+    índice do prato.
+    """
+
+    def __init__(self, janela, capacidades=None, fator=FATOR_FORNADA):
+        self.janela = janela
+        self.capacidades = dict(CAPACIDADE_FORNADA, **(capacidades or {}))
+        self.fator = fator
+
+    def formar(self, fila, prato, grupo, quantidade, chegada):
+        """Entradas da fila que entram na fornada de um pedido com `quantidade` itens"""
+        livres = self.capacidades[prato] - quantidade
+
+        def aceitar(item):
+            nonlocal livres
+            if item[1] > livres:
+                return False
+            livres -= item[1]
+            return True
+
+        fornada = fila.retirar_grupo(grupo, aceitar)
+        restante = chegada + self.janela - time.monotonic()
+        if livres > 0 and restante > 0:
+            time.sleep(restante)
+            fornada += fila.retirar_grupo(grupo, aceitar)
+        return fornada
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Sistema de Restaurante Distribuído
+Gera carga sintética sem interação (malha aberta ou fechada) e mede vazão,
+latência dos comandos e tempo total dos pedidos
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from binario import CODECS
+from cliente import RestauranteCliente
+from servidor import RestauranteServidor
+
+MIX_PADRAO = 'pizza=2,hamburguer=2,salada=3,sopa=2,lasanha=1,sanduiche=3'
+
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def resumir(valores, fator=1.0):
+    """Contagem, média e percentis de uma lista de durações"""
+    if not valores:
+        return {'n': 0}
+    return {
+        'n': len(valores),
+        'media': round(sum(valores) / len(valores) * fator, 3),
+        'p50': round(percentil(valores, 50) * fator, 3),
+        'p95': round(percentil(valores, 95) * fator, 3),
+        'p99': round(percentil(valores, 99) * fator, 3),
+        'max': round(max(valores) * fator, 3),
+    }
+
+
+def interpretar_mix(texto):
+    """'pizza=2,salada=3' -> ([pratos], [pesos])"""
+    pratos, pesos = [], []
+    for parte in texto.split(','):
+        prato, _, peso = parte.partition('=')
+        pratos.append(prato.strip())
+        pesos.append(float(peso or 1))
+    return pratos, pesos
+
+
+class Medicoes:
+    """Coleta thread-safe das medições de todos os clientes sintéticos"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencias = {}
+        self.enviados_em = {}
+        self.prontos_antecipados = {}
+        self.turnarounds = []
+        self.erros = 0
+        self.rejeitados = 0
+        self.concluidos = threading.Condition(self.lock)
+        self.pendentes = 0
+
+    def registrar_latencia(self, acao, segundos):
+        with self.lock:
+            self.latencias.setdefault(acao, []).append(segundos)
+
+    def pedido_aceito(self, pedido_id, enviado_em):
+        with self.lock:
+            # A notificação pode chegar antes do callback da resposta rodar
+            pronto_em = self.prontos_antecipados.pop(pedido_id, None)
+            if pronto_em is not None:
+                self.turnarounds.append(pronto_em - enviado_em)
+            else:
+                self.enviados_em[pedido_id] = enviado_em
+                self.pendentes += 1
+
+    def pedido_pronto(self, evento):
+        agora = time.perf_counter()
+        with self.lock:
+            enviado_em = self.enviados_em.pop(evento['pedido_id'], None)
+            if enviado_em is None:
+                self.prontos_antecipados[evento['pedido_id']] = agora
+                return
+            self.turnarounds.append(agora - enviado_em)
+            self.pendentes -= 1
+            self.concluidos.notify_all()
+
+    def erro(self):
+        with self.lock:
+            self.erros += 1
+
+    def rejeitado(self):
+        with self.lock:
+            self.rejeitados += 1
+
+    def aguardar_pendentes(self, timeout):
+        with self.lock:
+            return self.concluidos.wait_for(lambda: self.pendentes == 0, timeout)
+
+
+class ClienteSintetico:
+    """Um cliente que faz pedidos e mede cada comando"""
+
+    def __init__(self, host, port, medicoes, pratos, pesos, quantidade_max, codecs):
+        self.cliente = RestauranteCliente(host, port, codecs)
+        self.medicoes = medicoes
+        self.pratos = pratos
+        self.pesos = pesos
+        self.quantidade_max = quantidade_max
+        self.aleatorio = random.Random()
+        self.prontos = set()
+        self.cond_prontos = threading.Condition()
+
+    def conectar(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not self.cliente.conectar():
+                raise ConnectionError(f'Não foi possível conectar a {self.cliente.host}:{self.cliente.port}')
+        self.cliente.ao_receber_evento('pedido_pronto', self._pedido_pronto)
+
+    def _pedido_pronto(self, evento):
+        self.medicoes.pedido_pronto(evento)
+        with self.cond_prontos:
+            self.prontos.add(evento['pedido_id'])
+            self.cond_prontos.notify_all()
+
+    def aguardar_pronto(self, pedido_id, timeout):
+        with self.cond_prontos:
+            concluido = self.cond_prontos.wait_for(lambda: pedido_id in self.prontos, timeout)
+            self.prontos.discard(pedido_id)
+            return concluido
+
+    def desconectar(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.cliente.desconectar()
+
+    def _comando_medido(self, comando, ao_responder=None):
+        """Envia sem bloquear; a latência é medida quando a resposta chega"""
+        enviado_em = time.perf_counter()
+        future = self.cliente.enviar_comandos_sem_esperar([comando])[0]
+
+        def concluir(f):
+            self.medicoes.registrar_latencia(comando['acao'], time.perf_counter() - enviado_em)
+            try:
+                resposta = f.result()
+            except Exception:
+                resposta = {'erro': 'falha de comunicação'}
+            if resposta.get('status') == 'rejeitado':
+                self.medicoes.rejeitado()
+            elif 'erro' in resposta:
+                self.medicoes.erro()
+            elif ao_responder is not None:
+                ao_responder(resposta, enviado_em)
+
+        future.add_done_callback(concluir)
+        return future
+
+    def fazer_pedido(self):
+        """Faz um pedido inscrito para notificação e consulta seu status em seguida"""
+        comando = {
+            'acao': 'fazer_pedido',
+            'prato': self.aleatorio.choices(self.pratos, self.pesos)[0],
+            'quantidade': self.aleatorio.randint(1, self.quantidade_max),
+            'subscrever': True,
+        }
+
+        def aceito(resposta, enviado_em):
+            self.medicoes.pedido_aceito(resposta['pedido_id'], enviado_em)
+            self._comando_medido({'acao': 'verificar_pedido', 'pedido_id': resposta['pedido_id']})
+
+        return self._comando_medido(comando, aceito)
+
+
+def malha_fechada(clientes, duracao, pausa):
+    """Cada cliente faz um pedido, espera ficar pronto e só então faz o próximo"""
+    fim = time.perf_counter() + duracao
+
+    def laco(sintetico):
+        while time.perf_counter() < fim:
+            resposta = sintetico.fazer_pedido().result()
+            if 'pedido_id' not in resposta:
+                # Cozinha saturada: respeita a sugestão do servidor antes de tentar de novo
+                time.sleep(resposta.get('tente_mais_tarde', 0.01))
+                continue
+            sintetico.aguardar_pronto(resposta['pedido_id'], max(0.0, fim - time.perf_counter()) + 1.0)
+            if pausa:
+                time.sleep(pausa)
+
+    threads = [threading.Thread(target=laco, args=(c,), daemon=True) for c in clientes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def malha_aberta(clientes, duracao, taxa):
+    """Pedidos chegam em um processo de Poisson com `taxa` pedidos/s, sem esperar respostas"""
+    aleatorio = random.Random()
+    rodizio = itertools.cycle(clientes)
+    inicio = time.perf_counter()
+    proxima = inicio
+    while True:
+        proxima += aleatorio.expovariate(taxa)
+        if proxima - inicio >= duracao:
+            break
+        espera = proxima - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        next(rodizio).fazer_pedido()
+
+
+@contextlib.contextmanager
+def servidor_em_execucao(args):
+    """Inicia o servidor no próprio processo ou como subprocesso"""
+    opcoes = [
+        '--host', args.host, '--port', str(args.port), '--chefs', str(args.chefs),
+        '--motor', args.motor, '--escalonador', args.escalonador,
+        '--escala-tempo', str(args.escala_tempo), '--max-conexoes', str(args.clientes + 16),
+        '--silencioso',
+    ]
+    if args.max_fila is not None:
+        opcoes += ['--max-fila', str(args.max_fila)]
+    if args.max_espera is not None:
+        opcoes += ['--max-espera', str(args.max_espera)]
+    if args.estacoes:
+        opcoes += ['--estacoes']
+
+    if args.servidor == 'externo':
+        yield
+        return
+
+    if args.servidor == 'subprocesso':
+        processo = subprocess.Popen(
+            [sys.executable, 'servidor.py', *opcoes],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            aguardar_porta(args.host, args.port)
+            yield
+        finally:
+            processo.terminate()
+            processo.wait(timeout=10)
+        return
+
+    # Silencioso: o log do servidor não disputa a saída com o relatório
+    servidor = RestauranteServidor(
+        host=args.host, port=args.port, num_chefs=args.chefs, motor=args.motor,
+        escalonador=args.escalonador, escala_tempo=args.escala_tempo,
+        max_conexoes=args.clientes + 16, silencioso=True,
+        max_fila=args.max_fila, max_espera=args.max_espera, estacoes=args.estacoes
+    )
+    thread = threading.Thread(target=servidor.iniciar_servidor, daemon=True)
+    thread.start()
+    try:
+        aguardar_porta(args.host, args.port)
+        yield
+    finally:
+        servidor.parar_servidor()
+        thread.join(timeout=10)
+
+
+def aguardar_porta(host, port, timeout=10.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f'Servidor não respondeu em {host}:{port}')
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(args):
+    pratos, pesos = interpretar_mix(args.mix)
+    medicoes = Medicoes()
+
+    with servidor_em_execucao(args):
+        clientes = [
+            ClienteSintetico(args.host, args.port, medicoes, pratos, pesos, args.quantidade_max, [args.codec])
+            for _ in range(args.clientes)
+        ]
+        for sintetico in clientes:
+            sintetico.conectar()
+
+        inicio = time.perf_counter()
+        if args.carga == 'aberta':
+            malha_aberta(clientes, args.duracao, args.taxa)
+        else:
+            malha_fechada(clientes, args.duracao, args.pausa)
+        envio = time.perf_counter() - inicio
+
+        medicoes.aguardar_pendentes(args.tempo_drenagem)
+        total = time.perf_counter() - inicio
+
+        for sintetico in clientes:
+            sintetico.desconectar()
+
+    with medicoes.lock:
+        return {
+            'versao': versao_codigo(),
+            'data': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'config': vars(args),
+            'pedidos_concluidos': len(medicoes.turnarounds),
+            'pedidos_sem_resposta': medicoes.pendentes,
+            'erros': medicoes.erros,
+            'pedidos_rejeitados': medicoes.rejeitados,
+            'duracao_envio_s': round(envio, 3),
+            'duracao_total_s': round(total, 3),
+            'vazao_pedidos_s': round(len(medicoes.turnarounds) / total, 2),
+            'latencia_ms': {
+                acao: resumir(valores, 1000) for acao, valores in medicoes.latencias.items()
+            },
+            'turnaround_s': resumir(medicoes.turnarounds),
+        }
+
+
+def imprimir(resultado):
+    print("="*60)
+    print(f"📊 {resultado['pedidos_concluidos']} pedidos concluídos em {resultado['duracao_total_s']}s "
+          f"({resultado['vazao_pedidos_s']} pedidos/s, {resultado['erros']} erros, "
+          f"{resultado.get('pedidos_rejeitados', 0)} rejeitados, "
+          f"{resultado['pedidos_sem_resposta']} sem resposta)")
+    for acao, estatisticas in sorted(resultado['latencia_ms'].items()):
+        print(f"  {acao:<18} p50 {estatisticas['p50']:>8} ms  p95 {estatisticas['p95']:>8} ms  "
+              f"p99 {estatisticas['p99']:>8} ms  (n={estatisticas['n']})")
+    turnaround = resultado['turnaround_s']
+    if turnaround['n']:
+        print(f"  {'turnaround':<18} p50 {turnaround['p50']:>8} s   p95 {turnaround['p95']:>8} s   "
+              f"p99 {turnaround['p99']:>8} s")
+    print("="*60)
+
+
+def comparar(atual, caminho_base):
+    """Mostra a variação percentual das métricas principais em relação a um resultado salvo"""
+    with open(caminho_base, encoding='utf-8') as f:
+        base = json.load(f)
+
+    def variacao(novo, antigo):
+        if not antigo or novo is None:
+            return 'n/d'
+        return f"{(novo - antigo) / antigo:+.1%}"
+
+    print(f"🔍 Comparação com {caminho_base} (versão {base.get('versao')})")
+    print(f"  vazão              {base['vazao_pedidos_s']} -> {atual['vazao_pedidos_s']} "
+          f"({variacao(atual['vazao_pedidos_s'], base['vazao_pedidos_s'])})")
+    metricas = [('turnaround', base['turnaround_s'], atual['turnaround_s'])]
+    metricas += [
+        (acao, base['latencia_ms'].get(acao, {}), estatisticas)
+        for acao, estatisticas in sorted(atual['latencia_ms'].items())
+    ]
+    for nome, antes, depois in metricas:
+        for p in ('p50', 'p99'):
+            print(f"  {nome:<18} {p}  {antes.get(p)} -> {depois.get(p)} "
+                  f"({variacao(depois.get(p), antes.get(p))})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do restaurante distribuído')
+    parser.add_argument('--servidor', choices=('processo', 'subprocesso', 'externo'), default='processo',
+                        help='onde roda o servidor: neste processo, em um subprocesso ou já iniciado')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--motor', default='threads')
+    parser.add_argument('--chefs', type=int, default=4)
+    parser.add_argument('--escalonador', default='fifo')
+    parser.add_argument('--estacoes', action='store_true', help='--estacoes do servidor (ignora --chefs)')
+    parser.add_argument('--escala-tempo', type=float, default=0.01,
+                        help='fator aplicado aos tempos de preparo simulados')
+    parser.add_argument('--max-fila', type=int, default=None, help='--max-fila do servidor')
+    parser.add_argument('--max-espera', type=float, default=None, help='--max-espera do servidor')
+    parser.add_argument('--clientes', type=int, default=8, help='clientes sintéticos simultâneos')
+    parser.add_argument('--carga', choices=('fechada', 'aberta'), default='fechada',
+                        help='malha fechada (espera cada pedido) ou aberta (taxa fixa)')
+    parser.add_argument('--taxa', type=float, default=100.0, help='pedidos/s na malha aberta')
+    parser.add_argument('--pausa', type=float, default=0.0, help='pausa entre pedidos na malha fechada')
+    parser.add_argument('--duracao', type=float, default=10.0, help='segundos gerando carga')
+    parser.add_argument('--tempo-drenagem', type=float, default=30.0,
+                        help='segundos máximos esperando os pedidos restantes')
+    parser.add_argument('--mix', default=MIX_PADRAO, help='pesos dos pratos, ex.: pizza=2,salada=3')
+    parser.add_argument('--quantidade-max', type=int, default=2)
+    parser.add_argument('--codec', choices=CODECS, default='json',
+                        help='codec negociado pelos clientes sintéticos')
+    parser.add_argument('--saida', default=None, help='salva o resultado em JSON')
+    parser.add_argument('--comparar', default=None, help='JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    resultado = executar(args)
+    imprimir(resultado)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultado salvo em {args.saida}")
+
+    if args.comparar:
+        comparar(resultado, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Agrupamento de Pedidos
+Carga aberta com um mix concentrado em poucos pratos, com e sem fornadas,
+comparando pedidos por chef-segundo e o tempo total dos pedidos
+"""
+
+import argparse
+import threading
+import time
+
+from agrupamento import FATOR_FORNADA
+from benchmark import ClienteSintetico, Medicoes, aguardar_porta, interpretar_mix, malha_aberta, resumir
+from servidor import RestauranteServidor
+
+# Mix concentrado: a maior parte dos pedidos é de pizza e hambúrguer
+MIX_CONCENTRADO = 'pizza=10,hamburguer=5,salada=1,sopa=1,lasanha=1,sanduiche=1'
+
+
+def executar(args, nome, janela):
+    """Roda a carga contra um servidor novo; retorna o resumo da execução"""
+    pratos, pesos = interpretar_mix(args.mix)
+    medicoes = Medicoes()
+    servidor = RestauranteServidor(
+        host=args.host, port=args.port, num_chefs=args.chefs, escala_tempo=args.escala_tempo,
+        max_conexoes=args.clientes + 16, silencioso=True,
+        janela_agrupamento=janela, fator_fornada=args.fator
+    )
+    thread = threading.Thread(target=servidor.iniciar_servidor, daemon=True)
+    thread.start()
+
+    try:
+        aguardar_porta(args.host, args.port)
+        clientes = [
+            ClienteSintetico(args.host, args.port, medicoes, pratos, pesos, args.quantidade_max, ['json'])
+            for _ in range(args.clientes)
+        ]
+        for sintetico in clientes:
+            sintetico.conectar()
+
+        inicio = time.perf_counter()
+        malha_aberta(clientes, args.duracao, args.taxa)
+        medicoes.aguardar_pendentes(args.tempo_drenagem)
+        total = time.perf_counter() - inicio
+
+        for sintetico in clientes:
+            sintetico.desconectar()
+    finally:
+        servidor.parar_servidor()
+        thread.join(timeout=10)
+
+    # Chef-segundos reais de preparo, sem a escala de tempo
+    chef_segundos = servidor.metricas.segundos_chef_ocupado / args.escala_tempo
+    contadores = servidor.metricas.contadores
+    with medicoes.lock:
+        pedidos = len(medicoes.turnarounds)
+        return {
+            'nome': nome,
+            'pedidos': pedidos,
+            'sem_resposta': medicoes.pendentes,
+            'vazao': round(pedidos / total, 1),
+            'fornadas': contadores.get('fornadas', 0),
+            'pedidos_agrupados': contadores.get('pedidos_agrupados', 0),
+            'pedidos_por_chef_segundo': round(pedidos / chef_segundos, 3) if chef_segundos else None,
+            'turnaround_s': resumir(medicoes.turnarounds),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8897)
+    parser.add_argument('--chefs', type=int, default=4)
+    parser.add_argument('--janela', type=float, default=0.005,
+                        help='janela de agrupamento em segundos (já na escala de tempo)')
+    parser.add_argument('--fator', type=float, default=FATOR_FORNADA, help='--fator-fornada do servidor')
+    parser.add_argument('--escala-tempo', type=float, default=0.01)
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--taxa', type=float, default=150.0, help='pedidos/s')
+    parser.add_argument('--duracao', type=float, default=8.0)
+    parser.add_argument('--mix', default=MIX_CONCENTRADO)
+    parser.add_argument('--quantidade-max', type=int, default=2)
+    parser.add_argument('--tempo-drenagem', type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"📊 {args.taxa} pedidos/s por {args.duracao}s, {args.chefs} chefs, mix {args.mix}")
+    resultados = [
+        executar(args, 'sem fornadas', None),
+        executar(args, 'com fornadas', args.janela),
+    ]
+
+    print("="*86)
+    print(f"  {'modo':<14}{'pedidos':>8}{'vazão/s':>9}{'fornadas':>10}{'agrupados':>11}"
+          f"{'ped/chef-s':>12}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}")
+    for resultado in resultados:
+        turnaround = resultado['turnaround_s']
+        print(f"  {resultado['nome']:<14}{resultado['pedidos']:>8}{resultado['vazao']:>9}"
+              f"{resultado['fornadas']:>10}{resultado['pedidos_agrupados']:>11}"
+              f"{resultado['pedidos_por_chef_segundo']:>12}"
+              f"{turnaround.get('p50', '-'):>8}{turnaround.get('p95', '-'):>8}{turnaround.get('p99', '-'):>8}")
+    print("="*86)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark da Autoescala de Chefs
+Carga em rajadas (almoço e madrugada) contra um pool fixo e um pool com
+autoescala, comparando o tempo total dos pedidos e os chefs usados
+"""
+
+import argparse
+import threading
+import time
+
+from benchmark import (
+    MIX_PADRAO, ClienteSintetico, Medicoes, aguardar_porta, interpretar_mix, malha_aberta, resumir
+)
+from servidor import RestauranteServidor
+
+PERFIL_PADRAO = '2:20,3:250,3:20,3:250,2:20'
+
+
+def interpretar_perfil(texto):
+    """'2:20,3:250' -> [(2.0 s, 20 pedidos/s), (3.0 s, 250 pedidos/s)]"""
+    fases = []
+    for parte in texto.split(','):
+        duracao, _, taxa = parte.partition(':')
+        fases.append((float(duracao), float(taxa)))
+    return fases
+
+
+def executar(args, nome, chefs, chefs_min, chefs_max):
+    """Roda o perfil inteiro contra um servidor novo; retorna o resumo da execução"""
+    pratos, pesos = interpretar_mix(args.mix)
+    medicoes = Medicoes()
+    servidor = RestauranteServidor(
+        host=args.host, port=args.port, num_chefs=chefs, chefs_min=chefs_min, chefs_max=chefs_max,
+        escala_tempo=args.escala_tempo, max_conexoes=args.clientes + 16, silencioso=True,
+        intervalo_autoescala=args.intervalo, resfriamento_autoescala=args.resfriamento
+    )
+    thread = threading.Thread(target=servidor.iniciar_servidor, daemon=True)
+    thread.start()
+
+    # Amostra o tamanho do pool ao longo da execução (custo em chef-segundos)
+    amostras = []
+    parada = threading.Event()
+
+    def amostrar():
+        while not parada.wait(0.05):
+            amostras.append(servidor.total_chefs())
+
+    try:
+        aguardar_porta(args.host, args.port)
+        clientes = [
+            ClienteSintetico(args.host, args.port, medicoes, pratos, pesos, args.quantidade_max, ['json'])
+            for _ in range(args.clientes)
+        ]
+        for sintetico in clientes:
+            sintetico.conectar()
+
+        amostrador = threading.Thread(target=amostrar, daemon=True)
+        amostrador.start()
+        inicio = time.perf_counter()
+        for duracao, taxa in interpretar_perfil(args.perfil):
+            malha_aberta(clientes, duracao, taxa)
+        medicoes.aguardar_pendentes(args.tempo_drenagem)
+        total = time.perf_counter() - inicio
+        parada.set()
+        amostrador.join()
+
+        for sintetico in clientes:
+            sintetico.desconectar()
+    finally:
+        servidor.parar_servidor()
+        thread.join(timeout=10)
+
+    with medicoes.lock:
+        chefs_medio = sum(amostras) / len(amostras) if amostras else chefs
+        return {
+            'nome': nome,
+            'pedidos': len(medicoes.turnarounds),
+            'sem_resposta': medicoes.pendentes,
+            'chefs_medio': round(chefs_medio, 2),
+            'chefs_pico': max(amostras, default=chefs),
+            'chef_segundos': round(chefs_medio * total, 1),
+            'turnaround_s': resumir(medicoes.turnarounds),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8898)
+    parser.add_argument('--perfil', default=PERFIL_PADRAO,
+                        help='fases SEGUNDOS:PEDIDOS_POR_SEGUNDO separadas por vírgula')
+    parser.add_argument('--chefs', type=int, default=4, help='tamanho do pool fixo')
+    parser.add_argument('--chefs-min', type=int, default=1)
+    parser.add_argument('--chefs-max', type=int, default=16)
+    parser.add_argument('--intervalo', type=float, default=0.1, help='intervalo de decisão da autoescala')
+    parser.add_argument('--resfriamento', type=float, default=0.3, help='resfriamento da autoescala')
+    parser.add_argument('--escala-tempo', type=float, default=0.01)
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--mix', default=MIX_PADRAO)
+    parser.add_argument('--quantidade-max', type=int, default=2)
+    parser.add_argument('--tempo-drenagem', type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"📊 Perfil {args.perfil} (segundos:pedidos/s)")
+    resultados = [
+        executar(args, f'fixo {args.chefs}', args.chefs, args.chefs, args.chefs),
+        executar(args, f'auto {args.chefs_min}-{args.chefs_max}', args.chefs_min,
+                 args.chefs_min, args.chefs_max),
+    ]
+
+    print("="*78)
+    print(f"  {'pool':<12}{'pedidos':>8}{'chefs médio':>13}{'pico':>6}{'chef-s':>8}"
+          f"{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}")
+    for resultado in resultados:
+        turnaround = resultado['turnaround_s']
+        print(f"  {resultado['nome']:<12}{resultado['pedidos']:>8}{resultado['chefs_medio']:>13}"
+              f"{resultado['chefs_pico']:>6}{resultado['chef_segundos']:>8}"
+              f"{turnaround.get('p50', '-'):>9}{turnaround.get('p95', '-'):>9}{turnaround.get('p99', '-'):>9}")
+    print("="*78)
+
+
+if __name__ == "__main__":
+    main()
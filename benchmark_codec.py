@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark dos Codecs do Protocolo
+Custo de codificar e decodificar e bytes por mensagem, JSON vs binário
+"""
+
+import argparse
+import timeit
+
+from binario import CodecBinario
+from protocolo import CODEC_JSON
+
+CARDAPIO = ['pizza', 'hamburguer', 'salada', 'sopa', 'lasanha', 'sanduiche']
+
+PRONTO = {
+    'pedido_id': 'P042', 'prato': 'lasanha', 'quantidade': 2, 'tempo_preparo': 6.43,
+    'chef': 'Chef_1', 'status': 'pronto', 'timestamp': '20:14:22'
+}
+
+# Mensagens típicas de uma sessão, nas duas direções
+MENSAGENS = {
+    'fazer_pedido': {'acao': 'fazer_pedido', 'prato': 'pizza', 'quantidade': 2, 'req_id': 17},
+    'pedido_aceito': {'sucesso': True, 'pedido_id': 'P042', 'mensagem': 'Pedido P042 adicionado à fila',
+                      'previsao_s': 4.12, 'previsao_p90_s': 5.87, 'req_id': 17},
+    'verificar_pedido': {'acao': 'verificar_pedido', 'pedido_id': 'P042', 'req_id': 18},
+    'preparando': {'status': 'preparando', 'pedido_id': 'P042', 'etapa': 'na_fila', 'posicao_fila': 3,
+                   'previsao_s': 2.5, 'previsao_p90_s': 3.75, 'req_id': 18},
+    'pronto': dict(PRONTO, req_id=19),
+    'evento_pronto': {'evento': 'pedido_pronto', 'pedido_id': 'P042', 'resultado': PRONTO},
+    'listar_pendentes': {'pedidos_pendentes': [f'P{n:03d}' for n in range(20)], 'total': 20, 'req_id': 20},
+}
+
+
+def medir(codec, mensagem, repeticoes):
+    """(ns para codificar, ns para decodificar, bytes do payload)"""
+    payload = codec.codificar(mensagem)
+    if codec.decodificar(payload) != mensagem:
+        raise AssertionError(f'{codec.nome}: ida e volta alterou a mensagem {mensagem}')
+    codificar = min(timeit.repeat(lambda: codec.codificar(mensagem), number=repeticoes, repeat=3))
+    decodificar = min(timeit.repeat(lambda: codec.decodificar(payload), number=repeticoes, repeat=3))
+    return codificar / repeticoes * 1e9, decodificar / repeticoes * 1e9, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--repeticoes', type=int, default=50000)
+    args = parser.parse_args()
+
+    codecs = (CODEC_JSON, CodecBinario(CARDAPIO))
+    print(f"📊 {'mensagem':<18}" + "".join(f"{codec.nome + ' cod/dec/bytes':>30}" for codec in codecs))
+    print("="*78)
+
+    totais = {codec.nome: [0.0, 0.0, 0] for codec in codecs}
+    for nome, mensagem in MENSAGENS.items():
+        linha = f"  {nome:<18}"
+        for codec in codecs:
+            codificar, decodificar, tamanho = medir(codec, mensagem, args.repeticoes)
+            linha += f"{codificar:9.0f} ns {decodificar:7.0f} ns {tamanho:5d} B"
+            total = totais[codec.nome]
+            total[0] += codificar
+            total[1] += decodificar
+            total[2] += tamanho
+        print(linha)
+
+    print("="*78)
+    linha = f"  {'total':<18}"
+    for codec in codecs:
+        codificar, decodificar, tamanho = totais[codec.nome]
+        linha += f"{codificar:9.0f} ns {decodificar:7.0f} ns {tamanho:5d} B"
+    print(linha)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Teste de Estresse do Estado dos Pedidos
+Várias threads criando, consultando e finalizando pedidos ao mesmo tempo,
+comparando um único lock global com locks em faixas
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import Future
+
+from estado import EstadoPedidos
+from retencao import ArmazemProntos
+
+
+def trabalhador(estado, indice, operacoes, consultas, barreira, erros):
+    """Ciclo de vida de um pedido: aceito, consultado algumas vezes, pronto, consultado"""
+    barreira.wait()
+    for n in range(operacoes):
+        pedido_id = f"T{indice}P{n:03d}"
+        future = Future()
+        estado.adicionar(pedido_id, future)
+        for _ in range(consultas):
+            if estado.em_andamento_de(pedido_id) is not future:
+                erros.append(pedido_id)
+        estado.concluir(pedido_id, pedido_id)
+        if estado.em_andamento_de(pedido_id) is not None or estado.pronto(pedido_id) != pedido_id:
+            erros.append(pedido_id)
+        if n % 1000 == 0:
+            estado.pendentes()
+
+
+def medir(num_faixas, threads, operacoes, consultas):
+    """Pedidos por segundo com `threads` threads disputando o estado"""
+    estado = EstadoPedidos(ArmazemProntos(max_entradas=threads * operacoes), num_faixas)
+    barreira = threading.Barrier(threads + 1)
+    erros = []
+    trabalhadores = [
+        threading.Thread(target=trabalhador, args=(estado, i, operacoes, consultas, barreira, erros))
+        for i in range(threads)
+    ]
+    for thread in trabalhadores:
+        thread.start()
+
+    barreira.wait()
+    inicio = time.perf_counter()
+    for thread in trabalhadores:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    if erros or estado.pendentes():
+        raise AssertionError(f'{len(erros)} inconsistências, {len(estado.pendentes())} pedidos sobrando')
+    return threads * operacoes / duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--operacoes', type=int, default=20000, help='pedidos por thread')
+    parser.add_argument('--consultas', type=int, default=4, help='consultas por pedido em andamento')
+    parser.add_argument('--faixas', type=int, default=16)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"📊 {args.threads} threads x {args.operacoes:,} pedidos "
+          f"({args.consultas} consultas por pedido)")
+    print("="*60)
+
+    vazoes = {}
+    for nome, num_faixas in (('lock global', 1), (f'{args.faixas} faixas', args.faixas)):
+        vazao = max(medir(num_faixas, args.threads, args.operacoes, args.consultas)
+                    for _ in range(args.repeticoes))
+        vazoes[num_faixas] = vazao
+        print(f"  {nome:<12} {vazao:12,.0f} pedidos/s")
+
+    print("="*60)
+    print(f"  Ganho: {vazoes[args.faixas] / vazoes[1]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Memória dos Registros de Pedidos
+Compara os dicionários antigos com os registros Pedido/Resultado (__slots__)
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from modelos import Pedido, Resultado
+
+CARDAPIO = ['pizza', 'hamburguer', 'salada', 'sopa', 'lasanha', 'sanduiche']
+CHEFS = [f"Chef_{i}" for i in range(4)]
+
+
+def criar_dicts(n):
+    """Representação antiga: um dict por pedido e outro por resultado"""
+    pedidos, resultados = [], []
+    for i in range(n):
+        pedido_id = f"P{i:03d}"
+        prato = CARDAPIO[i % len(CARDAPIO)]
+        pedidos.append({
+            'id': pedido_id,
+            'prato': prato,
+            'quantidade': 1 + i % 3,
+            'timestamp_pedido': time.strftime('%H:%M:%S')
+        })
+        resultados.append({
+            'pedido_id': pedido_id,
+            'prato': prato,
+            'quantidade': 1 + i % 3,
+            'tempo_preparo': round(1.0 + (i % 100) / 100, 2),
+            'chef': f"Chef_{i % len(CHEFS)}",
+            'status': 'pronto',
+            'timestamp': time.strftime('%H:%M:%S')
+        })
+    return pedidos, resultados
+
+
+def criar_registros(n):
+    """Representação nova: registros com __slots__"""
+    pedidos, resultados = [], []
+    agora = time.monotonic()
+    for i in range(n):
+        pedido_id = f"P{i:03d}"
+        indice = i % len(CARDAPIO)
+        pedidos.append(Pedido(pedido_id, indice, 1 + i % 3, agora))
+        resultados.append(Resultado(
+            pedido_id, indice, 1 + i % 3, 1.0 + (i % 100) / 100,
+            f"Chef_{i % len(CHEFS)}", agora
+        ))
+    return pedidos, resultados
+
+
+def medir(construtor, n):
+    """Bytes alocados e segundos gastos para construir n pedidos + resultados"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    dados = construtor(n)
+    duracao = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del dados
+    return memoria, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--pedidos', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"📊 Memória para {args.pedidos:,} pedidos (pedido + resultado)")
+    print("="*60)
+
+    medidas = {}
+    for nome, construtor in (('dicts', criar_dicts), ('__slots__', criar_registros)):
+        memoria, duracao = medir(construtor, args.pedidos)
+        medidas[nome] = memoria
+        print(f"  {nome:<10} {memoria / 2**20:8.1f} MiB  "
+              f"{memoria / args.pedidos:6.0f} B/pedido  {duracao:6.2f}s")
+
+    print("="*60)
+    print(f"  Redução: {1 - medidas['__slots__'] / medidas['dicts']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Codec Binário do Protocolo do Restaurante
+Formatos fixos com struct para as mensagens mais frequentes (pratos como
+índice do cardápio); as demais continuam em JSON
+"""
+
+import struct
+
+from protocolo import CODEC_JSON, ErroProtocolo
+
+# Primeiro byte do payload: o formato fixo da mensagem. Texto JSON nunca
+# começa com esses bytes, então qualquer outro valor é um payload JSON
+FAZER_PEDIDO = 1
+VERIFICAR_PEDIDO = 2
+PEDIDO_ACEITO = 3
+PRONTO = 4
+PREPARANDO = 5
+EVENTO_PRONTO = 6
+
+# Tipo + req_id (0 = mensagem sem id de correlação)
+_CABECALHO = struct.Struct('!BI')
+_FAZER_PEDIDO = struct.Struct('!BIBBH')
+_PRONTO = struct.Struct('!BIBHd')
+_PREPARANDO = struct.Struct('!BIBI')
+_PRAZO = struct.Struct('!d')
+# Previsão de término opcional no fim do PEDIDO_ACEITO e do PREPARANDO
+_PREVISAO = struct.Struct('!dd')
+
+# Bits de `flags` no FAZER_PEDIDO
+_SUBSCREVER = 1
+_COM_PRAZO = 2
+
+_CHAVES_FAZER_PEDIDO = {'acao', 'prato', 'quantidade', 'subscrever', 'prazo', 'req_id'}
+_CHAVES_PRONTO = {'pedido_id', 'prato', 'quantidade', 'tempo_preparo', 'chef', 'status', 'timestamp'}
+_CHAVES_PREVISAO = {'previsao_s', 'previsao_p90_s'}
+_CHAVES_PEDIDO_ACEITO = {'sucesso', 'pedido_id', 'mensagem', 'req_id'} | _CHAVES_PREVISAO
+_ETAPAS = ('em_preparo', 'na_fila')
+
+CODECS = ('binario', 'json')
+
+
+class _NaoRepresentavel(Exception):
+    """A mensagem não cabe em um formato fixo e vai em JSON"""
+
+
+def _texto_curto(texto):
+    if not isinstance(texto, str):
+        raise _NaoRepresentavel
+    dados = texto.encode('utf-8')
+    if len(dados) > 255:
+        raise _NaoRepresentavel
+    return bytes((len(dados),)) + dados
+
+
+def _ler_texto_curto(payload, posicao):
+    tamanho = payload[posicao]
+    fim = posicao + 1 + tamanho
+    return payload[posicao + 1:fim].decode('utf-8'), fim
+
+
+def _previsao(mensagem):
+    """Bytes da previsão de término, se a mensagem trouxer as duas chaves"""
+    presentes = mensagem.keys() & _CHAVES_PREVISAO
+    if not presentes:
+        return b''
+    if (presentes != _CHAVES_PREVISAO or type(mensagem['previsao_s']) is not float
+            or type(mensagem['previsao_p90_s']) is not float):
+        raise _NaoRepresentavel
+    return _PREVISAO.pack(mensagem['previsao_s'], mensagem['previsao_p90_s'])
+
+
+def _ler_previsao(payload, posicao, mensagem):
+    if posicao < len(payload):
+        mensagem['previsao_s'], mensagem['previsao_p90_s'] = _PREVISAO.unpack_from(payload, posicao)
+    return mensagem
+
+
+def _req_id(mensagem):
+    req_id = mensagem.get('req_id', 0)
+    if type(req_id) is not int or not 0 <= req_id < 2 ** 32 or ('req_id' in mensagem and req_id == 0):
+        raise _NaoRepresentavel
+    return req_id
+
+
+class CodecBinario:
+    """Codec binário de um servidor com um cardápio conhecido pelos dois lados.
+
+    Comandos e respostas dos caminhos quentes (fazer_pedido, verificar_pedido,
+    pedido aceito, pronto, preparando e o evento pedido_pronto) usam formatos
+    fixos, e os dois com previsão de término a levam em dois doubles no fim;
+    qualquer outra mensagem, ou uma que fuja do formato esperado, vai
+    em JSON. A decodificação devolve exatamente o dicionário codificado e
+    também aceita JSON puro, então um quadro JSON enviado logo antes da troca
+    de codec ainda é lido corretamente.
+    """
+    nome = 'binario'
+
+    def __init__(self, cardapio):
+        self.cardapio = list(cardapio)
+        self.indices = {prato: i for i, prato in enumerate(self.cardapio)}
+
+    # ------------------------------------------------------------------
+    # Codificação
+    # ------------------------------------------------------------------
+
+    def codificar(self, mensagem):
+        try:
+            return self._codificar_fixo(mensagem)
+        except _NaoRepresentavel:
+            return CODEC_JSON.codificar(mensagem)
+
+    def _codificar_fixo(self, mensagem):
+        if not isinstance(mensagem, dict):
+            raise _NaoRepresentavel
+
+        acao = mensagem.get('acao')
+        if acao == 'fazer_pedido':
+            return self._fazer_pedido(mensagem)
+        if acao == 'verificar_pedido' and mensagem.keys() <= {'acao', 'pedido_id', 'req_id'}:
+            return _CABECALHO.pack(VERIFICAR_PEDIDO, _req_id(mensagem)) + _texto_curto(mensagem['pedido_id'])
+
+        status = mensagem.get('status')
+        if status == 'pronto':
+            return self._pronto(PRONTO, _req_id(mensagem), mensagem, {'req_id'})
+        if status == 'preparando':
+            return self._preparando(mensagem)
+
+        if mensagem.get('evento') == 'pedido_pronto' and mensagem.keys() == {'evento', 'pedido_id', 'resultado'}:
+            resultado = mensagem['resultado']
+            if isinstance(resultado, dict) and resultado.get('pedido_id') == mensagem['pedido_id']:
+                return self._pronto(EVENTO_PRONTO, 0, resultado, set())
+
+        if mensagem.get('sucesso') is True and mensagem.keys() <= _CHAVES_PEDIDO_ACEITO:
+            pedido_id = mensagem.get('pedido_id')
+            if mensagem.get('mensagem') == f'Pedido {pedido_id} adicionado à fila':
+                return (_CABECALHO.pack(PEDIDO_ACEITO, _req_id(mensagem)) + _texto_curto(pedido_id)
+                        + _previsao(mensagem))
+
+        raise _NaoRepresentavel
+
+    def _fazer_pedido(self, mensagem):
+        if not mensagem.keys() <= _CHAVES_FAZER_PEDIDO:
+            raise _NaoRepresentavel
+        indice = self.indices.get(mensagem.get('prato'))
+        quantidade = mensagem.get('quantidade')
+        if indice is None or indice > 255 or type(quantidade) is not int or not 0 <= quantidade < 2 ** 16:
+            raise _NaoRepresentavel
+
+        flags = 0
+        if 'subscrever' in mensagem:
+            if mensagem['subscrever'] is not True:
+                raise _NaoRepresentavel
+            flags |= _SUBSCREVER
+        prazo = b''
+        if 'prazo' in mensagem:
+            if type(mensagem['prazo']) is not float:
+                raise _NaoRepresentavel
+            flags |= _COM_PRAZO
+            prazo = _PRAZO.pack(mensagem['prazo'])
+
+        return _FAZER_PEDIDO.pack(FAZER_PEDIDO, _req_id(mensagem), flags, indice, quantidade) + prazo
+
+    def _pronto(self, tipo, req_id, resultado, extras):
+        if resultado.keys() - extras != _CHAVES_PRONTO:
+            raise _NaoRepresentavel
+        indice = self.indices.get(resultado['prato'])
+        quantidade = resultado['quantidade']
+        if (indice is None or indice > 255 or type(quantidade) is not int
+                or not 0 <= quantidade < 2 ** 16 or type(resultado['tempo_preparo']) is not float):
+            raise _NaoRepresentavel
+
+        return (_PRONTO.pack(tipo, req_id, indice, quantidade, resultado['tempo_preparo'])
+                + _texto_curto(resultado['pedido_id'])
+                + _texto_curto(resultado['chef'])
+                + _texto_curto(resultado['timestamp']))
+
+    def _preparando(self, mensagem):
+        etapa = mensagem.get('etapa')
+        if etapa == 'na_fila':
+            chaves = {'status', 'pedido_id', 'etapa', 'posicao_fila', 'req_id'}
+            posicao = mensagem.get('posicao_fila')
+            if type(posicao) is not int or not 0 <= posicao < 2 ** 32:
+                raise _NaoRepresentavel
+        elif etapa == 'em_preparo':
+            chaves = {'status', 'pedido_id', 'etapa', 'req_id'}
+            posicao = 0
+        else:
+            raise _NaoRepresentavel
+        if not mensagem.keys() <= chaves | _CHAVES_PREVISAO or 'pedido_id' not in mensagem:
+            raise _NaoRepresentavel
+
+        return (_PREPARANDO.pack(PREPARANDO, _req_id(mensagem), _ETAPAS.index(etapa), posicao)
+                + _texto_curto(mensagem['pedido_id'])
+                + _previsao(mensagem))
+
+    # ------------------------------------------------------------------
+    # Decodificação
+    # ------------------------------------------------------------------
+
+    def decodificar(self, payload):
+        try:
+            return self._decodificar(payload)
+        except (IndexError, struct.error, UnicodeDecodeError, ValueError) as e:
+            raise ErroProtocolo(f'Payload binário inválido: {e}')
+
+    def _decodificar(self, payload):
+        tipo = payload[0]
+
+        if tipo == FAZER_PEDIDO:
+            _, req_id, flags, indice, quantidade = _FAZER_PEDIDO.unpack_from(payload)
+            mensagem = {'acao': 'fazer_pedido', 'prato': self.cardapio[indice], 'quantidade': quantidade}
+            if flags & _SUBSCREVER:
+                mensagem['subscrever'] = True
+            if flags & _COM_PRAZO:
+                (mensagem['prazo'],) = _PRAZO.unpack_from(payload, _FAZER_PEDIDO.size)
+            return self._com_req_id(mensagem, req_id)
+
+        if tipo == VERIFICAR_PEDIDO:
+            _, req_id = _CABECALHO.unpack_from(payload)
+            pedido_id, _ = _ler_texto_curto(payload, _CABECALHO.size)
+            return self._com_req_id({'acao': 'verificar_pedido', 'pedido_id': pedido_id}, req_id)
+
+        if tipo == PEDIDO_ACEITO:
+            _, req_id = _CABECALHO.unpack_from(payload)
+            pedido_id, posicao = _ler_texto_curto(payload, _CABECALHO.size)
+            mensagem = {
+                'sucesso': True,
+                'pedido_id': pedido_id,
+                'mensagem': f'Pedido {pedido_id} adicionado à fila'
+            }
+            return self._com_req_id(_ler_previsao(payload, posicao, mensagem), req_id)
+
+        if tipo in (PRONTO, EVENTO_PRONTO):
+            _, req_id, indice, quantidade, tempo_preparo = _PRONTO.unpack_from(payload)
+            pedido_id, posicao = _ler_texto_curto(payload, _PRONTO.size)
+            chef, posicao = _ler_texto_curto(payload, posicao)
+            timestamp, _ = _ler_texto_curto(payload, posicao)
+            resultado = {
+                'pedido_id': pedido_id,
+                'prato': self.cardapio[indice],
+                'quantidade': quantidade,
+                'tempo_preparo': tempo_preparo,
+                'chef': chef,
+                'status': 'pronto',
+                'timestamp': timestamp
+            }
+            if tipo == EVENTO_PRONTO:
+                return {'evento': 'pedido_pronto', 'pedido_id': pedido_id, 'resultado': resultado}
+            return self._com_req_id(resultado, req_id)
+
+        if tipo == PREPARANDO:
+            _, req_id, etapa, posicao = _PREPARANDO.unpack_from(payload)
+            pedido_id, fim = _ler_texto_curto(payload, _PREPARANDO.size)
+            mensagem = {'status': 'preparando', 'pedido_id': pedido_id, 'etapa': _ETAPAS[etapa]}
+            if _ETAPAS[etapa] == 'na_fila':
+                mensagem['posicao_fila'] = posicao
+            return self._com_req_id(_ler_previsao(payload, fim, mensagem), req_id)
+
+        return CODEC_JSON.decodificar(payload)
+
+    @staticmethod
+    def _com_req_id(mensagem, req_id):
+        if req_id:
+            mensagem['req_id'] = req_id
+        return mensagem
+
+
+def criar_codec(nome, cardapio):
+    """Codec pelo nome negociado no aperto de mão"""
+    if nome == 'binario':
+        return CodecBinario(cardapio)
+    if nome == 'json':
+        return CODEC_JSON
+    raise ValueError(f'Codec "{nome}" inválido, use um de {CODECS}')
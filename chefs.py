@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Pool de Chefs do Restaurante
+Threads de chefs que crescem e encolhem entre um mínimo e um máximo,
+ajustadas pela espera na fila e pela utilização da cozinha
+"""
+
+import itertools
+import math
+import queue
+import threading
+import time
+
+
+class PoolChefs:
+    """Pool de threads redimensionável, no lugar do ThreadPoolExecutor fixo.
+
+    Cada `submit` enfileira uma tarefa; a primeira thread livre a executa.
+    Crescer cria threads na hora. Encolher enfileira avisos de saída, que as
+    threads só leem depois das tarefas já enfileiradas, então nenhum chef
+    abandona trabalho: o pool diminui à medida que a cozinha esvazia.
+
+    O pool também mede, para a autoescala, quanto tempo as tarefas esperam
+    por um chef e quanto tempo os chefs passam ocupados.
+    """
+
+    def __init__(self, tamanho, prefixo='Chef'):
+        self.prefixo = prefixo
+        self.tarefas = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.alvo = tamanho
+        self.threads = set()
+        self.nomes = itertools.count()
+        self.encerrando = False
+
+        # Amostras para a autoescala, acumuladas desde a última leitura
+        self.espera_acumulada = 0.0
+        self.tarefas_iniciadas = 0
+        self.ocupado_acumulado = 0.0
+        self.em_execucao = {}
+        self.ultima_amostra = time.monotonic()
+
+        self._ajustar_threads()
+
+    @property
+    def tamanho(self):
+        return self.alvo
+
+    def submit(self, funcao, *args):
+        if self.encerrando:
+            raise RuntimeError('Pool de chefs encerrado')
+        self.tarefas.put((funcao, args, time.monotonic()))
+
+    def redimensionar(self, tamanho):
+        """Muda o número de chefs; retorna o tamanho anterior"""
+        with self.lock:
+            anterior, self.alvo = self.alvo, max(1, tamanho)
+        self._ajustar_threads()
+        return anterior
+
+    def _ajustar_threads(self):
+        with self.lock:
+            if self.encerrando:
+                return
+            faltando = self.alvo - len(self.threads)
+            for _ in range(faltando):
+                thread = threading.Thread(
+                    target=self._trabalhar, name=f"{self.prefixo}_{next(self.nomes)}", daemon=True
+                )
+                self.threads.add(thread)
+                thread.start()
+        for _ in range(-faltando):
+            self.tarefas.put(None)
+
+    def _trabalhar(self):
+        thread = threading.current_thread()
+        while True:
+            item = self.tarefas.get()
+            if item is None:
+                # Aviso de saída: só sai se o pool ainda está acima do alvo
+                with self.lock:
+                    if self.encerrando or len(self.threads) > self.alvo:
+                        self.threads.discard(thread)
+                        return
+                continue
+
+            funcao, args, enfileirada_em = item
+            inicio = time.monotonic()
+            with self.lock:
+                self.espera_acumulada += inicio - enfileirada_em
+                self.tarefas_iniciadas += 1
+                self.em_execucao[thread] = inicio
+            try:
+                funcao(*args)
+            except Exception:
+                # Como no executor: o preparo já registra a falha no pedido
+                pass
+            finally:
+                with self.lock:
+                    self.ocupado_acumulado += time.monotonic() - self.em_execucao.pop(thread)
+
+    def amostrar(self):
+        """(espera média por um chef, utilização) desde a amostra anterior"""
+        agora = time.monotonic()
+        with self.lock:
+            ocupado = self.ocupado_acumulado + sum(agora - inicio for inicio in self.em_execucao.values())
+            # O tempo em execução já contado sai do acumulado da próxima amostra
+            self.ocupado_acumulado = -sum(agora - inicio for inicio in self.em_execucao.values())
+            espera = self.espera_acumulada / self.tarefas_iniciadas if self.tarefas_iniciadas else 0.0
+            self.espera_acumulada, self.tarefas_iniciadas = 0.0, 0
+            intervalo, self.ultima_amostra = agora - self.ultima_amostra, agora
+            capacidade = max(len(self.threads), 1) * intervalo
+        return espera, min(ocupado / capacidade, 1.0) if capacidade > 0 else 0.0
+
+    def shutdown(self, wait=True):
+        """Executa as tarefas já enfileiradas e encerra as threads"""
+        with self.lock:
+            self.encerrando = True
+            threads = list(self.threads)
+        for _ in threads:
+            self.tarefas.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+class AutoescalaChefs:
+    """Ajusta periodicamente o tamanho de um PoolChefs entre `minimo` e `maximo`.
+
+    A cada `intervalo` segundos observa a espera média por um chef, a
+    utilização e o trabalho estimado na fila (`trabalho_fila()`, em segundos
+    de preparo):
+
+    - cresce se a espera (observada ou estimada) passa de `espera_alvo`, ou se
+      a utilização passa de `utilizacao_alta` com pedidos na fila, direto para
+      o número de chefs que traz a espera estimada de volta ao alvo;
+    - encolhe um chef por vez se a utilização está abaixo de `utilizacao_baixa`
+      e a espera, mesmo com um chef a menos, fica abaixo de um quarto do alvo.
+
+    A distância entre os limiares de subida e descida é a histerese; depois de
+    qualquer mudança, nenhuma outra acontece por `resfriamento` segundos.
+    """
+
+    def __init__(self, pool, trabalho_fila, minimo, maximo, espera_alvo=1.0, intervalo=0.5,
+                 resfriamento=2.0, utilizacao_alta=0.85, utilizacao_baixa=0.3, ao_mudar=None):
+        self.pool = pool
+        self.trabalho_fila = trabalho_fila
+        self.minimo = minimo
+        self.maximo = maximo
+        self.espera_alvo = espera_alvo
+        self.intervalo = intervalo
+        self.resfriamento = resfriamento
+        self.utilizacao_alta = utilizacao_alta
+        self.utilizacao_baixa = utilizacao_baixa
+        self.ao_mudar = ao_mudar
+        self.ultima_mudanca = float('-inf')
+        self.parada = threading.Event()
+        self.thread = None
+
+    def ajustar_limites(self, minimo=None, maximo=None):
+        """Novos limites; o pool é trazido para dentro deles imediatamente"""
+        minimo = self.minimo if minimo is None else minimo
+        maximo = self.maximo if maximo is None else maximo
+        if not 1 <= minimo <= maximo:
+            raise ValueError('Limites devem satisfazer 1 <= minimo <= maximo')
+        self.minimo, self.maximo = minimo, maximo
+
+        tamanho = self.pool.tamanho
+        novo = min(max(tamanho, minimo), maximo)
+        if novo != tamanho:
+            self._aplicar(novo, 'limites')
+
+    def decidir(self, espera, utilizacao, trabalho, tamanho):
+        """Novo tamanho do pool (ou o atual) para as observações dadas"""
+        espera_estimada = trabalho / tamanho
+        if tamanho < self.maximo and (
+                max(espera, espera_estimada) > self.espera_alvo
+                or (utilizacao > self.utilizacao_alta and trabalho > 0)):
+            necessarios = math.ceil(trabalho / self.espera_alvo)
+            return min(self.maximo, max(tamanho + 1, necessarios))
+
+        if (tamanho > self.minimo and utilizacao < self.utilizacao_baixa
+                and espera < self.espera_alvo / 4
+                and trabalho / (tamanho - 1) < self.espera_alvo / 4):
+            return tamanho - 1
+
+        return tamanho
+
+    def verificar(self):
+        """Uma rodada de decisão; retorna o tamanho do pool depois dela"""
+        espera, utilizacao = self.pool.amostrar()
+        tamanho = self.pool.tamanho
+        if time.monotonic() - self.ultima_mudanca < self.resfriamento:
+            return tamanho
+
+        novo = self.decidir(espera, utilizacao, self.trabalho_fila(), tamanho)
+        if novo != tamanho:
+            self._aplicar(novo, 'carga', espera=round(espera, 3), utilizacao=round(utilizacao, 2))
+        return novo
+
+    def _aplicar(self, tamanho, motivo, **observacoes):
+        anterior = self.pool.redimensionar(tamanho)
+        self.ultima_mudanca = time.monotonic()
+        if self.ao_mudar is not None:
+            self.ao_mudar(anterior, tamanho, motivo, observacoes)
+
+    def iniciar(self):
+        self.thread = threading.Thread(target=self._executar, name="Autoescala", daemon=True)
+        self.thread.start()
+
+    def _executar(self):
+        while not self.parada.wait(self.intervalo):
+            self.verificar()
+
+    def parar(self):
+        self.parada.set()
+        if self.thread is not None:
+            self.thread.join()
@@ -4,75 +4,245 @@ Cliente do Sistema de Restaurante Distribuído
 Interface para interação com o usuário
 """
 
+import argparse
 import socket
-import json
+import re
 import time
+import itertools
+import threading
+from concurrent.futures import Future
+
+from binario import CODECS, criar_codec
+from protocolo import CAMPO_CORRELACAO, CODEC_JSON, LeitorMensagens, codificar_mensagem, enviar_mensagem
+
+class CacheCardapio:
+    """Cardápio compartilhado entre conexões e validado pela versão (ETag) do servidor"""
+    
+    def __init__(self):
+        self.versao = None
+        self.cardapio = []
+        self.lock = threading.Lock()
+    
+    def atualizar(self, resposta):
+        """Aplica uma resposta de obter_cardapio/negociar e retorna o cardápio atual"""
+        with self.lock:
+            if 'cardapio' in resposta:
+                self.cardapio = resposta['cardapio']
+                self.versao = resposta.get('versao_cardapio')
+            return self.cardapio
 
 class RestauranteCliente:
-    def __init__(self, host='localhost', port=8888):
+    def __init__(self, host='localhost', port=8888, codecs=CODECS, cache_cardapio=None,
+                 silencioso=False, timeout_conexao=None):
         self.host = host
         self.port = port
         self.socket = None
+        self.leitor = None
+        self.silencioso = silencioso
+        self.timeout_conexao = timeout_conexao
+        self.ultimo_erro = None
+        
+        # Cardápio em cache: só é transferido de novo se a versão mudar
+        self.cache_cardapio = cache_cardapio if cache_cardapio is not None else CacheCardapio()
+        
+        # Codecs aceitos, em ordem de preferência; JSON até o aperto de mão
+        self.codecs = list(codecs)
+        self.codec = CODEC_JSON
         self.conectado = False
         self.cardapio = []
+        self.shard = None
+        self.ids_requisicao = itertools.count(1)
+        
+        # Respostas aguardadas (req_id -> Future) e recepção em segundo plano
+        self.respostas_pendentes = {}
+        self.lock_envio = threading.Lock()
+        self.thread_receptora = None
+        
+        # Callbacks de eventos enviados pelo servidor
+        self.callbacks_eventos = {}
+        self.callbacks_pedidos = {}
     
     def conectar(self):
         """Estabelece conexão com o servidor"""
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
+            self.socket = socket.create_connection((self.host, self.port), self.timeout_conexao)
+            self.socket.settimeout(None)
+            self.leitor = LeitorMensagens(self.socket)
             self.conectado = True
-            print(f"🔗 Conectado ao servidor {self.host}:{self.port}")
+            negociado = self._negociar_codec()
+            
+            # Inicia a thread que recebe respostas e notificações
+            self.thread_receptora = threading.Thread(
+                target=self._receber_mensagens, name="Receptor", daemon=True
+            )
+            self.thread_receptora.start()
+            self._avisar(f"🔗 Conectado ao servidor {self.host}:{self.port}")
             
-            # Obtém o cardápio do servidor
-            self.obter_cardapio()
+            # O aperto de mão já traz o cardápio; sem ele, pede ao servidor
+            if not negociado:
+                self.obter_cardapio()
             return True
             
         except Exception as e:
-            print(f"❌ Erro ao conectar ao servidor: {e}")
+            self.ultimo_erro = e
+            self.conectado = False
+            if self.socket is not None:
+                self.socket.close()
+            self._avisar(f"❌ Erro ao conectar ao servidor: {e}")
             return False
     
+    def _avisar(self, mensagem):
+        if not self.silencioso:
+            print(mensagem)
+    
+    def _negociar_codec(self):
+        """Aperto de mão síncrono, antes de a thread receptora começar a ler.
+        
+        Servidores que não conhecem 'negociar' respondem com erro e a conexão
+        segue em JSON.
+        """
+        if self.codecs == ['json']:
+            return False
+        comando = {'acao': 'negociar', 'codecs': self.codecs}
+        if self.cache_cardapio.versao is not None:
+            comando['versao_cardapio'] = self.cache_cardapio.versao
+        enviar_mensagem(self.socket, comando)
+        
+        resposta = self.leitor.ler_mensagem()
+        if resposta is None:
+            raise ConnectionError('Servidor encerrou a conexão durante o aperto de mão')
+        if not resposta.get('sucesso'):
+            return False
+        
+        self.cardapio = self.cache_cardapio.atualizar(resposta)
+        self.shard = resposta.get('shard')
+        self.codec = criar_codec(resposta['codec'], self.cardapio)
+        self.leitor.codec = self.codec
+        return True
+    
     def desconectar(self):
         """Fecha a conexão com o servidor"""
         if self.socket:
+            self.conectado = False
+            try:
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
             self.socket.close()
+            self._avisar("🔌 Desconectado do servidor")
+    
+    def _receber_mensagens(self):
+        """Loop da thread receptora: entrega respostas e despacha eventos"""
+        erro = ConnectionError('Servidor encerrou a conexão')
+        try:
+            while True:
+                mensagem = self.leitor.ler_mensagem()
+                if mensagem is None:
+                    break
+                
+                if 'evento' in mensagem:
+                    self._despachar_evento(mensagem)
+                    continue
+                
+                future = self.respostas_pendentes.pop(mensagem.pop(CAMPO_CORRELACAO, None), None)
+                if future is not None:
+                    future.set_result(mensagem)
+        
+        except Exception as e:
+            erro = e
+        
+        finally:
             self.conectado = False
-            print("🔌 Desconectado do servidor")
+            for req_id in list(self.respostas_pendentes):
+                future = self.respostas_pendentes.pop(req_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(erro)
+    
+    def _despachar_evento(self, evento):
+        """Chama os callbacks registrados para um evento do servidor"""
+        callbacks = list(self.callbacks_eventos.get(evento['evento'], []))
+        if evento['evento'] == 'pedido_pronto':
+            callback_pedido = self.callbacks_pedidos.pop(evento.get('pedido_id'), None)
+            if callback_pedido is not None:
+                callbacks.append(callback_pedido)
+        
+        for callback in callbacks:
+            try:
+                callback(evento)
+            except Exception as e:
+                self._avisar(f"❌ Erro no callback do evento {evento['evento']}: {e}")
+    
+    def ao_receber_evento(self, tipo_evento, callback):
+        """Registra um callback para eventos do servidor (ex.: 'pedido_pronto').
+        
+        Os callbacks rodam na thread receptora e não devem bloquear.
+        """
+        self.callbacks_eventos.setdefault(tipo_evento, []).append(callback)
     
     def enviar_comando(self, comando):
         """Envia um comando para o servidor e retorna a resposta"""
+        return self.enviar_comandos([comando])[0]
+    
+    def enviar_comandos(self, comandos):
+        """Envia vários comandos em pipeline e retorna as respostas na mesma ordem"""
+        return [self._aguardar_resposta(future) for future in self.enviar_comandos_sem_esperar(comandos)]
+    
+    def enviar_comandos_sem_esperar(self, comandos):
+        """Envia os comandos em pipeline e retorna um Future por resposta"""
+        futures = [Future() for _ in comandos]
         if not self.conectado:
-            return {'erro': 'Não conectado ao servidor'}
+            for future in futures:
+                future.set_result({'erro': 'Não conectado ao servidor'})
+            return futures
         
         try:
-            # Envia comando
-            comando_json = json.dumps(comando, ensure_ascii=False)
-            self.socket.send(comando_json.encode('utf-8'))
+            # Marca cada comando com um id de correlação e envia tudo de uma vez
+            quadros = []
+            for comando, future in zip(comandos, futures):
+                req_id = next(self.ids_requisicao)
+                self.respostas_pendentes[req_id] = future
+                quadros.append(codificar_mensagem(dict(comando, **{CAMPO_CORRELACAO: req_id}), self.codec))
             
-            # Recebe resposta
-            resposta = self.socket.recv(4096).decode('utf-8')
-            return json.loads(resposta)
+            with self.lock_envio:
+                self.socket.sendall(b''.join(quadros))
             
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        
+        # A thread receptora associa as respostas aos comandos pelo id
+        return futures
+    
+    @staticmethod
+    def _aguardar_resposta(future):
+        try:
+            return future.result()
         except Exception as e:
             return {'erro': f'Erro de comunicação: {str(e)}'}
     
     def obter_cardapio(self):
-        """Obtém o cardápio do servidor"""
+        """Obtém o cardápio do servidor; se a versão em cache é a atual, ele não é reenviado"""
         comando = {'acao': 'obter_cardapio'}
+        if self.cache_cardapio.versao is not None:
+            comando['versao_cardapio'] = self.cache_cardapio.versao
         resposta = self.enviar_comando(comando)
         
-        if 'cardapio' in resposta:
-            self.cardapio = resposta['cardapio']
+        if 'erro' not in resposta:
+            self.cardapio = self.cache_cardapio.atualizar(resposta)
+            self.shard = resposta.get('shard')
         
         return resposta
     
-    def fazer_pedido(self, prato, quantidade=1):
-        """Faz um pedido ao servidor"""
+    def fazer_pedido(self, prato, quantidade=1, prazo=None):
+        """Faz um pedido ao servidor; `prazo` opcional em segundos a partir de agora"""
         comando = {
             'acao': 'fazer_pedido',
             'prato': prato,
             'quantidade': quantidade
         }
+        if prazo is not None:
+            comando['prazo'] = prazo
         return self.enviar_comando(comando)
     
     def verificar_pedido(self, pedido_id):
@@ -83,6 +253,22 @@ class RestauranteCliente:
         }
         return self.enviar_comando(comando)
     
+    def fazer_pedidos_lote(self, itens):
+        """Faz vários pedidos em uma única requisição; itens são pares (prato, quantidade)"""
+        comando = {
+            'acao': 'fazer_pedidos_lote',
+            'itens': [{'prato': prato, 'quantidade': quantidade} for prato, quantidade in itens]
+        }
+        return self.enviar_comando(comando)
+    
+    def verificar_pedidos_lote(self, pedido_ids):
+        """Verifica o status de vários pedidos em uma única requisição"""
+        comando = {
+            'acao': 'verificar_pedidos_lote',
+            'pedido_ids': list(pedido_ids)
+        }
+        return self.enviar_comando(comando)
+    
     def listar_pendentes(self):
         """Lista pedidos pendentes no servidor"""
         comando = {'acao': 'listar_pendentes'}
@@ -93,6 +279,67 @@ class RestauranteCliente:
         comando = {'acao': 'aguardar_todos'}
         return self.enviar_comando(comando)
     
+    def aguardar_pedido(self, pedido_id, timeout=None):
+        """Espera no servidor até o pedido ficar pronto ou o timeout (segundos) vencer"""
+        comando = {
+            'acao': 'aguardar_pedido',
+            'pedido_id': pedido_id,
+            'timeout': timeout
+        }
+        return self.enviar_comando(comando)
+    
+    def acompanhar_pedido(self, pedido_id, timeout=None, intervalo_minimo=0.1, intervalo_maximo=5.0):
+        """Consulta o pedido até ele ficar pronto, esperando entre as consultas a previsão do servidor"""
+        limite = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            resposta = self.verificar_pedido(pedido_id)
+            if resposta.get('status') != 'preparando':
+                return resposta
+            pausa = min(max(resposta.get('previsao_s', intervalo_minimo), intervalo_minimo), intervalo_maximo)
+            if limite is not None and time.monotonic() + pausa > limite:
+                resposta['timeout'] = True
+                return resposta
+            time.sleep(pausa)
+    
+    def aguardar_meus_pedidos(self, timeout=None):
+        """Espera os pedidos feitos por esta conexão; devolve os prontos e os ainda pendentes"""
+        comando = {
+            'acao': 'aguardar_meus_pedidos',
+            'timeout': timeout
+        }
+        return self.enviar_comando(comando)
+    
+    def ajustar_chefs(self, minimo=None, maximo=None, estacao=None):
+        """Ação administrativa: limites da autoescala de chefs (sem argumentos, só consulta)"""
+        comando = {
+            'acao': 'ajustar_chefs',
+            'minimo': minimo,
+            'maximo': maximo,
+            'estacao': estacao
+        }
+        return self.enviar_comando(comando)
+    
+    def drenar(self):
+        """Ação administrativa: o servidor para de aceitar pedidos novos e termina os atuais"""
+        return self.enviar_comando({'acao': 'drenar'})
+    
+    def reiniciar(self):
+        """Ação administrativa: reinicia o servidor sem recusar conexões"""
+        return self.enviar_comando({'acao': 'reiniciar'})
+    
+    def subscrever(self, pedido_id, callback=None):
+        """Pede ao servidor para notificar quando o pedido ficar pronto"""
+        if callback is not None:
+            self.callbacks_pedidos[pedido_id] = callback
+        comando = {
+            'acao': 'subscrever',
+            'pedido_id': pedido_id
+        }
+        resposta = self.enviar_comando(comando)
+        if 'erro' in resposta:
+            self.callbacks_pedidos.pop(pedido_id, None)
+        return resposta
+    
     def mostrar_menu(self):
         """Exibe o menu de opções para o usuário"""
         print("\n" + "="*50)
@@ -110,7 +357,9 @@ class RestauranteCliente:
         print("  pedido <prato> [quantidade]  - Fazer um pedido")
         print("  status <id>                  - Verificar status do pedido")
         print("  pendentes                    - Listar pedidos em andamento")
-        print("  aguardar                     - Aguardar todos os pedidos")
+        print("  aguardar [segundos]          - Aguardar os seus pedidos")
+        print("  avisar <id>                  - Ser notificado quando o pedido ficar pronto")
+        print("  chefs [min max [estacao]]    - Ver ou mudar os limites de chefs da cozinha")
         print("  menu                         - Mostrar este menu")
         print("  sair                         - Encerrar")
         print("="*50)
@@ -146,8 +395,12 @@ class RestauranteCliente:
         if 'sucesso' in resposta and resposta['sucesso']:
             print(f"✅ {resposta['mensagem']}")
             print(f"🆔 ID do pedido: {resposta['pedido_id']}")
+            if 'previsao_s' in resposta:
+                print(f"⏱️  Previsão: ~{resposta['previsao_s']}s (até {resposta['previsao_p90_s']}s)")
         elif 'erro' in resposta:
             print(f"❌ {resposta['erro']}")
+            if resposta.get('status') == 'rejeitado':
+                print(f"⏳ Tente novamente em {resposta['tente_mais_tarde']}s")
         else:
             print(f"📋 Resposta: {resposta}")
     
@@ -165,8 +418,13 @@ class RestauranteCliente:
         
         if 'erro' in resposta:
             print(f"❌ {resposta['erro']}")
+        elif resposta.get('etapa') == 'na_fila':
+            print(f"⏳ Pedido {pedido_id} aguardando um chef (posição {resposta['posicao_fila']} na fila)")
+            print(f"⏱️  Previsão: ~{resposta['previsao_s']}s (até {resposta['previsao_p90_s']}s)")
         elif resposta.get('status') == 'preparando':
             print(f"👨‍🍳 Pedido {pedido_id} ainda está sendo preparado...")
+            if 'previsao_s' in resposta:
+                print(f"⏱️  Previsão: ~{resposta['previsao_s']}s (até {resposta['previsao_p90_s']}s)")
         elif resposta.get('status') == 'pronto':
             print(f"🎉 Pedido {pedido_id} está PRONTO!")
             print(f"   📋 {resposta['quantidade']}x {resposta['prato'].title()}")
@@ -176,6 +434,30 @@ class RestauranteCliente:
         else:
             print(f"📋 Status: {resposta}")
     
+    def avisar_quando_pronto(self, entrada):
+        """Inscreve o cliente para receber a notificação de um pedido"""
+        partes = entrada.split()
+        if len(partes) != 2:
+            print("❌ Use: avisar <id_do_pedido>")
+            return
+        
+        pedido_id = partes[1].upper()
+        resposta = self.subscrever(pedido_id)
+        
+        if 'erro' in resposta:
+            print(f"❌ {resposta['erro']}")
+        else:
+            print(f"🔔 {resposta['mensagem']}")
+    
+    def mostrar_pedido_pronto(self, evento):
+        """Callback que exibe a notificação de pedido pronto"""
+        resultado = evento.get('resultado', {})
+        if 'erro' in resultado:
+            print(f"\n❌ Pedido {evento['pedido_id']}: {resultado['erro']}")
+        else:
+            print(f"\n🔔 Pedido {evento['pedido_id']} está PRONTO! "
+                  f"({resultado.get('quantidade')}x {str(resultado.get('prato')).title()})")
+    
     def listar_pedidos_pendentes(self):
         """Lista pedidos pendentes no servidor"""
         print("📡 Consultando pedidos pendentes...")
@@ -194,15 +476,52 @@ class RestauranteCliente:
         else:
             print(f"📋 Resposta: {resposta}")
     
-    def aguardar_todos(self):
-        """Aguarda todos os pedidos serem finalizados"""
-        print("📡 Solicitando aguardar todos os pedidos...")
-        resposta = self.aguardar_todos_pedidos()
+    def aguardar_meus(self, entrada):
+        """Aguarda os pedidos desta sessão, opcionalmente com um limite de tempo"""
+        partes = entrada.split()
+        timeout = None
+        if len(partes) > 1:
+            try:
+                timeout = float(partes[1])
+            except ValueError:
+                print("❌ Use: aguardar [segundos]")
+                return
+        
+        print("📡 Aguardando os seus pedidos...")
+        resposta = self.aguardar_meus_pedidos(timeout)
         
         if 'erro' in resposta:
             print(f"❌ {resposta['erro']}")
         elif 'sucesso' in resposta and resposta['sucesso']:
             print(f"✅ {resposta['mensagem']}")
+            for pronto in resposta['prontos']:
+                if 'erro' in pronto:
+                    print(f"   ❌ {pronto['erro']}")
+                else:
+                    print(f"   🎉 {pronto['pedido_id']}: {pronto['quantidade']}x {pronto['prato'].title()}")
+            if resposta['pendentes']:
+                print(f"⏳ Ainda em preparo: {', '.join(resposta['pendentes'])}")
+        else:
+            print(f"📋 Resposta: {resposta}")
+    
+    def ajustar_cozinha(self, entrada):
+        """Mostra ou muda os limites de chefs da autoescala"""
+        partes = entrada.split()
+        minimo = maximo = estacao = None
+        if len(partes) > 1:
+            try:
+                minimo, maximo = int(partes[1]), int(partes[2])
+            except (ValueError, IndexError):
+                print("❌ Use: chefs [min max [estacao]]")
+                return
+            if len(partes) > 3:
+                estacao = partes[3]
+        
+        resposta = self.ajustar_chefs(minimo, maximo, estacao)
+        if 'erro' in resposta:
+            print(f"❌ {resposta['erro']}")
+        elif 'sucesso' in resposta and resposta['sucesso']:
+            print(f"👨‍🍳 {resposta['mensagem']}")
         else:
             print(f"📋 Resposta: {resposta}")
     
@@ -211,6 +530,7 @@ class RestauranteCliente:
         if not self.conectar():
             return
         
+        self.ao_receber_evento('pedido_pronto', self.mostrar_pedido_pronto)
         self.mostrar_menu()
         
         try:
@@ -225,12 +545,16 @@ class RestauranteCliente:
                         self.mostrar_menu()
                     elif entrada == 'pendentes':
                         self.listar_pedidos_pendentes()
-                    elif entrada == 'aguardar':
-                        self.aguardar_todos()
+                    elif entrada == 'aguardar' or entrada.startswith('aguardar '):
+                        self.aguardar_meus(entrada)
                     elif entrada.startswith('pedido '):
                         self.processar_pedido(entrada)
                     elif entrada.startswith('status '):
                         self.verificar_status(entrada)
+                    elif entrada.startswith('avisar '):
+                        self.avisar_quando_pronto(entrada)
+                    elif entrada == 'chefs' or entrada.startswith('chefs '):
+                        self.ajustar_cozinha(entrada)
                     else:
                         print("❌ Comando não reconhecido. Digite 'menu' para ver os comandos.")
                 
@@ -243,15 +567,273 @@ class RestauranteCliente:
         finally:
             self.desconectar()
 
+class ClienteRoteador(RestauranteCliente):
+    """Cliente para um cluster de servidores, cada um dono de um shard de ids.
+    
+    Novos pedidos são distribuídos entre os shards (rodízio ou menos carregado);
+    consultas vão direto ao shard codificado no id (S{shard}P{n}) e as operações
+    globais são enviadas a todos em paralelo, com as respostas combinadas.
+    """
+    
+    POLITICAS = ('rodizio', 'menos_carregado')
+    PADRAO_SHARD = re.compile(r'^S(\d+)P')
+    
+    def __init__(self, servidores, politica='rodizio', intervalo_carga=0.5, codecs=CODECS):
+        if politica not in self.POLITICAS:
+            raise ValueError(f'Política "{politica}" inválida, use uma de {self.POLITICAS}')
+        
+        super().__init__(*servidores[0], codecs=codecs)
+        self.servidores = servidores
+        self.politica = politica
+        self.clientes = {}
+        self.rodizio = itertools.count()
+        
+        # Carga (pedidos pendentes) por shard, atualizada a cada intervalo_carga segundos
+        self.intervalo_carga = intervalo_carga
+        self.cargas = {}
+        self.cargas_atualizadas_em = 0.0
+        self.lock_cargas = threading.Lock()
+    
+    def conectar(self):
+        """Conecta a todos os shards; falha se algum não responder"""
+        for host, port in self.servidores:
+            cliente = RestauranteCliente(host, port, self.codecs, self.cache_cardapio, self.silencioso)
+            if not cliente.conectar():
+                self.desconectar()
+                return False
+            if cliente.shard is None or cliente.shard in self.clientes:
+                print(f"❌ Servidor {host}:{port} não tem um shard válido ({cliente.shard})")
+                cliente.desconectar()
+                self.desconectar()
+                return False
+            
+            for tipo_evento, callbacks in self.callbacks_eventos.items():
+                for callback in callbacks:
+                    cliente.ao_receber_evento(tipo_evento, callback)
+            self.clientes[cliente.shard] = cliente
+        
+        self.cardapio = next(iter(self.clientes.values())).cardapio
+        self.conectado = True
+        print(f"🧭 Roteando entre {len(self.clientes)} shards ({self.politica})")
+        return True
+    
+    def desconectar(self):
+        for cliente in self.clientes.values():
+            cliente.desconectar()
+        self.clientes.clear()
+        self.conectado = False
+    
+    def ao_receber_evento(self, tipo_evento, callback):
+        super().ao_receber_evento(tipo_evento, callback)
+        for cliente in self.clientes.values():
+            cliente.ao_receber_evento(tipo_evento, callback)
+    
+    def _cliente_do_pedido(self, pedido_id):
+        """Cliente do shard dono do pedido, ou None se o id não tem shard conhecido"""
+        correspondencia = self.PADRAO_SHARD.match(str(pedido_id))
+        if correspondencia is None:
+            return None
+        return self.clientes.get(int(correspondencia.group(1)))
+    
+    def _difundir(self, comando):
+        """Envia o mesmo comando a todos os shards em paralelo; retorna {shard: resposta}"""
+        futures = {
+            shard: cliente.enviar_comandos_sem_esperar([comando])[0]
+            for shard, cliente in self.clientes.items()
+        }
+        return {shard: self._aguardar_resposta(future) for shard, future in futures.items()}
+    
+    def _escolher_shard(self):
+        shards = sorted(self.clientes)
+        if self.politica == 'rodizio':
+            return shards[next(self.rodizio) % len(shards)]
+        
+        with self.lock_cargas:
+            if time.monotonic() - self.cargas_atualizadas_em > self.intervalo_carga:
+                respostas = self._difundir({'acao': 'listar_pendentes'})
+                self.cargas = {shard: resposta.get('total', 0) for shard, resposta in respostas.items()}
+                self.cargas_atualizadas_em = time.monotonic()
+            
+            # Conta o pedido localmente até a próxima atualização
+            shard = min(shards, key=lambda s: self.cargas.get(s, 0))
+            self.cargas[shard] = self.cargas.get(shard, 0) + 1
+            return shard
+    
+    def enviar_comando(self, comando):
+        """Comandos avulsos vão ao dono do pedido_id, ou a um shard escolhido pela política"""
+        cliente = self._cliente_do_pedido(comando.get('pedido_id'))
+        if cliente is None:
+            cliente = self.clientes[self._escolher_shard()]
+        return cliente.enviar_comando(comando)
+    
+    def fazer_pedido(self, prato, quantidade=1, prazo=None):
+        return self.clientes[self._escolher_shard()].fazer_pedido(prato, quantidade, prazo)
+    
+    def fazer_pedidos_lote(self, itens):
+        """Distribui os itens entre os shards e envia um lote para cada um em paralelo"""
+        itens = list(itens)
+        grupos = {}
+        for posicao, item in enumerate(itens):
+            grupos.setdefault(self._escolher_shard(), []).append((posicao, item))
+        
+        futures = {
+            shard: self.clientes[shard].enviar_comandos_sem_esperar([{
+                'acao': 'fazer_pedidos_lote',
+                'itens': [{'prato': prato, 'quantidade': quantidade} for _, (prato, quantidade) in grupo]
+            }])[0]
+            for shard, grupo in grupos.items()
+        }
+        
+        pedidos = [None] * len(itens)
+        for shard, future in futures.items():
+            resposta = self._aguardar_resposta(future)
+            resultados = resposta.get('pedidos') or [{'erro': resposta.get('erro')}] * len(grupos[shard])
+            for (posicao, _), resultado in zip(grupos[shard], resultados):
+                pedidos[posicao] = resultado
+        
+        total = sum(1 for pedido in pedidos if pedido.get('sucesso'))
+        return {
+            'sucesso': total > 0,
+            'pedidos': pedidos,
+            'total': total,
+            'mensagem': f'{total} de {len(itens)} pedidos adicionados à fila'
+        }
+    
+    def verificar_pedido(self, pedido_id):
+        cliente = self._cliente_do_pedido(pedido_id)
+        if cliente is None:
+            return {'erro': 'Pedido não pertence a nenhum shard conhecido'}
+        return cliente.verificar_pedido(pedido_id)
+    
+    def verificar_pedidos_lote(self, pedido_ids):
+        """Agrupa os ids por shard dono e consulta todos os shards em paralelo"""
+        pedido_ids = list(pedido_ids)
+        grupos = {}
+        pedidos = [{'erro': 'Pedido não pertence a nenhum shard conhecido'}] * len(pedido_ids)
+        for posicao, pedido_id in enumerate(pedido_ids):
+            cliente = self._cliente_do_pedido(pedido_id)
+            if cliente is not None:
+                grupos.setdefault(cliente.shard, []).append((posicao, pedido_id))
+        
+        futures = {
+            shard: self.clientes[shard].enviar_comandos_sem_esperar([{
+                'acao': 'verificar_pedidos_lote',
+                'pedido_ids': [pedido_id for _, pedido_id in grupo]
+            }])[0]
+            for shard, grupo in grupos.items()
+        }
+        
+        for shard, future in futures.items():
+            resposta = self._aguardar_resposta(future)
+            resultados = resposta.get('pedidos') or [{'erro': resposta.get('erro')}] * len(grupos[shard])
+            for (posicao, _), resultado in zip(grupos[shard], resultados):
+                pedidos[posicao] = resultado
+        
+        return {'pedidos': pedidos}
+    
+    def listar_pendentes(self):
+        """Consulta todos os shards em paralelo e junta as listas"""
+        respostas = self._difundir({'acao': 'listar_pendentes'})
+        pedidos = []
+        for shard in sorted(respostas):
+            pedidos.extend(respostas[shard].get('pedidos_pendentes', []))
+        return {
+            'pedidos_pendentes': pedidos,
+            'total': len(pedidos),
+            'por_shard': {shard: resposta.get('total', 0) for shard, resposta in respostas.items()}
+        }
+    
+    def aguardar_todos_pedidos(self):
+        respostas = self._difundir({'acao': 'aguardar_todos'})
+        erros = [resposta['erro'] for resposta in respostas.values() if 'erro' in resposta]
+        if erros:
+            return {'erro': '; '.join(erros)}
+        return {
+            'sucesso': True,
+            'mensagem': f'Todos os pedidos dos {len(respostas)} shards foram finalizados'
+        }
+    
+    def aguardar_pedido(self, pedido_id, timeout=None):
+        cliente = self._cliente_do_pedido(pedido_id)
+        if cliente is None:
+            return {'erro': 'Pedido não pertence a nenhum shard conhecido'}
+        return cliente.aguardar_pedido(pedido_id, timeout)
+    
+    def acompanhar_pedido(self, pedido_id, timeout=None):
+        cliente = self._cliente_do_pedido(pedido_id)
+        if cliente is None:
+            return {'erro': 'Pedido não pertence a nenhum shard conhecido'}
+        return cliente.acompanhar_pedido(pedido_id, timeout)
+    
+    def aguardar_meus_pedidos(self, timeout=None):
+        """Cada shard espera os pedidos feitos pela nossa conexão com ele, em paralelo"""
+        respostas = self._difundir({'acao': 'aguardar_meus_pedidos', 'timeout': timeout})
+        erros = [resposta['erro'] for resposta in respostas.values() if 'erro' in resposta]
+        if erros:
+            return {'erro': '; '.join(erros)}
+        
+        prontos, pendentes = [], []
+        for shard in sorted(respostas):
+            prontos.extend(respostas[shard]['prontos'])
+            pendentes.extend(respostas[shard]['pendentes'])
+        return {
+            'sucesso': True,
+            'prontos': prontos,
+            'pendentes': pendentes,
+            'timeout': bool(pendentes),
+            'mensagem': f'{len(prontos)} de {len(prontos) + len(pendentes)} pedidos finalizados'
+        }
+    
+    def ajustar_chefs(self, minimo=None, maximo=None, estacao=None):
+        """Aplica os mesmos limites em todos os shards"""
+        respostas = self._difundir(
+            {'acao': 'ajustar_chefs', 'minimo': minimo, 'maximo': maximo, 'estacao': estacao}
+        )
+        erros = [resposta['erro'] for resposta in respostas.values() if 'erro' in resposta]
+        if erros:
+            return {'erro': '; '.join(erros)}
+        chefs = sum(resposta['chefs'] for resposta in respostas.values())
+        return {
+            'sucesso': True,
+            'chefs': chefs,
+            'por_shard': {shard: resposta['chefs'] for shard, resposta in respostas.items()},
+            'mensagem': f'{chefs} chefs em {len(respostas)} shards'
+        }
+    
+    def subscrever(self, pedido_id, callback=None):
+        cliente = self._cliente_do_pedido(pedido_id)
+        if cliente is None:
+            return {'erro': 'Pedido não pertence a nenhum shard conhecido'}
+        return cliente.subscrever(pedido_id, callback)
+
 def main():
     """Função principal do cliente"""
+    parser = argparse.ArgumentParser(description='Cliente do restaurante distribuído')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--servidores', default=None, metavar='HOST:PORTA,...',
+                        help='cluster de shards; ativa o cliente roteador')
+    parser.add_argument('--politica', choices=ClienteRoteador.POLITICAS, default='rodizio',
+                        help='como distribuir novos pedidos entre os shards')
+    parser.add_argument('--codec', choices=CODECS, default='binario',
+                        help='codec preferido; o servidor pode recusar e a conexão segue em JSON')
+    args = parser.parse_args()
+    codecs = [args.codec] if args.codec == 'json' else [args.codec, 'json']
+    
     print("🔧 Iniciando cliente do restaurante...")
     
     try:
-        cliente = RestauranteCliente()
+        if args.servidores:
+            servidores = []
+            for endereco in args.servidores.split(','):
+                host, port = endereco.rsplit(':', 1)
+                servidores.append((host, int(port)))
+            cliente = ClienteRoteador(servidores, politica=args.politica, codecs=codecs)
+        else:
+            cliente = RestauranteCliente(args.host, args.port, codecs)
         cliente.executar()
     except Exception as e:
         print(f"❌ Erro ao iniciar cliente: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
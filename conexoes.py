@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Conexões de Clientes do Servidor do Restaurante
+Envio thread-safe e não bloqueante de respostas e notificações para cada
+motor de rede, com buffer de saída limitado: clientes lentos são despejados
+"""
+
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from protocolo import CODEC_JSON, codificar_mensagem
+
+# Ids de pedidos concluídos guardados por conexão até o aguardar_meus_pedidos
+MAX_CONCLUIDOS = 1000
+
+# ioctl do Linux com os bytes na fila de envio do socket que o kernel ainda não enviou
+SIOCOUTQNSD = 0x894B if sys.platform.startswith('linux') and fcntl is not None else None
+
+
+def bytes_nao_enviados(sock):
+    """Bytes que o kernel ainda não enviou ao cliente (0 onde não dá para saber)"""
+    if SIOCOUTQNSD is None or sock is None:
+        return 0
+    try:
+        return struct.unpack('i', fcntl.ioctl(sock.fileno(), SIOCOUTQNSD, b'\0' * 4))[0]
+    except (OSError, ValueError):
+        return 0
+
+
+class _EstadoConexao:
+    """Partes comuns às conexões dos dois motores"""
+
+    def _iniciar_estado(self, ao_despejar):
+        # Pedidos desta conexão ainda em preparo, e ids dos concluídos ainda não
+        # entregues por aguardar_meus_pedidos (só os MAX_CONCLUIDOS mais recentes)
+        self.pedidos = {}
+        self.concluidos = OrderedDict()
+        self.lock_pedidos = threading.Lock()
+        self.codec = CODEC_JSON
+        self.codec_negociado = None
+        # Limite de taxa de pedidos da conexão (LimitadorTaxa), se configurado
+        self.limitador = None
+        # Processando um comando agora (senão, esperando o próximo)
+        self.processando = False
+        # Motivo do despejo ('ociosa', 'leitura', 'escrita' ou 'buffer'), se houve
+        self.despejada = None
+        self.ao_despejar = ao_despejar
+        # Última amostra das respostas paradas no kernel e desde quando não diminuem
+        self.nao_enviados = 0
+        self.desde_nao_enviados = None
+
+    def acompanhar_pedido(self, pedido_id, future):
+        self.pedidos[pedido_id] = future
+        future.add_done_callback(lambda _: self.pedido_concluido(pedido_id))
+
+    def pedido_concluido(self, pedido_id):
+        """Troca o future de um pedido concluído pelo id (chamadas repetidas não fazem nada)"""
+        with self.lock_pedidos:
+            if self.pedidos.pop(pedido_id, None) is None:
+                return
+            self.concluidos[pedido_id] = None
+            while len(self.concluidos) > MAX_CONCLUIDOS:
+                self.concluidos.popitem(last=False)
+
+    def retirar_concluidos(self):
+        with self.lock_pedidos:
+            ids = list(self.concluidos)
+            self.concluidos.clear()
+        return ids
+
+    def pedidos_em_andamento(self):
+        return bool(self.pedidos)
+
+    def saida_parada(self, timeout_escrita):
+        """True se as respostas paradas no kernel não diminuem há `timeout_escrita` segundos.
+
+        O kernel absorve vários MB de respostas antes de o buffer de saída
+        encher; um cliente que não lê fica com elas ali, onde nem o prazo de
+        escrita nem o limite do buffer as veem. Chamado a cada prazo de
+        leitura renovado, não a cada envio.
+        """
+        nao_enviados = self.bytes_no_kernel
+        agora = time.monotonic()
+        if not nao_enviados:
+            self.desde_nao_enviados = None
+        elif self.desde_nao_enviados is None or nao_enviados < self.nao_enviados:
+            self.desde_nao_enviados = agora
+        self.nao_enviados = nao_enviados
+        return (timeout_escrita is not None and self.desde_nao_enviados is not None
+                and agora - self.desde_nao_enviados >= timeout_escrita)
+
+    @property
+    def ociosa(self):
+        """Esperando comandos sem pedidos em preparo: sujeita ao timeout de ociosidade"""
+        return not self.processando and not self.pedidos_em_andamento()
+
+    def aplicar_codec_negociado(self):
+        """Troca de codec depois que a resposta do aperto de mão foi enviada"""
+        if self.codec_negociado is not None:
+            self.codec, self.codec_negociado = self.codec_negociado, None
+
+
+class ConexaoThreads(_EstadoConexao):
+    """Conexão atendida por uma thread dedicada (motor 'threads').
+
+    O socket é não bloqueante: `enviar` escreve o que couber e deixa o resto
+    no buffer de saída, que o EscritorConexoes termina de enviar. A conexão
+    é despejada se o buffer passaria de `limite_buffer` bytes ou se ficar
+    com dados por mais de `timeout_escrita` segundos.
+    """
+
+    def __init__(self, sock, endereco, limite_buffer=None, timeout_escrita=None,
+                 escritor=None, ao_despejar=None):
+        self.sock = sock
+        self.endereco = endereco
+        self.ativa = True
+        self.lock_envio = threading.Lock()
+        self.pendente = bytearray()
+        self.prazo_escrita = None
+        self.limite_buffer = limite_buffer
+        self.timeout_escrita = timeout_escrita
+        self.escritor = escritor
+        self._iniciar_estado(ao_despejar)
+
+    def enviar(self, mensagem):
+        """Envia uma mensagem sem bloquear; pode ser chamado de qualquer thread"""
+        quadro = codificar_mensagem(mensagem, self.codec)
+        with self.lock_envio:
+            if not self.ativa:
+                return False
+            # Um quadro sozinho sempre cabe; o limite vale para o que se acumula atrás dele
+            excedeu = (self.limite_buffer is not None and len(self.pendente) > 0
+                       and len(self.pendente) + len(quadro) > self.limite_buffer)
+            if not excedeu:
+                self.pendente += quadro
+                try:
+                    if self._descarregar():
+                        return True
+                except OSError:
+                    self.ativa = False
+                    return False
+                if self.prazo_escrita is None and self.timeout_escrita is not None:
+                    self.prazo_escrita = time.monotonic() + self.timeout_escrita
+
+        if excedeu:
+            self.despejar('buffer')
+            return False
+        self.escritor.acompanhar(self)
+        return True
+
+    def _descarregar(self):
+        """Envia o que couber no socket (com lock_envio); True se o buffer esvaziou"""
+        while self.pendente:
+            try:
+                enviados = self.sock.send(self.pendente)
+            except (BlockingIOError, InterruptedError):
+                return False
+            del self.pendente[:enviados]
+        self.prazo_escrita = None
+        return True
+
+    def descarregar_pendente(self):
+        with self.lock_envio:
+            if not self.ativa:
+                return
+            try:
+                self._descarregar()
+            except OSError:
+                self.ativa = False
+
+    def verificar_escrita(self, agora):
+        """True se não há mais nada a enviar; despeja a conexão que passou do prazo"""
+        with self.lock_envio:
+            if not self.ativa or not self.pendente:
+                return True
+            vencido = self.prazo_escrita is not None and agora >= self.prazo_escrita
+        if vencido:
+            self.despejar('escrita')
+            return True
+        return False
+
+    @property
+    def bytes_pendentes(self):
+        return len(self.pendente)
+
+    @property
+    def bytes_no_kernel(self):
+        return bytes_nao_enviados(self.sock) if self.ativa else 0
+
+    def despejar(self, motivo):
+        """Desconecta um cliente lento ou ocioso; a thread da conexão encerra em seguida"""
+        with self.lock_envio:
+            if not self.ativa:
+                return
+            self.ativa = False
+            self.despejada = motivo
+            self.pendente.clear()
+        try:
+            # Acorda a thread da conexão, que lê o fim do fluxo e fecha o socket
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        if self.ao_despejar is not None:
+            self.ao_despejar(self, motivo)
+
+    def fechar(self):
+        with self.lock_envio:
+            self.ativa = False
+        self.sock.close()
+
+
+class EscritorConexoes:
+    """Uma thread que termina os envios que não couberam no socket (motor 'threads').
+
+    Acompanha só as conexões com buffer de saída pendente: envia quando o
+    socket aceita mais dados e despeja as que passam do prazo de escrita.
+    """
+
+    def __init__(self):
+        self.novas = set()
+        self.lock = threading.Lock()
+        self.executando = True
+        self.despertador, self._aviso = socket.socketpair()
+        self.despertador.setblocking(False)
+        self.thread = threading.Thread(target=self._executar, name="EscritorConexoes", daemon=True)
+        self.thread.start()
+
+    def acompanhar(self, conexao):
+        with self.lock:
+            self.novas.add(conexao)
+        self._despertar()
+
+    def _despertar(self):
+        try:
+            self._aviso.send(b'\0')
+        except OSError:
+            pass
+
+    def _executar(self):
+        acompanhadas = set()
+        while self.executando:
+            with self.lock:
+                acompanhadas |= self.novas
+                self.novas = set()
+
+            # Seletor novo a cada volta: as conexões podem fechar a qualquer momento
+            with selectors.DefaultSelector() as seletor:
+                seletor.register(self.despertador, selectors.EVENT_READ)
+                for conexao in acompanhadas:
+                    try:
+                        seletor.register(conexao.sock, selectors.EVENT_WRITE, conexao)
+                    except (ValueError, KeyError, OSError):
+                        pass
+                prazos = [conexao.prazo_escrita for conexao in acompanhadas if conexao.prazo_escrita is not None]
+                timeout = max(min(prazos) - time.monotonic(), 0) if prazos else None
+
+                for chave, _ in seletor.select(timeout):
+                    if chave.data is None:
+                        try:
+                            self.despertador.recv(4096)
+                        except OSError:
+                            pass
+                    else:
+                        chave.data.descarregar_pendente()
+
+            agora = time.monotonic()
+            acompanhadas = {conexao for conexao in acompanhadas if not conexao.verificar_escrita(agora)}
+
+    def parar(self):
+        self.executando = False
+        self._despertar()
+        self.thread.join(timeout=5)
+        self.despertador.close()
+        self._aviso.close()
+
+
+class ConexaoAsync(_EstadoConexao):
+    """Conexão atendida pelo event loop (motor 'asyncio').
+
+    O transporte do asyncio já envia sem bloquear; a conexão é despejada se
+    o buffer de escrita dele passaria de `limite_buffer` bytes. O prazo de
+    escrita é aplicado pelo servidor ao esperar o `drain` de cada resposta.
+    """
+
+    def __init__(self, writer, loop, limite_buffer=None, ao_despejar=None):
+        # Criada dentro do loop, então a thread atual é a do event loop
+        self.writer = writer
+        self.loop = loop
+        self.thread_loop = threading.get_ident()
+        self.endereco = writer.get_extra_info('peername')
+        self.ativa = True
+        self.limite_buffer = limite_buffer
+        self._iniciar_estado(ao_despejar)
+
+    def enviar(self, mensagem):
+        """Agenda o envio no event loop; pode ser chamado de qualquer thread"""
+        if not self.ativa:
+            return False
+
+        quadro = codificar_mensagem(mensagem, self.codec)
+        if threading.get_ident() == self.thread_loop:
+            return self._escrever(quadro)
+        try:
+            self.loop.call_soon_threadsafe(self._escrever, quadro)
+        except RuntimeError:
+            # Loop já encerrado
+            self.ativa = False
+            return False
+        return True
+
+    def _escrever(self, quadro):
+        if not self.ativa or self.writer.is_closing():
+            return False
+        pendente = self.writer.transport.get_write_buffer_size()
+        if self.limite_buffer is not None and pendente and pendente + len(quadro) > self.limite_buffer:
+            self.despejar('buffer')
+            return False
+        self.writer.write(quadro)
+        return True
+
+    @property
+    def bytes_pendentes(self):
+        return self.writer.transport.get_write_buffer_size() if self.ativa else 0
+
+    @property
+    def bytes_no_kernel(self):
+        return bytes_nao_enviados(self.writer.get_extra_info('socket')) if self.ativa else 0
+
+    def despejar(self, motivo):
+        """Desconecta um cliente lento ou ocioso, descartando o que faltava enviar"""
+        if threading.get_ident() != self.thread_loop:
+            try:
+                self.loop.call_soon_threadsafe(self.despejar, motivo)
+            except RuntimeError:
+                pass
+            return
+        if not self.ativa:
+            return
+        self.ativa = False
+        self.despejada = motivo
+        self.writer.transport.abort()
+        if self.ao_despejar is not None:
+            self.ao_despejar(self, motivo)
+
+    def fechar(self):
+        self.ativa = False
+        self.writer.close()
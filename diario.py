@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Diário de Pedidos (write-ahead log) do Restaurante
+Registra pedidos aceitos e finalizados em um arquivo append-only com
+fsync em grupo, snapshots periódicos e recuperação após falhas
+"""
+
+import json
+import os
+import threading
+import time
+
+# Tipos de registro no diário
+ACEITO = 'A'
+PRONTO = 'P'
+
+
+class DiarioPedidos:
+    """Diário append-only com group commit.
+
+    Os registros entram em um buffer em memória; uma thread escritora grava o
+    lote inteiro e faz um único fsync, acordando todos os que aguardavam.
+    A cada `snapshot_a_cada` registros, o estado atual (fornecido por
+    `obter_estado`) vira um snapshot e o diário antigo é descartado. Se uma
+    gravação falha, o diário fica marcado com o `erro`, a thread escritora
+    encerra e todas as esperas, atuais e futuras, retornam False.
+
+    Arquivos em `diretorio`:
+      - snapshot.json     estado completo no momento do último snapshot
+      - diario.log        registros posteriores ao snapshot (uma linha JSON cada)
+      - diario.log.antigo existe só se o processo caiu durante uma compactação
+    """
+
+    def __init__(self, diretorio, obter_estado=None, intervalo_commit=0.002,
+                 snapshot_a_cada=10000):
+        self.diretorio = diretorio
+        self.obter_estado = obter_estado
+        self.intervalo_commit = intervalo_commit
+        self.snapshot_a_cada = snapshot_a_cada
+
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho_log = os.path.join(diretorio, 'diario.log')
+        self.caminho_antigo = self.caminho_log + '.antigo'
+        self.caminho_snapshot = os.path.join(diretorio, 'snapshot.json')
+
+        self.pendentes = []
+        self.seq_registrada = 0
+        self.seq_duravel = 0
+        self.registros_desde_snapshot = 0
+        self.cond = threading.Condition()
+        self.ativo = False
+        self.erro = None
+        self.arquivo = None
+        self.thread_escritora = None
+
+    # ------------------------------------------------------------------
+    # Recuperação
+    # ------------------------------------------------------------------
+
+    def recuperar(self):
+        """Reconstrói o estado a partir do snapshot e dos registros do diário.
+
+        Retorna {'contador': int, 'pendentes': {id: (indice, qtd, prazo)},
+        'prontos': {id: (indice, qtd, tempo_preparo, chef)}}, com os pendentes
+        na ordem da fila no snapshot seguidos dos aceitos depois dele; `prazo`
+        é um horário de parede (time.time()) ou None. A reprodução é
+        idempotente: um registro já refletido no snapshot não muda nada.
+        """
+        estado = {'contador': 0, 'pendentes': {}, 'prontos': {}}
+
+        if os.path.exists(self.caminho_snapshot):
+            with open(self.caminho_snapshot, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            estado['contador'] = snapshot['contador']
+            estado['pendentes'] = {p[0]: self._pendente(p[1:]) for p in snapshot['pendentes']}
+            estado['prontos'] = {p[0]: tuple(p[1:]) for p in snapshot['prontos']}
+
+        for caminho in (self.caminho_antigo, self.caminho_log):
+            if os.path.exists(caminho):
+                self._reproduzir(caminho, estado)
+
+        return estado
+
+    @staticmethod
+    def _numero(pedido_id):
+        """Número sequencial do id, ignorando o prefixo de shard (S2P015 -> 15)"""
+        digitos = pedido_id.rsplit('P', 1)[-1]
+        return int(digitos) if digitos.isdigit() else 0
+
+    @staticmethod
+    def _pendente(dados):
+        """(indice, qtd, prazo); registros anteriores ao prazo no diário não o têm"""
+        indice, quantidade, *prazo = dados
+        return indice, quantidade, prazo[0] if prazo else None
+
+    def _reproduzir(self, caminho, estado):
+        with open(caminho, encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    # Última linha incompleta de uma gravação interrompida
+                    break
+
+                tipo, pedido_id = registro[0], registro[1]
+                estado['contador'] = max(estado['contador'], self._numero(pedido_id))
+                if tipo == ACEITO:
+                    if pedido_id not in estado['prontos']:
+                        estado['pendentes'][pedido_id] = self._pendente(registro[2:])
+                elif tipo == PRONTO:
+                    estado['pendentes'].pop(pedido_id, None)
+                    estado['prontos'][pedido_id] = tuple(registro[2:])
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def iniciar(self):
+        self.arquivo = open(self.caminho_log, 'a', encoding='utf-8')
+        self.ativo = True
+        self.thread_escritora = threading.Thread(
+            target=self._escrever, name="Diario", daemon=True
+        )
+        self.thread_escritora.start()
+
+    def registrar_aceito(self, pedido):
+        return self._registrar([ACEITO, pedido.id, pedido.indice_prato, pedido.quantidade,
+                                pedido.prazo_relogio()])
+
+    def registrar_pronto(self, resultado):
+        return self._registrar([
+            PRONTO, resultado.pedido_id, resultado.indice_prato, resultado.quantidade,
+            round(resultado.tempo_preparo, 3), resultado.chef
+        ])
+
+    def _registrar(self, registro):
+        """Coloca o registro no buffer e retorna seu número de sequência"""
+        linha = json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self.cond:
+            # Sem a thread escritora, o registro nunca sairia do buffer
+            if self.erro is None:
+                self.pendentes.append(linha)
+            self.seq_registrada += 1
+            self.cond.notify_all()
+            return self.seq_registrada
+
+    def aguardar_duravel(self, seq, timeout=None):
+        """Bloqueia até o registro `seq` estar gravado em disco (fsync).
+        
+        Retorna False se ele não chegou ao disco: timeout, diário fechado ou com erro.
+        """
+        with self.cond:
+            self.cond.wait_for(
+                lambda: self.seq_duravel >= seq or not self.ativo or self.erro is not None, timeout
+            )
+            return self.seq_duravel >= seq
+
+    def _escrever(self):
+        """Thread escritora: grava lotes de registros com um fsync por lote"""
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pendentes or not self.ativo)
+                if not self.pendentes and not self.ativo:
+                    return
+
+            # Espera um pouco para mais registros entrarem no mesmo commit
+            if self.intervalo_commit and self.ativo:
+                time.sleep(self.intervalo_commit)
+
+            with self.cond:
+                lote, self.pendentes = self.pendentes, []
+                seq_lote = self.seq_registrada
+
+            try:
+                self.arquivo.write(''.join(lote))
+                self.arquivo.flush()
+                os.fsync(self.arquivo.fileno())
+
+                with self.cond:
+                    self.seq_duravel = seq_lote
+                    self.registros_desde_snapshot += len(lote)
+                    self.cond.notify_all()
+
+                if self.obter_estado and self.registros_desde_snapshot >= self.snapshot_a_cada:
+                    self.compactar()
+            except OSError as e:
+                # Disco cheio, sem permissão...: quem espera recebe False em vez de bloquear
+                with self.cond:
+                    self.erro = e
+                    self.pendentes = []
+                    self.cond.notify_all()
+                return
+
+    def compactar(self):
+        """Grava um snapshot do estado atual e descarta o diário anterior.
+
+        O diário é trocado antes de ler o estado; como o servidor altera o
+        estado antes de registrar o evento, tudo que está no diário antigo
+        já aparece no snapshot.
+        """
+        with self.cond:
+            self.arquivo.close()
+            os.replace(self.caminho_log, self.caminho_antigo)
+            self.arquivo = open(self.caminho_log, 'a', encoding='utf-8')
+            self.registros_desde_snapshot = 0
+
+        estado = self.obter_estado()
+        snapshot = {
+            'contador': estado['contador'],
+            'pendentes': [[pedido_id, *dados] for pedido_id, dados in estado['pendentes'].items()],
+            'prontos': [[pedido_id, *dados] for pedido_id, dados in estado['prontos'].items()],
+        }
+
+        temporario = self.caminho_snapshot + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho_snapshot)
+        os.remove(self.caminho_antigo)
+
+    def fechar(self):
+        """Grava o que estiver pendente e encerra a thread escritora"""
+        if not self.ativo:
+            return
+        with self.cond:
+            self.ativo = False
+            self.cond.notify_all()
+        self.thread_escritora.join()
+        try:
+            self.arquivo.close()
+        except OSError:
+            # O que não foi gravado já está registrado em `erro`
+            pass
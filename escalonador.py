@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Escalonador da Cozinha do Restaurante
+Decide qual pedido da fila o próximo chef livre vai preparar
+"""
+
+import bisect
+import heapq
+import itertools
+import threading
+import time
+
+
+class PoliticaFIFO:
+    """Ordem de chegada"""
+    nome = 'fifo'
+
+    def prioridade(self, chegada, custo, prazo):
+        return 0.0
+
+
+class PoliticaSJF:
+    """Menor tarefa primeiro: custo estimado = tempo_base * quantidade"""
+    nome = 'sjf'
+
+    def prioridade(self, chegada, custo, prazo):
+        return custo
+
+
+class PoliticaEDF:
+    """Prazo mais cedo primeiro; sem prazo, vale o término ideal do pedido"""
+    nome = 'edf'
+
+    def prioridade(self, chegada, custo, prazo):
+        return prazo if prazo is not None else chegada + custo
+
+
+POLITICAS = {politica.nome: politica for politica in (PoliticaFIFO, PoliticaSJF, PoliticaEDF)}
+
+
+class _ChavesOrdenadas:
+    """Chaves da fila em ordem, com contagem e custo somados por bloco.
+
+    Lista ordenada dividida em blocos de até 2 * TAMANHO_BLOCO chaves: a
+    posição e o custo à frente de uma chave somam os totais dos blocos
+    anteriores e só percorrem o bloco dela, em vez da fila inteira.
+    """
+    TAMANHO_BLOCO = 256
+
+    def __init__(self):
+        self.blocos = []
+        self.custos = []
+        self.tamanhos = []
+        self.somas = []
+        self.maximos = []
+
+    def _bloco(self, chave):
+        return min(bisect.bisect_left(self.maximos, chave), len(self.blocos) - 1)
+
+    def inserir(self, chave, custo):
+        if not self.blocos:
+            self.blocos.append([chave])
+            self.custos.append([custo])
+            self.tamanhos.append(1)
+            self.somas.append(custo)
+            self.maximos.append(chave)
+            return
+
+        i = self._bloco(chave)
+        bloco, custos = self.blocos[i], self.custos[i]
+        j = bisect.bisect_left(bloco, chave)
+        bloco.insert(j, chave)
+        custos.insert(j, custo)
+        self.tamanhos[i] += 1
+        self.somas[i] += custo
+        self.maximos[i] = bloco[-1]
+
+        if len(bloco) > 2 * self.TAMANHO_BLOCO:
+            meio = len(bloco) // 2
+            self.blocos[i:i + 1] = [bloco[:meio], bloco[meio:]]
+            self.custos[i:i + 1] = [custos[:meio], custos[meio:]]
+            self.tamanhos[i:i + 1] = [meio, len(bloco) - meio]
+            self.somas[i:i + 1] = [sum(custos[:meio]), sum(custos[meio:])]
+            self.maximos[i:i + 1] = [bloco[meio - 1], bloco[-1]]
+
+    def remover(self, chave):
+        i = self._bloco(chave)
+        bloco, custos = self.blocos[i], self.custos[i]
+        j = bisect.bisect_left(bloco, chave)
+        del bloco[j]
+        custo = custos.pop(j)
+        if not bloco:
+            for lista in (self.blocos, self.custos, self.tamanhos, self.somas, self.maximos):
+                del lista[i]
+            return
+        self.tamanhos[i] -= 1
+        self.somas[i] -= custo
+        self.maximos[i] = bloco[-1]
+
+    def a_frente(self, chave):
+        """(chaves menores, soma dos custos delas)"""
+        i = self._bloco(chave)
+        j = bisect.bisect_left(self.blocos[i], chave)
+        return (sum(self.tamanhos[:i]) + j,
+                sum(self.somas[:i]) + sum(self.custos[i][:j]))
+
+    def limpar(self):
+        self.__init__()
+
+
+class FilaCozinha:
+    """Fila de prioridade thread-safe com envelhecimento.
+
+    A chave efetiva de um pedido é `prioridade - envelhecimento * espera`:
+    cada segundo na fila adianta o pedido em `envelhecimento` segundos, o que
+    impede que pedidos longos fiquem para sempre atrás dos curtos. Como o
+    desconto cresce igual para todos, a ordem relativa depende só de
+    `prioridade + envelhecimento * chegada`, e um heap comum basta.
+
+    Itens inseridos com um `grupo` (ex.: o prato) podem ser retirados juntos
+    por `retirar_grupo`; as entradas que eles deixam no heap são descartadas
+    quando chegam ao topo.
+    """
+
+    def __init__(self, politica='fifo', envelhecimento=0.1):
+        if politica not in POLITICAS:
+            raise ValueError(f'Política "{politica}" inválida, use uma de {tuple(POLITICAS)}')
+
+        self.politica = POLITICAS[politica]()
+        self.envelhecimento = envelhecimento
+        self.heap = []
+        self.chaves = {}
+        self.itens = {}
+        self.grupos = {}
+        self.grupo_de = {}
+        # Custo estimado somado dos pedidos na fila (usado no controle de admissão)
+        self.custos = {}
+        self.trabalho = 0.0
+        # As mesmas chaves em ordem, para a posição de um pedido sem varrer a fila
+        self.ordem = _ChavesOrdenadas()
+        self.sequencia = itertools.count()
+        self.lock = threading.Lock()
+
+    def inserir(self, pedido_id, item, custo, prazo=None, grupo=None):
+        """Enfileira um item; `prazo` é um instante de time.monotonic()"""
+        chegada = time.monotonic()
+        chave = (
+            self.politica.prioridade(chegada, custo, prazo) + self.envelhecimento * chegada,
+            next(self.sequencia)
+        )
+        with self.lock:
+            heapq.heappush(self.heap, (chave, pedido_id, item))
+            self.chaves[pedido_id] = chave
+            self.custos[pedido_id] = custo
+            self.trabalho += custo
+            self.ordem.inserir(chave, custo)
+            if grupo is not None:
+                self.itens[pedido_id] = item
+                self.grupo_de[pedido_id] = grupo
+                self.grupos.setdefault(grupo, set()).add(pedido_id)
+
+    def _remover(self, pedido_id):
+        self.ordem.remover(self.chaves.pop(pedido_id))
+        self.trabalho -= self.custos.pop(pedido_id)
+        grupo = self.grupo_de.pop(pedido_id, None)
+        if grupo is not None:
+            del self.itens[pedido_id]
+            membros = self.grupos[grupo]
+            membros.discard(pedido_id)
+            if not membros:
+                del self.grupos[grupo]
+        if not self.chaves:
+            # Descarta entradas já retiradas e zera o acumulado (erro de arredondamento)
+            self.heap.clear()
+            self.ordem.limpar()
+            self.trabalho = 0.0
+
+    def retirar(self):
+        """Remove e retorna (pedido_id, item) do pedido mais prioritário, ou None"""
+        with self.lock:
+            while self.heap:
+                chave, pedido_id, item = heapq.heappop(self.heap)
+                # Entradas já retiradas por retirar_grupo ficam para trás no heap
+                if self.chaves.get(pedido_id) == chave:
+                    self._remover(pedido_id)
+                    return pedido_id, item
+            return None
+
+    def retirar_grupo(self, grupo, aceitar):
+        """Remove, em ordem de prioridade, os itens do grupo enquanto `aceitar(item)` for verdadeiro"""
+        retirados = []
+        with self.lock:
+            for pedido_id in sorted(self.grupos.get(grupo, ()), key=self.chaves.__getitem__):
+                item = self.itens[pedido_id]
+                if not aceitar(item):
+                    break
+                self._remover(pedido_id)
+                retirados.append((pedido_id, item))
+        return retirados
+
+    def chave(self, pedido_id):
+        """Chave de ordenação do pedido na fila (menor sai antes), ou None"""
+        with self.lock:
+            return self.chaves.get(pedido_id)
+
+    def posicao(self, pedido_id):
+        """Posição do pedido na fila (1 = próximo a ser preparado), ou None"""
+        a_frente = self.a_frente(pedido_id)
+        return a_frente[0] if a_frente is not None else None
+
+    def a_frente(self, pedido_id):
+        """(posição, soma dos custos dos pedidos à frente) do pedido na fila, ou None"""
+        with self.lock:
+            chave = self.chaves.get(pedido_id)
+            if chave is None:
+                return None
+            antes, trabalho = self.ordem.a_frente(chave)
+            return antes + 1, trabalho
+
+    def carga(self):
+        """(pedidos na fila, soma dos custos estimados) em uma leitura consistente"""
+        with self.lock:
+            return len(self.chaves), self.trabalho
+
+    def __len__(self):
+        return len(self.chaves)
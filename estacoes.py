@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Estações da Cozinha do Restaurante
+Cada estação (forno, chapa...) tem sua fila, seus chefs e sua autoescala;
+pedidos com vários itens são divididos entre os chefs da estação e
+reunidos quando a última parte termina
+"""
+
+import threading
+import time
+
+from chefs import AutoescalaChefs, PoolChefs
+from escalonador import FilaCozinha
+
+# Estação de cada prato e chefs por estação no modo --estacoes
+ESTACOES_PRATOS = {
+    'pizza': 'forno',
+    'lasanha': 'forno',
+    'hamburguer': 'chapa',
+    'sopa': 'fogao',
+    'salada': 'bancada',
+    'sanduiche': 'bancada',
+}
+CAPACIDADE_ESTACOES = {'forno': 2, 'chapa': 1, 'fogao': 1, 'bancada': 2}
+
+# Estação única do modo clássico: chefs genéricos que preparam qualquer prato
+ESTACAO_GERAL = 'cozinha'
+
+
+class Estacao:
+    """Uma estação com fila de prioridade, pool de chefs e autoescala próprios.
+
+    Com `dividir`, um pedido de n itens vira até um item por chef da estação,
+    preparados em paralelo; sem ele (estação geral), o pedido inteiro fica
+    com um único chef, como no modelo clássico.
+    """
+
+    def __init__(self, nome, pratos, capacidade, escalonador='fifo', envelhecimento=0.1,
+                 minimo=None, maximo=None, dividir=True, escala_tempo=1.0, espera_alvo=None,
+                 intervalo_autoescala=0.5, resfriamento_autoescala=2.0, ao_mudar=None, prefixo=None):
+        self.nome = nome
+        self.pratos = set(pratos)
+        self.dividir = dividir
+        self.fila = FilaCozinha(escalonador, envelhecimento)
+        self.pool = PoolChefs(capacidade, prefixo=prefixo or nome.title())
+        self.autoescala = AutoescalaChefs(
+            self.pool, lambda: self.fila.carga()[1] * escala_tempo,
+            capacidade if minimo is None else minimo, capacidade if maximo is None else maximo,
+            espera_alvo=espera_alvo if espera_alvo is not None else 2.0 * escala_tempo,
+            intervalo=intervalo_autoescala, resfriamento=resfriamento_autoescala,
+            ao_mudar=(lambda *mudanca: ao_mudar(self, *mudanca)) if ao_mudar is not None else None
+        )
+        self.autoescala.iniciar()
+
+    def partes(self, quantidade):
+        """Quantidades das partes de um pedido, no máximo uma por chef da estação"""
+        if not self.dividir or quantidade <= 1:
+            return [quantidade]
+        num_partes = min(quantidade, self.pool.tamanho)
+        base, resto = divmod(quantidade, num_partes)
+        return [base + 1 if i < resto else base for i in range(num_partes)]
+
+    def parar(self):
+        """Para a autoescala e espera os chefs terminarem a fila"""
+        self.autoescala.parar()
+        self.pool.shutdown(wait=True)
+
+
+class Preparo:
+    """Junção das partes de um pedido em preparo em uma estação.
+
+    A primeira parte a começar marca o future como em execução; a última a
+    terminar avisa quem chamou `concluir_parte` para finalizar o pedido.
+    """
+    __slots__ = ('pedido', 'future', 'num_partes', 'restantes', 'iniciado_em', 'chefs', 'erro', 'cancelado', 'lock')
+
+    def __init__(self, pedido, future, num_partes):
+        self.pedido = pedido
+        self.future = future
+        self.num_partes = num_partes
+        self.restantes = num_partes
+        self.iniciado_em = None
+        self.chefs = []
+        self.erro = None
+        self.cancelado = False
+        self.lock = threading.Lock()
+
+    @property
+    def em_preparo(self):
+        return self.iniciado_em is not None
+
+    def iniciar_parte(self):
+        """False se o pedido foi cancelado e a parte não deve ser preparada"""
+        with self.lock:
+            if self.iniciado_em is None:
+                self.cancelado = not self.future.set_running_or_notify_cancel()
+                self.iniciado_em = time.monotonic()
+            return not self.cancelado
+
+    def concluir_parte(self, chef, erro=None):
+        """Registra o fim de uma parte; True se era a última"""
+        with self.lock:
+            if erro is not None:
+                self.erro = erro
+            elif chef not in self.chefs:
+                self.chefs.append(chef)
+            self.restantes -= 1
+            return self.restantes == 0
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Estado dos Pedidos do Restaurante
+Tabelas de pedidos em andamento e prontos protegidas por locks em faixas
+(lock striping): operações em pedidos diferentes raramente disputam o mesmo lock
+"""
+
+import threading
+
+from retencao import ArmazemProntos
+
+
+class EstadoPedidos:
+    """Pedidos em andamento (pedido_id -> Future) e prontos (ArmazemProntos).
+
+    Cada id cai em uma de `num_faixas` faixas pelo hash; a faixa tem seu
+    próprio lock e seu próprio dicionário de pedidos em andamento. A passagem
+    de "em andamento" para "pronto" acontece sob o lock da faixa, com o
+    resultado gravado no armazém antes de o pedido sair da tabela, então uma
+    consulta sempre encontra o pedido em uma das duas.
+
+    `pendentes()` trava todas as faixas (sempre na mesma ordem) e devolve uma
+    fotografia consistente. Com `num_faixas=1` o comportamento é o de um único
+    lock global.
+    """
+
+    def __init__(self, prontos=None, num_faixas=16):
+        self.prontos = prontos if prontos is not None else ArmazemProntos()
+        self.num_faixas = num_faixas
+        self.locks = [threading.Lock() for _ in range(num_faixas)]
+        self.em_andamento = [{} for _ in range(num_faixas)]
+
+    def _faixa(self, pedido_id):
+        return hash(pedido_id) % self.num_faixas
+
+    def adicionar(self, pedido_id, future):
+        """Registra um pedido aceito e ainda não finalizado"""
+        faixa = self._faixa(pedido_id)
+        with self.locks[faixa]:
+            self.em_andamento[faixa][pedido_id] = future
+
+    def em_andamento_de(self, pedido_id):
+        """Future do pedido, ou None se ele não está em andamento"""
+        faixa = self._faixa(pedido_id)
+        with self.locks[faixa]:
+            return self.em_andamento[faixa].get(pedido_id)
+
+    def concluir(self, pedido_id, resultado):
+        """Move o pedido para os prontos de forma atômica em relação às consultas"""
+        faixa = self._faixa(pedido_id)
+        with self.locks[faixa]:
+            self.prontos[pedido_id] = resultado
+            self.em_andamento[faixa].pop(pedido_id, None)
+
+    def restaurar_pronto(self, pedido_id, resultado):
+        """Grava um pedido pronto recuperado do diário"""
+        self.prontos[pedido_id] = resultado
+
+    def pronto(self, pedido_id, padrao=None):
+        return self.prontos.get(pedido_id, padrao)
+
+    def _todas_as_faixas(self):
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            return [(pedido_id, future) for tabela in self.em_andamento
+                    for pedido_id, future in tabela.items()]
+        finally:
+            for lock in reversed(self.locks):
+                lock.release()
+
+    def pendentes(self):
+        """Fotografia consistente dos ids em andamento"""
+        return [pedido_id for pedido_id, _ in self._todas_as_faixas()]
+
+    def itens_em_andamento(self):
+        """Fotografia consistente dos pares (pedido_id, future) em andamento"""
+        return self._todas_as_faixas()
+
+    def total_em_andamento(self):
+        # Soma sem travar: usado por medidores, onde um valor aproximado basta
+        return sum(len(tabela) for tabela in self.em_andamento)
+
+    def fechar(self):
+        self.prontos.fechar()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Estimativas de Tempo do Restaurante
+Estatísticas online dos tempos de preparo medidos de cada prato (média móvel
+exponencial e sketch de quantis), usadas para prever quando um pedido fica pronto
+"""
+
+import math
+import threading
+
+# Chave das estatísticas de todos os pratos juntos
+TODOS = '*'
+
+
+class SketchQuantis:
+    """Sketch de quantis com erro relativo limitado (baldes logarítmicos, como o DDSketch).
+
+    Um valor v > 0 cai no balde ceil(log_gama(v)); o quantil devolvido está a
+    no máximo `erro_relativo` do valor real. Ao chegar a `limite` observações,
+    as contagens caem pela metade, então o sketch acompanha mudanças recentes.
+    Não é thread-safe: o EstimadorPreparo o protege com seu lock.
+    """
+
+    def __init__(self, erro_relativo=0.02, limite=2000):
+        self.gama = (1 + erro_relativo) / (1 - erro_relativo)
+        self.log_gama = math.log(self.gama)
+        self.limite = limite
+        self.baldes = {}
+        self.total = 0.0
+
+    def observar(self, valor):
+        if valor <= 0:
+            return
+        indice = math.ceil(math.log(valor) / self.log_gama)
+        self.baldes[indice] = self.baldes.get(indice, 0.0) + 1
+        self.total += 1
+        if self.total >= self.limite:
+            self.baldes = {indice: contagem / 2 for indice, contagem in self.baldes.items() if contagem > 1}
+            self.total = sum(self.baldes.values())
+
+    def quantil(self, q):
+        """Valor abaixo do qual está a fração `q` das observações, ou None"""
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0.0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if acumulado >= alvo:
+                # Centro do balde (gama^(i-1), gama^i]
+                return 2 * self.gama ** indice / (self.gama + 1)
+        return 2 * self.gama ** max(self.baldes) / (self.gama + 1)
+
+
+class EstimadorPreparo:
+    """Razão entre o tempo de preparo medido e o tempo da tabela, por prato.
+
+    Cada preparo observado atualiza a média móvel exponencial (peso `alfa`)
+    e o sketch de quantis do prato e de todos os pratos juntos. Multiplicar
+    o tempo de tabela de um pedido pela razão dá a previsão típica; pelo
+    quantil `quantil` da razão, uma previsão pessimista. Antes da primeira
+    observação, vale `razao_inicial` (a escala de tempo do servidor).
+    """
+
+    def __init__(self, razao_inicial=1.0, alfa=0.2, quantil=0.9):
+        self.razao_inicial = razao_inicial
+        self.alfa = alfa
+        self.quantil = quantil
+        self.estatisticas = {}
+        self.lock = threading.Lock()
+
+    def observar(self, prato, duracao, tempo_tabela):
+        """Um preparo de `prato` levou `duracao` segundos para `tempo_tabela` segundos de tabela"""
+        if tempo_tabela <= 0:
+            return
+        razao = duracao / tempo_tabela
+        with self.lock:
+            for chave in (prato, TODOS):
+                estatistica = self.estatisticas.get(chave)
+                if estatistica is None:
+                    estatistica = self.estatisticas[chave] = [razao, SketchQuantis()]
+                else:
+                    estatistica[0] += self.alfa * (razao - estatistica[0])
+                estatistica[1].observar(razao)
+
+    def razao(self, prato=TODOS):
+        """(razão média, razão no quantil) do prato, ou de todos se ele ainda não tem medições"""
+        with self.lock:
+            estatistica = self.estatisticas.get(prato) or self.estatisticas.get(TODOS)
+            if estatistica is None:
+                return self.razao_inicial, self.razao_inicial
+            media, sketch = estatistica
+            return media, max(sketch.quantil(self.quantil), media)
+
+    def resumo(self):
+        with self.lock:
+            return {
+                chave: {
+                    'razao_media': round(media, 4),
+                    f'razao_p{round(self.quantil * 100)}': round(sketch.quantil(self.quantil), 4),
+                    'amostras': round(sketch.total),
+                }
+                for chave, (media, sketch) in self.estatisticas.items()
+            }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Métricas do Servidor do Restaurante
+Contadores e histogramas de baixo custo para o caminho quente, expostos
+como dicionário (ação obter_metricas) ou em texto no formato Prometheus
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites (em segundos) dos baldes dos histogramas
+BALDES_PADRAO = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0
+)
+
+
+class Histograma:
+    """Histograma de baldes fixos; observar() custa uma busca binária e um lock"""
+
+    def __init__(self, baldes=BALDES_PADRAO):
+        self.baldes = baldes
+        self.contagens = [0] * (len(baldes) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def observar(self, valor):
+        indice = bisect.bisect_left(self.baldes, valor)
+        with self.lock:
+            self.contagens[indice] += 1
+            self.soma += valor
+            self.total += 1
+
+    def quantil(self, q):
+        """Estimativa do quantil pelo limite superior do balde correspondente"""
+        with self.lock:
+            if not self.total:
+                return None
+            alvo = q * self.total
+            acumulado = 0
+            for indice, contagem in enumerate(self.contagens):
+                acumulado += contagem
+                if acumulado >= alvo:
+                    return self.baldes[indice] if indice < len(self.baldes) else float('inf')
+
+    def resumo(self):
+        with self.lock:
+            total, soma = self.total, self.soma
+        return {
+            'total': total,
+            'media': soma / total if total else None,
+            'p50': self.quantil(0.5),
+            'p95': self.quantil(0.95),
+            'p99': self.quantil(0.99),
+        }
+
+    def linhas_prometheus(self, nome, rotulos):
+        with self.lock:
+            contagens, soma, total = list(self.contagens), self.soma, self.total
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.baldes + (float('inf'),), contagens):
+            acumulado += contagem
+            le = '+Inf' if limite == float('inf') else repr(limite)
+            linhas.append(f'{nome}_bucket{_rotulos(rotulos, le=le)} {acumulado}')
+        linhas.append(f'{nome}_sum{_rotulos(rotulos)} {soma}')
+        linhas.append(f'{nome}_count{_rotulos(rotulos)} {total}')
+        return linhas
+
+
+def _rotulos(rotulos, **extras):
+    todos = dict(rotulos, **extras)
+    if not todos:
+        return ''
+    return '{' + ','.join(f'{chave}="{valor}"' for chave, valor in todos.items()) + '}'
+
+
+class RegistroMetricas:
+    """Todas as métricas de uma instância do servidor.
+
+    Histogramas são criados sob demanda por rótulo (ação ou prato); os
+    medidores instantâneos são funções registradas pelo servidor e só são
+    avaliadas quando alguém lê as métricas.
+    """
+
+    def __init__(self, acoes_conhecidas=()):
+        self.acoes_conhecidas = set(acoes_conhecidas)
+        self.lock = threading.Lock()
+        self.comandos = {}
+        self.espera_fila = {}
+        self.preparo = {}
+        self.contadores = {'pedidos_aceitos': 0, 'pedidos_finalizados': 0, 'pedidos_rejeitados': 0, 'conexoes_aceitas': 0}
+        self.chefs_ocupados = 0
+        self.segundos_chef_ocupado = 0.0
+        self.medidores = {}
+
+    def _histograma(self, tabela, rotulo):
+        histograma = tabela.get(rotulo)
+        if histograma is None:
+            with self.lock:
+                histograma = tabela.setdefault(rotulo, Histograma())
+        return histograma
+
+    def incrementar(self, contador, valor=1):
+        with self.lock:
+            self.contadores[contador] = self.contadores.get(contador, 0) + valor
+
+    def observar_comando(self, acao, segundos):
+        if acao not in self.acoes_conhecidas:
+            acao = 'desconhecida'
+        self._histograma(self.comandos, acao).observar(segundos)
+
+    def inicio_preparo(self, prato, *esperas):
+        """Um chef pegou pedidos (vários, em uma fornada) que esperaram `esperas` segundos na fila"""
+        histograma = self._histograma(self.espera_fila, prato)
+        for espera in esperas:
+            histograma.observar(espera)
+        with self.lock:
+            self.chefs_ocupados += 1
+
+    def fim_preparo(self, prato, duracao, pedidos_concluidos=1):
+        """Fim do trabalho de um chef; partes que não são a última de um pedido não o concluem"""
+        self._histograma(self.preparo, prato).observar(duracao)
+        with self.lock:
+            self.chefs_ocupados -= 1
+            self.segundos_chef_ocupado += duracao
+            self.contadores['pedidos_finalizados'] += pedidos_concluidos
+
+    def registrar_medidor(self, nome, funcao):
+        """Medidor instantâneo, ex.: tamanho de pedidos_em_andamento"""
+        self.medidores[nome] = funcao
+
+    def _valores_medidores(self):
+        with self.lock:
+            valores = dict(self.contadores, chefs_ocupados=self.chefs_ocupados,
+                           segundos_chef_ocupado=round(self.segundos_chef_ocupado, 3))
+        for nome, funcao in list(self.medidores.items()):
+            valores[nome] = funcao()
+        return valores
+
+    def instantaneo(self):
+        """Todas as métricas como dicionário serializável em JSON"""
+        return {
+            'valores': self._valores_medidores(),
+            'comandos_s': {acao: h.resumo() for acao, h in list(self.comandos.items())},
+            'espera_fila_s': {prato: h.resumo() for prato, h in list(self.espera_fila.items())},
+            'preparo_s': {prato: h.resumo() for prato, h in list(self.preparo.items())},
+        }
+
+    def texto_prometheus(self):
+        """Métricas no formato de exposição em texto do Prometheus"""
+        linhas = []
+        contadores = set(self.contadores) | {'segundos_chef_ocupado'}
+        for nome, valor in self._valores_medidores().items():
+            if nome in contadores:
+                linhas.append(f'# TYPE restaurante_{nome}_total counter')
+                linhas.append(f'restaurante_{nome}_total {valor}')
+            else:
+                linhas.append(f'# TYPE restaurante_{nome} gauge')
+                linhas.append(f'restaurante_{nome} {valor}')
+
+        for nome, tabela, rotulo in (
+            ('restaurante_comando_segundos', self.comandos, 'acao'),
+            ('restaurante_espera_fila_segundos', self.espera_fila, 'prato'),
+            ('restaurante_preparo_segundos', self.preparo, 'prato'),
+        ):
+            linhas.append(f'# TYPE {nome} histogram')
+            for valor, histograma in sorted(tabela.items()):
+                linhas.extend(histograma.linhas_prometheus(nome, {rotulo: valor}))
+
+        return '\n'.join(linhas) + '\n'
+
+
+class ServidorMetricasHTTP:
+    """Expõe /metrics em uma porta separada, em uma thread própria"""
+
+    def __init__(self, registro, host, port):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                corpo = registro.texto_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.http = ThreadingHTTPServer((host, port), Handler)
+        self.http.daemon_threads = True
+        self.thread = threading.Thread(target=self.http.serve_forever, name="Metricas", daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+
+    def parar(self):
+        self.http.shutdown()
+        self.http.server_close()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Registros Compactos de Pedidos do Restaurante
+Pedido e Resultado com __slots__, timestamps numéricos e prato como índice
+do cardápio; só viram dicionário JSON na fronteira com o cliente
+"""
+
+import sys
+import time
+
+# Converte instantes de time.monotonic() em horário de parede só na hora de exibir
+_DESLOCAMENTO_RELOGIO = time.time() - time.monotonic()
+
+
+def horario(instante_monotonico):
+    """Formata um instante de time.monotonic() como HH:MM:SS"""
+    return time.strftime('%H:%M:%S', time.localtime(instante_monotonico + _DESLOCAMENTO_RELOGIO))
+
+
+class Pedido:
+    """Pedido aceito aguardando ou em preparo; `prazo` é um instante de time.monotonic()"""
+    __slots__ = ('id', 'indice_prato', 'quantidade', 'criado_em', 'prazo')
+
+    def __init__(self, pedido_id, indice_prato, quantidade, criado_em=None, prazo=None):
+        self.id = pedido_id
+        self.indice_prato = indice_prato
+        self.quantidade = quantidade
+        self.criado_em = time.monotonic() if criado_em is None else criado_em
+        self.prazo = prazo
+
+    def prazo_relogio(self):
+        """Prazo em horário de parede (time.time()), que vale em outro processo, ou None"""
+        if self.prazo is None:
+            return None
+        return round(self.prazo + _DESLOCAMENTO_RELOGIO, 3)
+
+    def para_dict(self, cardapio):
+        return {
+            'id': self.id,
+            'prato': cardapio[self.indice_prato],
+            'quantidade': self.quantidade,
+            'timestamp_pedido': horario(self.criado_em)
+        }
+
+
+class Resultado:
+    """Pedido concluído por um chef"""
+    __slots__ = ('pedido_id', 'indice_prato', 'quantidade', 'tempo_preparo', 'chef', 'concluido_em')
+
+    def __init__(self, pedido_id, indice_prato, quantidade, tempo_preparo, chef, concluido_em=None):
+        self.pedido_id = pedido_id
+        self.indice_prato = indice_prato
+        self.quantidade = quantidade
+        self.tempo_preparo = tempo_preparo
+        # Poucos chefs, milhões de resultados: todos compartilham a mesma string
+        self.chef = sys.intern(chef)
+        self.concluido_em = time.monotonic() if concluido_em is None else concluido_em
+
+    def para_dict(self, cardapio):
+        """Formato de resposta do protocolo"""
+        return {
+            'pedido_id': self.pedido_id,
+            'prato': cardapio[self.indice_prato],
+            'quantidade': self.quantidade,
+            'tempo_preparo': round(self.tempo_preparo, 2),
+            'chef': self.chef,
+            'status': 'pronto',
+            'timestamp': horario(self.concluido_em)
+        }
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Pool de Conexões do Cliente do Restaurante
+Conexões mantidas abertas e reutilizadas por várias threads, com verificação
+de saúde, reconexão com backoff e cardápio em cache pela versão
+"""
+
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from binario import CODECS
+from cliente import CacheCardapio, RestauranteCliente
+
+
+class PoolClientes:
+    """Até `tamanho` conexões com um servidor, compartilhadas entre threads.
+
+    Uso como biblioteca, sem o loop interativo:
+
+        with PoolClientes('localhost', 8888, tamanho=8) as pool:
+            resposta = pool.executar('fazer_pedido', 'pizza', 2)
+            with pool.cliente() as cliente:
+                cliente.verificar_pedido(resposta['pedido_id'])
+
+    - Conexões ficam abertas entre usos; as ociosas são verificadas a cada
+      `intervalo_saude` segundos com um `obter_cardapio` condicional, que
+      também atualiza o cardápio em cache se a versão do servidor mudou.
+    - Conexões perdidas são refeitas com backoff exponencial com jitter, de
+      `backoff_inicial` até `backoff_maximo` segundos, por até `tentativas` vezes.
+    - Todas as conexões compartilham o cache do cardápio: o aperto de mão envia
+      a versão conhecida e o servidor só reenvia a lista quando ela muda.
+    """
+
+    def __init__(self, host='localhost', port=8888, tamanho=4, codecs=CODECS,
+                 intervalo_saude=10.0, timeout_saude=2.0, backoff_inicial=0.05,
+                 backoff_maximo=2.0, tentativas=5, timeout_conexao=5.0):
+        self.host = host
+        self.port = port
+        self.tamanho = tamanho
+        self.codecs = codecs
+        self.intervalo_saude = intervalo_saude
+        self.timeout_saude = timeout_saude
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.tentativas = tentativas
+        self.timeout_conexao = timeout_conexao
+
+        self.cache_cardapio = CacheCardapio()
+        # LIFO: a conexão usada mais recentemente é a mais provável de estar viva
+        self.ociosos = queue.LifoQueue()
+        self.vagas = threading.BoundedSemaphore(tamanho)
+        self.ativo = False
+        self.parada = threading.Event()
+        self.thread_saude = None
+
+        self.estatisticas = {'conexoes_criadas': 0, 'reconexoes': 0, 'falhas_saude': 0, 'reusos': 0}
+        self.lock_estatisticas = threading.Lock()
+
+    def _contar(self, chave):
+        with self.lock_estatisticas:
+            self.estatisticas[chave] += 1
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def iniciar(self, aquecer=True):
+        """Abre as conexões (se `aquecer`) e inicia a verificação de saúde"""
+        self.ativo = True
+        if aquecer:
+            for _ in range(self.tamanho):
+                self.ociosos.put(self._conectar())
+        if self.intervalo_saude:
+            self.thread_saude = threading.Thread(target=self._verificar_saude, name="SaudePool", daemon=True)
+            self.thread_saude.start()
+        return self
+
+    def fechar(self):
+        self.ativo = False
+        self.parada.set()
+        if self.thread_saude is not None:
+            self.thread_saude.join()
+        while True:
+            try:
+                self.ociosos.get_nowait().desconectar()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # ------------------------------------------------------------------
+    # Conexões
+    # ------------------------------------------------------------------
+
+    def _conectar(self):
+        """Nova conexão, tentando de novo com backoff exponencial e jitter"""
+        espera = self.backoff_inicial
+        for tentativa in range(1, self.tentativas + 1):
+            cliente = RestauranteCliente(
+                self.host, self.port, self.codecs, self.cache_cardapio,
+                silencioso=True, timeout_conexao=self.timeout_conexao
+            )
+            if cliente.conectar():
+                self._contar('conexoes_criadas')
+                return cliente
+            if tentativa == self.tentativas or self.parada.is_set():
+                break
+            time.sleep(espera + random.uniform(0, espera))
+            espera = min(espera * 2, self.backoff_maximo)
+
+        raise ConnectionError(
+            f'Não foi possível conectar a {self.host}:{self.port} '
+            f'após {self.tentativas} tentativas: {cliente.ultimo_erro}'
+        )
+
+    def adquirir(self, timeout=None):
+        """Empresta uma conexão; bloqueia até `timeout` se todas estão em uso"""
+        if not self.ativo:
+            raise RuntimeError('Pool não iniciado ou já fechado')
+        if not self.vagas.acquire(timeout=timeout):
+            raise TimeoutError(f'Nenhuma conexão livre em {timeout}s')
+
+        try:
+            while True:
+                try:
+                    cliente = self.ociosos.get_nowait()
+                except queue.Empty:
+                    return self._conectar()
+                if cliente.conectado:
+                    self._contar('reusos')
+                    return cliente
+                # Conexão caiu enquanto estava ociosa
+                cliente.desconectar()
+                self._contar('reconexoes')
+        except BaseException:
+            self.vagas.release()
+            raise
+
+    def devolver(self, cliente):
+        """Devolve a conexão ao pool; conexões mortas são descartadas"""
+        if self.ativo and cliente.conectado:
+            self.ociosos.put(cliente)
+        else:
+            cliente.desconectar()
+        self.vagas.release()
+
+    @contextmanager
+    def cliente(self, timeout=None):
+        cliente = self.adquirir(timeout)
+        try:
+            yield cliente
+        finally:
+            self.devolver(cliente)
+
+    def executar(self, metodo, *args, **kwargs):
+        """Chama um método de RestauranteCliente em uma conexão do pool.
+
+        Se a conexão caiu antes de o comando sair, ele é repetido uma vez em
+        uma conexão nova; comandos já enviados nunca são repetidos, para não
+        duplicar pedidos. A exceção é a resposta com 'reconectar' de um
+        servidor reiniciando: ele não executou o comando, e o processo novo
+        atende a conexão nova.
+        """
+        with self.cliente() as cliente:
+            resposta = getattr(cliente, metodo)(*args, **kwargs)
+            if resposta.get('reconectar'):
+                # Esta conexão é do processo antigo: descartada ao ser devolvida
+                cliente.desconectar()
+                self._contar('reconexoes')
+        if resposta.get('erro') != 'Não conectado ao servidor' and not resposta.get('reconectar'):
+            return resposta
+        with self.cliente() as cliente:
+            return getattr(cliente, metodo)(*args, **kwargs)
+
+    def cardapio(self):
+        """Cardápio em cache; só consulta o servidor se ainda não há nenhum"""
+        if self.cache_cardapio.versao is None and not self.cache_cardapio.cardapio:
+            self.executar('obter_cardapio')
+        return self.cache_cardapio.cardapio
+
+    # ------------------------------------------------------------------
+    # Saúde
+    # ------------------------------------------------------------------
+
+    def _saudavel(self, cliente):
+        """Ping com obter_cardapio condicional (resposta mínima se nada mudou)"""
+        if not cliente.conectado:
+            return False
+        comando = {'acao': 'obter_cardapio', 'versao_cardapio': self.cache_cardapio.versao}
+        try:
+            resposta = cliente.enviar_comandos_sem_esperar([comando])[0].result(self.timeout_saude)
+        except Exception:
+            return False
+        if 'erro' in resposta:
+            return False
+        cliente.cardapio = self.cache_cardapio.atualizar(resposta)
+        return True
+
+    def _verificar_saude(self):
+        """Verifica as conexões ociosas e repõe as que caíram"""
+        while not self.parada.wait(self.intervalo_saude):
+            # Empresta todas as ociosas antes de verificar: na pilha LIFO, uma
+            # conexão devolvida seria a próxima retirada e verificada de novo
+            emprestados = []
+            for _ in range(self.ociosos.qsize()):
+                # Conexões em uso não são tocadas: só as que conseguimos emprestar
+                if not self.vagas.acquire(blocking=False):
+                    break
+                try:
+                    emprestados.append(self.ociosos.get_nowait())
+                except queue.Empty:
+                    self.vagas.release()
+                    break
+
+            caidas = 0
+            for cliente in emprestados:
+                if self._saudavel(cliente):
+                    self.ociosos.put(cliente)
+                else:
+                    self._contar('falhas_saude')
+                    cliente.desconectar()
+                    caidas += 1
+                self.vagas.release()
+
+            # Repõe as que caíram uma de cada vez, sem segurar as outras vagas
+            for _ in range(caidas):
+                if not self.vagas.acquire(blocking=False):
+                    break
+                try:
+                    self.ociosos.put(self._conectar())
+                    self._contar('reconexoes')
+                except ConnectionError:
+                    # Servidor fora do ar: tenta de novo na próxima rodada
+                    break
+                finally:
+                    self.vagas.release()
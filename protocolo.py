@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Protocolo de Comunicação do Sistema de Restaurante Distribuído
+Mensagens enquadradas com prefixo de tamanho (4 bytes, big-endian); o
+payload é JSON, ou o codec binário (binario.py) se negociado na conexão
+"""
+
+import asyncio
+import json
+import select
+import struct
+import time
+
+# Cabeçalho de cada quadro: tamanho do payload em bytes
+CABECALHO = struct.Struct('!I')
+TAMANHO_MAXIMO_QUADRO = 16 * 1024 * 1024
+
+# Campo usado para correlacionar respostas com comandos enviados em pipeline
+CAMPO_CORRELACAO = 'req_id'
+
+
+class ErroProtocolo(Exception):
+    """Quadro malformado ou conexão encerrada no meio de uma mensagem"""
+
+
+class TempoEsgotado(ErroProtocolo):
+    """Prazo de leitura vencido: `motivo` é 'ociosa' (nenhum quadro começou) ou 'leitura'"""
+
+    def __init__(self, motivo, mensagem):
+        super().__init__(mensagem)
+        self.motivo = motivo
+
+
+class CodecJSON:
+    """Codec padrão: texto JSON em UTF-8"""
+    nome = 'json'
+
+    def codificar(self, mensagem):
+        return json.dumps(mensagem, ensure_ascii=False).encode('utf-8')
+
+    def decodificar(self, payload):
+        return json.loads(payload.decode('utf-8'))
+
+
+# Toda conexão começa em JSON; outro codec só depois do aperto de mão
+CODEC_JSON = CodecJSON()
+
+
+def codificar_mensagem(mensagem, codec=CODEC_JSON):
+    """Serializa uma mensagem em um quadro pronto para envio"""
+    payload = codec.codificar(mensagem)
+    if len(payload) > TAMANHO_MAXIMO_QUADRO:
+        raise ErroProtocolo(f'Mensagem excede o tamanho máximo ({len(payload)} bytes)')
+    return CABECALHO.pack(len(payload)) + payload
+
+
+def decodificar_payload(payload, codec=CODEC_JSON):
+    """Converte o payload de um quadro de volta em mensagem"""
+    return codec.decodificar(payload)
+
+
+def enviar_mensagem(sock, mensagem):
+    """Envia uma mensagem completa pelo socket"""
+    sock.sendall(codificar_mensagem(mensagem))
+
+
+class LeitorMensagens:
+    """Leitor com buffer que separa o fluxo TCP em quadros completos.
+
+    Em um socket não bloqueante, os prazos valem: `timeout_ocioso` segundos
+    esperando um quadro começar e `timeout_leitura` segundos para um quadro
+    começado chegar inteiro; vencido um deles, levanta TempoEsgotado.
+    `pode_expirar(motivo)`, se dado, é consultado antes: enquanto devolver
+    False, o prazo é renovado em vez de vencer.
+    """
+
+    def __init__(self, sock, tamanho_bloco=65536, codec=CODEC_JSON, timeout_ocioso=None, timeout_leitura=None,
+                 pode_expirar=None):
+        self.sock = sock
+        self.tamanho_bloco = tamanho_bloco
+        self.buffer = bytearray()
+        self.codec = codec
+        self.timeout_ocioso = timeout_ocioso
+        self.timeout_leitura = timeout_leitura
+        self.pode_expirar = pode_expirar
+        self.inicio_quadro = None
+        self._poll = None
+
+    def _extrair_quadro(self):
+        """Retorna o próximo quadro completo do buffer, se houver"""
+        if len(self.buffer) < CABECALHO.size:
+            return None
+
+        (tamanho,) = CABECALHO.unpack_from(self.buffer)
+        if tamanho > TAMANHO_MAXIMO_QUADRO:
+            raise ErroProtocolo(f'Quadro excede o tamanho máximo ({tamanho} bytes)')
+
+        fim = CABECALHO.size + tamanho
+        if len(self.buffer) < fim:
+            return None
+
+        payload = bytes(self.buffer[CABECALHO.size:fim])
+        del self.buffer[:fim]
+        return payload
+
+    def ler_quadro(self):
+        """Bloqueia até um quadro completo chegar; retorna None no fim da conexão"""
+        while True:
+            payload = self._extrair_quadro()
+            if payload is not None:
+                # O que sobrou no buffer já é o começo do próximo quadro
+                self.inicio_quadro = time.monotonic() if self.buffer else None
+                return payload
+
+            if self.sock.gettimeout() == 0.0:
+                self._aguardar_dados()
+                try:
+                    dados = self.sock.recv(self.tamanho_bloco)
+                except BlockingIOError:
+                    continue
+            else:
+                dados = self.sock.recv(self.tamanho_bloco)
+            if not dados:
+                if self.buffer:
+                    raise ErroProtocolo('Conexão encerrada no meio de um quadro')
+                return None
+            if not self.buffer:
+                self.inicio_quadro = time.monotonic()
+            self.buffer.extend(dados)
+
+    def _aguardar_dados(self):
+        """Espera o socket não bloqueante ter dados, dentro do prazo em vigor"""
+        if self.buffer:
+            motivo, prazo = 'leitura', self.timeout_leitura
+            if prazo is not None:
+                prazo = self.inicio_quadro + prazo - time.monotonic()
+        else:
+            motivo, prazo = 'ociosa', self.timeout_ocioso
+
+        # poll não tem o limite de descritores do select (FD_SETSIZE)
+        if hasattr(select, 'poll'):
+            if self._poll is None:
+                self._poll = select.poll()
+                self._poll.register(self.sock, select.POLLIN)
+            prontos = self._poll.poll(None if prazo is None else max(prazo, 0) * 1000)
+        else:
+            prontos = select.select([self.sock], [], [], None if prazo is None else max(prazo, 0))[0]
+        if not prontos:
+            if self.pode_expirar is not None and not self.pode_expirar(motivo):
+                # Prazo renovado: ler_quadro tenta o recv e volta a esperar
+                if motivo == 'leitura':
+                    self.inicio_quadro = time.monotonic()
+                return
+            if motivo == 'ociosa':
+                raise TempoEsgotado(motivo, f'Nenhum comando em {self.timeout_ocioso}s')
+            raise TempoEsgotado(motivo, f'Quadro incompleto depois de {self.timeout_leitura}s')
+
+    def ler_mensagem(self):
+        """Lê e decodifica a próxima mensagem; retorna None no fim da conexão"""
+        payload = self.ler_quadro()
+        if payload is None:
+            return None
+        return decodificar_payload(payload, self.codec)
+
+
+async def ler_quadro_async(reader, inicio=b''):
+    """Versão asyncio de LeitorMensagens.ler_quadro para um StreamReader.
+
+    `inicio` são bytes do cabeçalho já lidos do reader.
+    """
+    try:
+        cabecalho = inicio + await reader.readexactly(CABECALHO.size - len(inicio))
+    except asyncio.IncompleteReadError as e:
+        if e.partial or inicio:
+            raise ErroProtocolo('Conexão encerrada no meio de um quadro')
+        return None
+
+    (tamanho,) = CABECALHO.unpack(cabecalho)
+    if tamanho > TAMANHO_MAXIMO_QUADRO:
+        raise ErroProtocolo(f'Quadro excede o tamanho máximo ({tamanho} bytes)')
+
+    try:
+        return await reader.readexactly(tamanho)
+    except asyncio.IncompleteReadError:
+        raise ErroProtocolo('Conexão encerrada no meio de um quadro')
+
+
+class LeitorQuadrosAsync:
+    """ler_quadro_async com os prazos de LeitorMensagens, para uma conexão asyncio.
+
+    Um único timer por conexão vigia os prazos: cada leitura só atualiza o
+    prazo em vigor, e o timer que dispara cedo se reagenda (sem uma task ou
+    um timer novo por quadro). Só um prazo mais curto que o agendado
+    reagenda o timer na hora. Vencido o prazo, a task da leitura é
+    cancelada e `ler_quadro` levanta TempoEsgotado. `pode_expirar(motivo)`,
+    se dado, é consultado antes de expirar: enquanto devolver False, o
+    prazo é renovado.
+    """
+
+    def __init__(self, reader, timeout_ocioso=None, timeout_leitura=None, pode_expirar=None):
+        self.reader = reader
+        self.timeout_ocioso = timeout_ocioso
+        self.timeout_leitura = timeout_leitura
+        self.pode_expirar = pode_expirar
+        self.prazo = None
+        self.motivo = None
+        self.expirado = None
+        self.timer = None
+        self.tarefa = None
+
+    async def ler_quadro(self):
+        if self.timeout_ocioso is None and self.timeout_leitura is None:
+            return await ler_quadro_async(self.reader)
+
+        self.tarefa = asyncio.current_task()
+        try:
+            self._vigiar('ociosa', self.timeout_ocioso)
+            try:
+                inicio = await self.reader.readexactly(1)
+            except asyncio.IncompleteReadError:
+                return None
+            self._vigiar('leitura', self.timeout_leitura)
+            return await ler_quadro_async(self.reader, inicio)
+        except asyncio.CancelledError:
+            if self.expirado is None:
+                raise
+            motivo, self.expirado = self.expirado, None
+            # O cancelamento foi nosso: sem isso, asyncio.timeout e wait_for
+            # posteriores nesta task confundiriam o próprio prazo com ele
+            if hasattr(self.tarefa, 'uncancel'):
+                self.tarefa.uncancel()
+            if motivo == 'ociosa':
+                raise TempoEsgotado(motivo, f'Nenhum comando em {self.timeout_ocioso}s')
+            raise TempoEsgotado(motivo, f'Quadro incompleto depois de {self.timeout_leitura}s')
+        finally:
+            self.prazo = None
+
+    def _vigiar(self, motivo, segundos):
+        if segundos is None:
+            self.prazo = None
+            return
+        loop = asyncio.get_running_loop()
+        self.motivo = motivo
+        self.prazo = loop.time() + segundos
+        if self.timer is not None and self.prazo < self.timer.when():
+            self.timer.cancel()
+            self.timer = None
+        if self.timer is None:
+            self.timer = loop.call_at(self.prazo, self._verificar)
+
+    def _verificar(self):
+        self.timer = None
+        if self.prazo is None:
+            return
+        loop = asyncio.get_running_loop()
+        if loop.time() < self.prazo:
+            self.timer = loop.call_at(self.prazo, self._verificar)
+        elif self.pode_expirar is not None and not self.pode_expirar(self.motivo):
+            self._vigiar(self.motivo, self.timeout_ocioso if self.motivo == 'ociosa' else self.timeout_leitura)
+        else:
+            self.expirado = self.motivo
+            self.tarefa.cancel()
+
+    def fechar(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Registro de Eventos do Servidor do Restaurante
+Log estruturado e assíncrono: as threads só enfileiram registros e uma
+thread escritora grava em lotes no arquivo ou na saída padrão
+"""
+
+import json
+import queue
+import random
+import sys
+import threading
+import time
+
+NIVEIS = {'debug': 10, 'info': 20, 'aviso': 30, 'erro': 40}
+
+
+def _nada(*args, **kwargs):
+    """Substitui os métodos de níveis desativados: custo de uma chamada vazia"""
+
+
+class RegistroEventos:
+    """Log com níveis, amostragem por evento e limite de registros por segundo.
+
+    Os métodos `debug`, `info`, `aviso` e `erro` de níveis abaixo do mínimo
+    são trocados por uma função vazia na configuração, então um nível
+    desativado não formata nem enfileira nada. Como no `logging`, a mensagem
+    pode levar argumentos no estilo %: `log.info('evento', 'Pedido %s', id)`
+    só monta o texto na thread escritora, e nunca para registros descartados.
+
+    - `amostragem`: {evento: fração}, ex.: {'comando_recebido': 0.01}
+    - `max_por_segundo`: acima disso os registros são descartados e contados
+    - `formato`: 'texto' (mensagem legível) ou 'json' (uma linha JSON por registro)
+    """
+
+    def __init__(self, nivel='info', destino=None, formato='texto', amostragem=None,
+                 max_por_segundo=None, silencioso=False, tamanho_fila=10000,
+                 intervalo_escrita=0.05):
+        if nivel not in NIVEIS:
+            raise ValueError(f'Nível "{nivel}" inválido, use um de {tuple(NIVEIS)}')
+
+        self.formato = formato
+        self.amostragem = dict(amostragem or {})
+        self.max_por_segundo = max_por_segundo
+        self.intervalo_escrita = intervalo_escrita
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.descartados = 0
+        self.janela = (0, 0)
+
+        # Destino: caminho de arquivo ou objeto com write(); padrão é a saída padrão
+        self.arquivo_proprio = isinstance(destino, str)
+        self.destino = open(destino, 'a', encoding='utf-8') if self.arquivo_proprio else (destino or sys.stdout)
+
+        # Modo silencioso: só erros
+        self.nivel_minimo = NIVEIS['erro'] if silencioso else NIVEIS[nivel]
+        for nome, valor in NIVEIS.items():
+            if valor >= self.nivel_minimo:
+                setattr(self, nome, self._metodo(nome))
+            else:
+                setattr(self, nome, _nada)
+
+        self.ativo = True
+        self.thread_escritora = threading.Thread(target=self._escrever, name="Registro", daemon=True)
+        self.thread_escritora.start()
+
+    def _metodo(self, nivel):
+        def registrar(evento, mensagem, *args, **campos):
+            self.registrar(nivel, evento, mensagem, *args, **campos)
+        return registrar
+
+    def habilitado(self, nivel):
+        return NIVEIS[nivel] >= self.nivel_minimo
+
+    def registrar(self, nivel, evento, mensagem, *args, **campos):
+        """Enfileira um registro; nunca bloqueia a thread que chamou"""
+        if not self.ativo:
+            # Depois de fechado não há escritora: grava direto
+            self._gravar(self._formatar((time.time(), nivel, evento, mensagem, args, campos)) + '\n')
+            return
+
+        taxa = self.amostragem.get(evento)
+        if taxa is not None and random.random() >= taxa:
+            return
+
+        if self.max_por_segundo is not None:
+            segundo = int(time.monotonic())
+            inicio, contagem = self.janela
+            if segundo != inicio:
+                inicio, contagem = segundo, 0
+            if contagem >= self.max_por_segundo:
+                self.descartados += 1
+                return
+            self.janela = (inicio, contagem + 1)
+
+        try:
+            self.fila.put_nowait((time.time(), nivel, evento, mensagem, args, campos))
+        except queue.Full:
+            self.descartados += 1
+
+    def _formatar(self, registro):
+        instante, nivel, evento, mensagem, args, campos = registro
+        if args:
+            mensagem = mensagem % args
+        if self.formato == 'json':
+            return json.dumps(
+                dict(campos, ts=round(instante, 3), nivel=nivel, evento=evento, msg=mensagem),
+                ensure_ascii=False, default=str
+            )
+        return mensagem
+
+    def _escrever(self):
+        """Thread escritora: junta tudo o que está na fila em uma única escrita"""
+        while self.ativo or not self.fila.empty():
+            try:
+                lote = [self.fila.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+
+            if self.intervalo_escrita and self.ativo:
+                time.sleep(self.intervalo_escrita)
+            while True:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            texto = '\n'.join(self._formatar(registro) for registro in lote) + '\n'
+            if self.descartados:
+                descartados, self.descartados = self.descartados, 0
+                texto += f'⚠️  {descartados} registros de log descartados\n'
+            self._gravar(texto)
+
+    def _gravar(self, texto):
+        try:
+            self.destino.write(texto)
+            self.destino.flush()
+        except (OSError, ValueError):
+            pass
+
+    def fechar(self):
+        """Grava os registros pendentes e encerra a thread escritora"""
+        if not self.ativo:
+            return
+        self.ativo = False
+        self.thread_escritora.join()
+        if self.arquivo_proprio:
+            self.destino.close()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Retenção de Pedidos Prontos
+Guarda os resultados recentes em memória com limite LRU e TTL,
+opcionalmente arquivando em disco os que forem despejados
+"""
+
+import shelve
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class ArmazemProntos:
+    """Mapeamento pedido_id -> resultado com retenção limitada.
+
+    - `max_entradas`: acima disso, o pedido menos consultado recentemente sai (LRU)
+    - `ttl`: segundos após a conclusão em que o pedido fica em memória
+    - `arquivo`: caminho de um shelve onde os pedidos despejados continuam legíveis
+    """
+
+    def __init__(self, max_entradas=10000, ttl=3600.0, arquivo=None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.entradas = OrderedDict()
+        self.conclusoes = deque()
+        self.lock = threading.Lock()
+        self.arquivo = shelve.open(arquivo) if arquivo else None
+
+        self.contadores = {
+            'acertos': 0,
+            'acertos_arquivo': 0,
+            'faltas': 0,
+            'despejos_lru': 0,
+            'despejos_ttl': 0,
+            'arquivados': 0,
+        }
+
+    def _despejar(self, pedido_id, motivo):
+        resultado, _ = self.entradas.pop(pedido_id)
+        self.contadores[motivo] += 1
+        if self.arquivo is not None:
+            self.arquivo[pedido_id] = resultado
+            self.contadores['arquivados'] += 1
+
+    def _expirar(self, agora):
+        """Remove da memória os pedidos concluídos há mais de `ttl` segundos"""
+        if self.ttl is None:
+            return
+        while self.conclusoes and agora - self.conclusoes[0][0] > self.ttl:
+            concluido_em, pedido_id = self.conclusoes.popleft()
+            entrada = self.entradas.get(pedido_id)
+            if entrada is not None and entrada[1] == concluido_em:
+                self._despejar(pedido_id, 'despejos_ttl')
+
+    def _compactar(self):
+        """Descarta da fila de conclusões os pedidos que já saíram por LRU"""
+        vivas = deque()
+        for concluido_em, pedido_id in self.conclusoes:
+            entrada = self.entradas.get(pedido_id)
+            if entrada is not None and entrada[1] == concluido_em:
+                vivas.append((concluido_em, pedido_id))
+        self.conclusoes = vivas
+
+    def __setitem__(self, pedido_id, resultado):
+        agora = time.monotonic()
+        with self.lock:
+            self.entradas[pedido_id] = (resultado, agora)
+            self.entradas.move_to_end(pedido_id)
+            # Sem TTL, a fila de conclusões não é usada
+            if self.ttl is not None:
+                self.conclusoes.append((agora, pedido_id))
+
+            self._expirar(agora)
+            while self.max_entradas is not None and len(self.entradas) > self.max_entradas:
+                self._despejar(next(iter(self.entradas)), 'despejos_lru')
+            # Cada entrada viva tem uma conclusão; o resto é de despejos LRU (custo amortizado)
+            if len(self.conclusoes) > 2 * len(self.entradas) + 16:
+                self._compactar()
+
+    def get(self, pedido_id, padrao=None):
+        """Busca em memória e, se não achar, no arquivo em disco"""
+        with self.lock:
+            self._expirar(time.monotonic())
+
+            entrada = self.entradas.get(pedido_id)
+            if entrada is not None:
+                self.entradas.move_to_end(pedido_id)
+                self.contadores['acertos'] += 1
+                return entrada[0]
+
+            if self.arquivo is not None and pedido_id in self.arquivo:
+                self.contadores['acertos_arquivo'] += 1
+                return self.arquivo[pedido_id]
+
+            self.contadores['faltas'] += 1
+            return padrao
+
+    def __contains__(self, pedido_id):
+        with self.lock:
+            return pedido_id in self.entradas or (
+                self.arquivo is not None and pedido_id in self.arquivo
+            )
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def itens(self):
+        """Cópia dos pares (pedido_id, resultado) em memória"""
+        with self.lock:
+            return [(pedido_id, entrada[0]) for pedido_id, entrada in self.entradas.items()]
+
+    def estatisticas(self):
+        """Contadores de acertos e despejos, mais a ocupação atual"""
+        with self.lock:
+            return dict(self.contadores, em_memoria=len(self.entradas))
+
+    def fechar(self):
+        with self.lock:
+            if self.arquivo is not None:
+                self.arquivo.close()
+                self.arquivo = None
@@ -4,27 +4,199 @@ Servidor do Sistema de Restaurante Distribuído
 Gerencia pedidos, processamento e estado do restaurante
 """
 
+import asyncio
+import argparse
+import hashlib
+import multiprocessing
+import math
+import os
+import signal
 import socket
 import threading
 import json
 import time
 import random
-from concurrent.futures import ThreadPoolExecutor
+import select
+import subprocess
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor, wait
 import uuid
 
+from admissao import ControleAdmissao, LimitadorTaxa, rejeicao
+from agrupamento import CAPACIDADE_FORNADA, FATOR_FORNADA, AgrupadorPedidos, tempo_fornada
+from conexoes import ConexaoAsync, ConexaoThreads, EscritorConexoes
+from diario import DiarioPedidos
+from escalonador import POLITICAS
+from estacoes import CAPACIDADE_ESTACOES, ESTACAO_GERAL, ESTACOES_PRATOS, Estacao, Preparo
+from estado import EstadoPedidos
+from estimativas import EstimadorPreparo
+from metricas import RegistroMetricas, ServidorMetricasHTTP
+from modelos import Pedido, Resultado
+from retencao import ArmazemProntos
+from registro import NIVEIS, RegistroEventos
+from binario import CODECS, criar_codec
+from protocolo import (
+    CAMPO_CORRELACAO, CODEC_JSON, ErroProtocolo, LeitorMensagens, codificar_mensagem,
+    LeitorQuadrosAsync, TempoEsgotado, decodificar_payload, enviar_mensagem
+)
+
+MOTORES = ('threads', 'asyncio')
+BACKENDS_CHEFS = ('threads', 'processos')
+
+# Nome do chef em um processo do backend 'processos' (definido pelo initializer)
+_NOME_CHEF_PROCESSO = None
+
+# Resposta de um pedido que, no reinício, passou para o processo novo
+PEDIDO_TRANSFERIDO = {
+    'status': 'transferido',
+    'erro': 'Pedido transferido para o novo processo do servidor; reconecte para acompanhá-lo',
+    'reconectar': True,
+}
+
+# Segundos que o processo anterior espera o sucessor responder no reinício
+TIMEOUT_REINICIO = 30.0
+# Segundos que o processo anterior espera as conexões que ainda tem fecharem sozinhas
+ESPERA_CONEXOES_REINICIO = 2.0
+
+# Bytes que podem se acumular no buffer de saída de uma conexão antes do despejo
+BUFFER_SAIDA_PADRAO = 4 * 1024 * 1024
+
+def _iniciar_processo_chef():
+    global _NOME_CHEF_PROCESSO
+    _NOME_CHEF_PROCESSO = f"Chef_p{os.getpid()}"
+
+def cozinhar(tempo_base, quantidade, escala_tempo=1.0, fator_fornada=1.0, capacidade_fornada=None):
+    """Trabalho do chef: roda em uma thread ou em um processo separado.
+    
+    `escala_tempo` encurta (ou alonga) o preparo simulado, útil em benchmarks.
+    Com `fator_fornada` < 1, os itens são preparados juntos em fornadas (sub-linear).
+    Retorna (duração do preparo, nome do chef).
+    """
+    tempo_preparo = tempo_fornada(tempo_base, quantidade, fator_fornada, capacidade_fornada)
+    tempo_total = (tempo_preparo + random.uniform(0.2, 0.8)) * escala_tempo
+    
+    inicio = time.monotonic()
+    time.sleep(tempo_total)  # Simula o preparo
+    fim = time.monotonic()
+    
+    return fim - inicio, _NOME_CHEF_PROCESSO or threading.current_thread().name
+
 class RestauranteServidor:
-    def __init__(self, host='localhost', port=8888, num_chefs=4):
+    # Ações do protocolo (usadas também como rótulos das métricas)
+    ACOES = (
+        'fazer_pedido', 'fazer_pedidos_lote', 'verificar_pedido', 'verificar_pedidos_lote',
+        'listar_pendentes', 'obter_cardapio', 'aguardar_todos', 'estatisticas_prontos',
+        'obter_metricas', 'subscrever', 'aguardar_pedido', 'aguardar_meus_pedidos', 'negociar',
+        'ajustar_chefs', 'drenar', 'reiniciar'
+    )
+    
+    # Ações que podem bloquear por muito tempo: no motor asyncio, são aguardadas
+    # sem bloquear o event loop
+    ACOES_BLOQUEANTES = {'aguardar_todos', 'aguardar_pedido', 'aguardar_meus_pedidos'}
+    
+    def __init__(self, host='localhost', port=8888, num_chefs=4,
+                 motor='threads', backlog=128, max_conexoes=None,
+                 escalonador='fifo', envelhecimento=0.1,
+                 max_prontos=10000, ttl_prontos=3600.0, arquivo_prontos=None,
+                 diretorio_diario=None, snapshot_a_cada=10000, backend_chefs='threads',
+                 shard=None, escala_tempo=1.0, porta_metricas=None, faixas_estado=16,
+                 nivel_log='info', arquivo_log=None, formato_log='texto',
+                 amostragem_log=None, max_log_por_segundo=None, silencioso=False,
+                 max_fila=None, max_espera=None,
+                 taxa_pedidos=None, rajada_pedidos=None, chefs_min=None, chefs_max=None,
+                 espera_alvo=None, intervalo_autoescala=0.5, resfriamento_autoescala=2.0,
+                 estacoes=False, capacidade_estacoes=None, janela_agrupamento=None,
+                 capacidade_fornadas=None, fator_fornada=FATOR_FORNADA, herdar_socket=None,
+                 canal_reinicio=None, argv_reinicio=None, timeout_ocioso=None, timeout_leitura=30.0,
+                 timeout_escrita=30.0, buffer_saida=BUFFER_SAIDA_PADRAO):
+        if motor not in MOTORES:
+            raise ValueError(f'Motor "{motor}" inválido, use um de {MOTORES}')
+        if backend_chefs not in BACKENDS_CHEFS:
+            raise ValueError(f'Backend "{backend_chefs}" inválido, use um de {BACKENDS_CHEFS}')
+        chefs_min = num_chefs if chefs_min is None else chefs_min
+        chefs_max = max(num_chefs, chefs_min) if chefs_max is None else chefs_max
+        if not 1 <= chefs_min <= chefs_max:
+            raise ValueError('Limites de chefs devem satisfazer 1 <= chefs_min <= chefs_max')
+        num_chefs = min(max(num_chefs, chefs_min), chefs_max)
+        for nome in capacidade_estacoes or {}:
+            if nome not in CAPACIDADE_ESTACOES:
+                raise ValueError(f'Estação "{nome}" inválida, use uma de {tuple(CAPACIDADE_ESTACOES)}')
+            if capacidade_estacoes[nome] < 1:
+                raise ValueError(f'Estação "{nome}" precisa de pelo menos 1 chef')
+        for prato, capacidade in (capacidade_fornadas or {}).items():
+            if prato not in CAPACIDADE_FORNADA or capacidade < 1:
+                raise ValueError(f'Capacidade de fornada inválida: {prato}={capacidade}')
+        limites = {'max_fila': max_fila, 'max_espera': max_espera, 'taxa_pedidos': taxa_pedidos,
+                   'rajada_pedidos': rajada_pedidos, 'max_log_por_segundo': max_log_por_segundo}
+        for nome, valor in limites.items():
+            if valor is not None and not valor > 0:
+                raise ValueError(f'{nome} deve ser positivo (ou None, sem limite), recebeu {valor}')
+        
+        # Log assíncrono: o caminho quente só enfileira, uma thread grava em lotes
+        self.log = RegistroEventos(nivel_log, arquivo_log, formato_log, amostragem_log,
+                                   max_por_segundo=max_log_por_segundo, silencioso=silencioso)
+        
         self.host = host
         self.port = port
         self.server_socket = None
         self.executando = False
+        self.parado = False
+        
+        # Configuração da camada de rede
+        self.motor = motor
+        self.backlog = backlog
+        self.max_conexoes = max_conexoes
+        self.conexoes_ativas = 0
+        self.lock_conexoes = threading.Lock()
+        self._loop = None
+        self._parada_async = None
+        self._servidor_async = None
+        
+        # Prazos e buffer de saída por conexão: clientes ociosos ou lentos são despejados
+        self.timeout_ocioso = timeout_ocioso
+        self.timeout_leitura = timeout_leitura
+        self.timeout_escrita = timeout_escrita
+        self.buffer_saida = buffer_saida
+        self.conexoes = set()
+        self.escritor = None
+        # Acorda o laço de accept do motor de threads (parada, fim do reinício)
+        self._despertador = socket.socketpair()
+        
+        # Drenagem e reinício sem indisponibilidade: o socket de escuta pode vir
+        # de um processo anterior, junto com os pedidos em andamento
+        self.drenando = False
+        self.reiniciando = False
+        self.aceitando = True
+        self.submissoes_ativas = 0
+        self.cond_submissoes = threading.Condition()
+        self.argv_reinicio = argv_reinicio
+        self.socket_herdado = None
+        if herdar_socket is not None:
+            self.socket_herdado = socket.socket(fileno=herdar_socket)
+        self.canal_reinicio = None
+        self.leitor_reinicio = None
+        if canal_reinicio is not None:
+            self.canal_reinicio = socket.socket(fileno=canal_reinicio)
+            self.leitor_reinicio = LeitorMensagens(self.canal_reinicio)
+        self.herdados = {}
+        self.sucessor = None
+        self.lock_sucessor = threading.Lock()
         
-        # Estado do restaurante
-        self.pedidos_prontos = {}
-        self.pedidos_em_andamento = {}
+        # Métricas do caminho quente e exportação opcional para o Prometheus
+        self.metricas = RegistroMetricas(self.ACOES)
+        self.porta_metricas = porta_metricas
+        self.servidor_metricas = None
+        
+        # Estado do restaurante: pedidos em andamento e prontos, com locks em faixas por id
+        self.estado = EstadoPedidos(
+            ArmazemProntos(max_prontos, ttl_prontos, arquivo_prontos), faixas_estado
+        )
         self.contador_pedidos = 0
         self.lock = threading.Lock()
-        self.executor = ThreadPoolExecutor(max_workers=num_chefs, thread_name_prefix="Chef")
+        
+        # Em um cluster, cada instância é dona de um shard e o codifica no id: S{shard}P{n}
+        self.shard = shard
+        self.prefixo_ids = f"S{shard}P" if shard is not None else "P"
         
         # Cardápio e tempos de preparo
         self.cardapio = ['pizza', 'hamburguer', 'salada', 'sopa', 'lasanha', 'sanduiche']
@@ -36,48 +208,140 @@ class RestauranteServidor:
             'lasanha': 3.0,
             'sanduiche': 1.0
         }
-    
-    def preparar_prato(self, pedido):
-        """Simula o preparo de diferentes pratos com tempos variados"""
-        tipo_prato = pedido.get('prato')
-        quantidade = pedido.get('quantidade', 1)
+        self.indices_cardapio = {prato: i for i, prato in enumerate(self.cardapio)}
+        self._cache_versao_cardapio = (None, None)
+        self.escala_tempo = escala_tempo
+        self.escalonador = escalonador
         
-        if tipo_prato not in self.tempos_preparo:
-            return {
-                'erro': f'Prato "{tipo_prato}" não está no cardápio',
-                'cardapio': self.cardapio
+        # Estações da cozinha, cada uma com sua fila de prioridade, seus chefs e sua
+        # autoescala (entre mínimo e máximo; com os dois iguais, o tamanho é fixo).
+        # No modo clássico há uma única estação, com chefs genéricos para todos os pratos
+        opcoes_estacao = dict(
+            escalonador=escalonador, envelhecimento=envelhecimento, escala_tempo=escala_tempo,
+            espera_alvo=espera_alvo, intervalo_autoescala=intervalo_autoescala,
+            resfriamento_autoescala=resfriamento_autoescala, ao_mudar=self._registrar_autoescala
+        )
+        if estacoes:
+            capacidades = dict(CAPACIDADE_ESTACOES, **(capacidade_estacoes or {}))
+            self.estacoes = {
+                nome: Estacao(nome, [prato for prato, dona in ESTACOES_PRATOS.items() if dona == nome],
+                              capacidade, **opcoes_estacao)
+                for nome, capacidade in capacidades.items()
             }
+        else:
+            self.estacoes = {
+                ESTACAO_GERAL: Estacao(ESTACAO_GERAL, self.cardapio, num_chefs, minimo=chefs_min,
+                                       maximo=chefs_max, dividir=False, prefixo='Chef', **opcoes_estacao)
+            }
+        self.estacao_do_prato = {
+            self.indices_cardapio[prato]: estacao
+            for estacao in self.estacoes.values() for prato in estacao.pratos
+        }
+        
+        # Backend 'processos': as threads dos chefs só despacham; o preparo roda em outro processo
+        self.backend_chefs = backend_chefs
+        self.pool_processos = None
+        if backend_chefs == 'processos':
+            self.pool_processos = ProcessPoolExecutor(
+                max_workers=sum(estacao.autoescala.maximo for estacao in self.estacoes.values()),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_iniciar_processo_chef
+            )
         
-        # Simula o tempo de preparo
+        # Agrupamento opcional: pedidos do mesmo prato na fila viram uma fornada
+        self.agrupador = None
+        if janela_agrupamento is not None:
+            self.agrupador = AgrupadorPedidos(janela_agrupamento, capacidade_fornadas, fator_fornada)
+        
+        # Previsão de término: tempos de preparo medidos, por prato
+        self.estimador = EstimadorPreparo(razao_inicial=escala_tempo)
+        
+        # Controle de admissão: recusa pedidos com a estação saturada e limita cada conexão
+        self.admissao = ControleAdmissao(self.estacoes, max_fila, max_espera, escala_tempo)
+        self.taxa_pedidos = taxa_pedidos
+        self.rajada_pedidos = rajada_pedidos
+        
+        self.metricas.registrar_medidor('conexoes_ativas', lambda: self.conexoes_ativas)
+        self.metricas.registrar_medidor(
+            'conexoes_ociosas', lambda: sum(conexao.ociosa for conexao in list(self.conexoes))
+        )
+        self.metricas.registrar_medidor(
+            'bytes_saida_pendentes', lambda: sum(conexao.bytes_pendentes for conexao in list(self.conexoes))
+        )
+        self.metricas.registrar_medidor('pedidos_em_andamento', self.estado.total_em_andamento)
+        self.metricas.registrar_medidor(
+            'fila_cozinha', lambda: sum(len(estacao.fila) for estacao in self.estacoes.values())
+        )
+        self.metricas.registrar_medidor('pedidos_prontos_em_memoria', lambda: len(self.estado.prontos))
+        self.metricas.registrar_medidor('chefs', self.total_chefs)
+        self.metricas.registrar_medidor('espera_estimada', lambda: round(self.admissao.espera_estimada(), 3))
+        if estacoes:
+            for estacao in self.estacoes.values():
+                self.metricas.registrar_medidor(f'fila_{estacao.nome}', lambda e=estacao: len(e.fila))
+                self.metricas.registrar_medidor(f'chefs_{estacao.nome}', lambda e=estacao: e.pool.tamanho)
+        
+        # Diário durável: recupera o estado anterior antes de aceitar novos pedidos
+        self.diario = None
+        self.acoes_bloqueantes = set(self.ACOES_BLOQUEANTES)
+        if diretorio_diario:
+            self.diario = DiarioPedidos(diretorio_diario, self._estado_diario,
+                                        snapshot_a_cada=snapshot_a_cada)
+            # No reinício, o estado vem do processo anterior, que ainda está usando o diário
+            if self.canal_reinicio is None:
+                self._recuperar_diario()
+                self.diario.iniciar()
+            # Aceitar um pedido agora espera o fsync do diário
+            self.acoes_bloqueantes |= {'fazer_pedido', 'fazer_pedidos_lote'}
+    
+    def preparar_prato(self, pedido, quantidade):
+        """Simula o preparo de `quantidade` itens do pedido; retorna (duração, chef)"""
+        tipo_prato = self.cardapio[pedido.indice_prato]
         tempo_base = self.tempos_preparo[tipo_prato]
-        tempo_total = tempo_base * quantidade + random.uniform(0.2, 0.8)
-        
-        print(f"👨‍🍳 Chef {threading.current_thread().name} começou a preparar pedido {pedido['id']}")
-        
-        inicio = time.time()
-        time.sleep(tempo_total)  # Simula o preparo
-        fim = time.time()
-        
-        resultado = {
-            'pedido_id': pedido.get('id'),
-            'prato': tipo_prato,
-            'quantidade': quantidade,
-            'tempo_preparo': round(fim - inicio, 2),
-            'chef': threading.current_thread().name,
-            'status': 'pronto',
-            'timestamp': time.strftime('%H:%M:%S')
-        }
         
-        print(f"✅ Pedido {pedido['id']} finalizado pelo {threading.current_thread().name}")
-        return resultado
+        chef = threading.current_thread().name
+        self.log.info('preparo_iniciado', "👨‍🍳 Chef %s começou a preparar pedido %s", chef, pedido.id,
+                      pedido_id=pedido.id, chef=chef, quantidade=quantidade)
+        
+        fornada = ()
+        if self.agrupador is not None:
+            fornada = (self.agrupador.fator, self.agrupador.capacidades[tipo_prato])
+        
+        # No backend de processos, só (tempo_base, quantidade...) cruza a fronteira do processo
+        if self.pool_processos is not None:
+            return self.pool_processos.submit(
+                cozinhar, tempo_base, quantidade, self.escala_tempo, *fornada
+            ).result()
+        return cozinhar(tempo_base, quantidade, self.escala_tempo, *fornada)
     
-    def processar_comando(self, comando):
-        """Processa comandos recebidos do cliente"""
+    def processar_comando(self, comando, conexao=None):
+        """Processa comandos recebidos do cliente, medindo a latência por ação"""
+        inicio = time.perf_counter()
+        try:
+            return self._despachar_comando(comando, conexao)
+        finally:
+            self.metricas.observar_comando(comando.get('acao'), time.perf_counter() - inicio)
+    
+    def _despachar_comando(self, comando, conexao):
+        """Encaminha o comando para o método da ação correspondente"""
         try:
             acao = comando.get('acao')
             
-            if acao == 'fazer_pedido':
-                return self.fazer_pedido(comando.get('prato'), comando.get('quantidade', 1))
+            if acao in ('fazer_pedido', 'fazer_pedidos_lote'):
+                itens = comando.get('itens')
+                pedidos = len(itens) if isinstance(itens, list) else 1
+                recusa = self._limitar_taxa(conexao, pedidos)
+                if recusa is not None:
+                    return recusa
+                # Durante a drenagem, pedidos novos são recusados; consultas continuam
+                if not self._abrir_submissao():
+                    return self._recusa_drenagem(pedidos)
+                try:
+                    return self._despachar_pedidos(acao, comando, conexao)
+                finally:
+                    self._fechar_submissao()
+            
+            if acao == 'verificar_pedidos_lote':
+                return self.verificar_pedidos_lote(comando.get('pedido_ids'))
             
             elif acao == 'verificar_pedido':
                 return self.verificar_pedido(comando.get('pedido_id'))
@@ -86,183 +350,1528 @@ class RestauranteServidor:
                 return self.listar_pedidos_pendentes()
             
             elif acao == 'obter_cardapio':
-                return {'cardapio': self.cardapio}
+                return self.obter_cardapio(comando.get('versao_cardapio'))
+            
+            elif acao == 'negociar':
+                return self.negociar_codec(comando.get('codecs'), conexao, comando.get('versao_cardapio'))
             
             elif acao == 'aguardar_todos':
                 return self.aguardar_todos_pedidos()
             
+            elif acao == 'aguardar_pedido':
+                return self.aguardar_pedido(comando.get('pedido_id'), comando.get('timeout'))
+            
+            elif acao == 'aguardar_meus_pedidos':
+                return self.aguardar_meus_pedidos(conexao, comando.get('timeout'))
+            
+            elif acao == 'estatisticas_prontos':
+                return {'retencao': self.estado.prontos.estatisticas()}
+            
+            elif acao == 'obter_metricas':
+                return {
+                    'metricas': self.metricas.instantaneo(),
+                    'estimativas_preparo': self.estimador.resumo()
+                }
+            
+            elif acao == 'subscrever':
+                return self.subscrever_pedido(comando.get('pedido_id'), conexao)
+            
+            elif acao == 'ajustar_chefs':
+                return self.ajustar_chefs(comando.get('minimo'), comando.get('maximo'), comando.get('estacao'))
+            
+            elif acao == 'drenar':
+                return self.drenar()
+            
+            elif acao == 'reiniciar':
+                return self.reiniciar()
+            
             else:
                 return {'erro': 'Comando não reconhecido'}
                 
         except Exception as e:
             return {'erro': f'Erro ao processar comando: {str(e)}'}
     
-    def fazer_pedido(self, prato, quantidade=1):
-        """Adiciona um novo pedido à fila de processamento"""
+    def _despachar_pedidos(self, acao, comando, conexao):
+        if acao == 'fazer_pedido':
+            resposta = self.fazer_pedido(
+                comando.get('prato'), comando.get('quantidade', 1), comando.get('prazo'), conexao
+            )
+            if resposta.get('sucesso') and comando.get('subscrever'):
+                self.subscrever_pedido(resposta['pedido_id'], conexao)
+            return resposta
+        
+        resposta = self.fazer_pedidos_lote(comando.get('itens'), conexao)
+        if comando.get('subscrever'):
+            for item in resposta.get('pedidos', []):
+                if item.get('sucesso'):
+                    self.subscrever_pedido(item['pedido_id'], conexao)
+        return resposta
+    
+    def _abrir_submissao(self):
+        """Registra um pedido novo em andamento; False se o servidor está drenando"""
+        with self.cond_submissoes:
+            if self.drenando:
+                return False
+            self.submissoes_ativas += 1
+            return True
+    
+    def _fechar_submissao(self):
+        with self.cond_submissoes:
+            self.submissoes_ativas -= 1
+            self.cond_submissoes.notify_all()
+    
+    def _recusa_drenagem(self, pedidos):
+        self.metricas.incrementar('pedidos_rejeitados', pedidos)
+        if self.reiniciando:
+            # O processo novo já aceita conexões no mesmo socket
+            return rejeicao('reiniciando', 'Servidor reiniciando: reconecte para fazer pedidos', 0,
+                            reconectar=True)
+        return rejeicao('drenando', 'Servidor em drenagem: não aceita pedidos novos',
+                        max(self.admissao.espera_estimada(), 1.0))
+    
+    def _limitar_taxa(self, conexao, pedidos):
+        """Rejeição se a conexão passou da sua taxa de pedidos, senão None"""
+        if conexao is None or conexao.limitador is None:
+            return None
+        espera = conexao.limitador.consumir(pedidos)
+        if not espera:
+            return None
+        self.metricas.incrementar('pedidos_rejeitados', pedidos)
+        return rejeicao(
+            'limite_taxa',
+            f'Limite de {self.taxa_pedidos} pedidos/s por conexão excedido',
+            espera
+        )
+    
+    def _novo_limitador(self):
+        if self.taxa_pedidos is None:
+            return None
+        return LimitadorTaxa(self.taxa_pedidos, self.rajada_pedidos)
+    
+    def _reservar_ids(self, quantidade_ids):
+        """Reserva um bloco de ids de pedido com uma única aquisição do lock"""
+        with self.lock:
+            inicio = self.contador_pedidos + 1
+            self.contador_pedidos += quantidade_ids
+        return [f"{self.prefixo_ids}{numero:03d}" for numero in range(inicio, inicio + quantidade_ids)]
+    
+    def _submeter_pedido(self, pedido_id, prato, quantidade, prazo=None, registrar=True, conexao=None):
+        """Cria o pedido e o coloca na fila da cozinha.
+        
+        `prazo` é relativo, em segundos a partir de agora (usado pelo escalonador EDF).
+        A `conexao` que fez o pedido passa a acompanhá-lo antes de ele entrar na
+        fila, então nem um pedido que termina durante o fsync do diário escapa
+        do aguardar_meus_pedidos. Retorna o número de sequência do registro no
+        diário, se houver.
+        """
+        prazo_absoluto = time.monotonic() + prazo if prazo is not None else None
+        pedido = Pedido(pedido_id, self.indices_cardapio[prato], quantidade, prazo=prazo_absoluto)
+        
+        self.log.info('novo_pedido', "🍽️  Novo pedido #%s: %sx %s", pedido_id, quantidade, prato,
+                      pedido_id=pedido_id, prato=prato, quantidade=quantidade)
+        
+        # Divide o pedido entre os chefs da estação do prato (uma parte, fora do modo --estacoes)
+        estacao = self.estacao_do_prato[pedido.indice_prato]
+        partes = estacao.partes(quantidade)
+        future = Future()
+        future.pedido = pedido
+        future.preparo = Preparo(pedido, future, len(partes))
+        self.estado.adicionar(pedido_id, future)
+        if conexao is not None:
+            conexao.acompanhar_pedido(pedido_id, future)
+        
+        # O estado muda antes do registro no diário (ver DiarioPedidos.compactar)
+        seq = None
+        if self.diario is not None and registrar:
+            seq = self.diario.registrar_aceito(pedido)
+        self.metricas.incrementar('pedidos_aceitos')
+        
+        # Enfileira as partes e libera um chef da estação para cada uma
+        grupo = pedido.indice_prato if self.agrupador is not None else None
+        for i, quantidade_parte in enumerate(partes):
+            custo = self.tempos_preparo[prato] * quantidade_parte
+            estacao.fila.inserir(
+                (pedido_id, i), (future.preparo, quantidade_parte), custo, prazo_absoluto, grupo
+            )
+            estacao.pool.submit(self._preparar_parte, estacao)
+        return seq
+    
+    def _preparar_parte(self, estacao):
+        """Executado por um chef livre da estação: prepara a parte mais prioritária da fila.
+        
+        Com o agrupamento, prepara junto, em uma fornada, as partes do mesmo prato que couberem.
+        """
+        entrada = estacao.fila.retirar()
+        if entrada is None:
+            return
+        
+        _, (preparo, quantidade) = entrada
+        pedido = preparo.pedido
+        prato = self.cardapio[pedido.indice_prato]
+        fornada = [(preparo, quantidade)]
+        if self.agrupador is not None:
+            fornada += [item for _, item in self.agrupador.formar(
+                estacao.fila, prato, pedido.indice_prato, quantidade, pedido.criado_em
+            )]
+        # Partes de pedidos cancelados enquanto esperavam ficam fora do preparo
+        fornada = [(preparo, quantidade) for preparo, quantidade in fornada if preparo.iniciar_parte()]
+        if not fornada:
+            return
+        
+        itens = sum(quantidade for _, quantidade in fornada)
+        pedido = fornada[0][0].pedido
+        inicio = time.monotonic()
+        self.metricas.inicio_preparo(prato, *(inicio - preparo.pedido.criado_em for preparo, _ in fornada))
+        if len(fornada) > 1:
+            self.metricas.incrementar('fornadas')
+            self.metricas.incrementar('pedidos_agrupados', len(fornada))
+            if self.log.habilitado('info'):
+                self.log.info('fornada', "🔥 Fornada de %s %s para %s pedidos", itens, prato, len(fornada),
+                              prato=prato, itens=itens, pedidos=[preparo.pedido.id for preparo, _ in fornada])
+        chef, erro = None, None
+        try:
+            duracao, chef = self.preparar_prato(pedido, itens)
+            self.estimador.observar(prato, duracao, self._tempo_tabela(prato, itens))
+        except Exception as e:
+            erro = e
+        
+        concluidos = [preparo for preparo, _ in fornada if preparo.concluir_parte(chef, erro)]
+        self.metricas.fim_preparo(prato, time.monotonic() - inicio, len(concluidos))
+        for preparo in concluidos:
+            self._finalizar_preparo(preparo)
+    
+    def _tempo_tabela(self, prato, itens):
+        """Tempo de preparo de `itens` juntos pela tabela (e pelo modelo de fornadas, se ativo)"""
+        if self.agrupador is None:
+            return self.tempos_preparo[prato] * itens
+        return tempo_fornada(self.tempos_preparo[prato], itens, self.agrupador.fator,
+                             self.agrupador.capacidades[prato])
+    
+    def _previsao(self, future, a_frente):
+        """Segundos até o pedido ficar pronto (típico e pessimista).
+        
+        `a_frente` é (posição, custo à frente) na fila da estação, ou None se o
+        preparo já começou. A espera na fila é o custo à frente dividido entre
+        os chefs da estação; o preparo, o tempo de tabela da maior parte do
+        pedido. Ambos são corrigidos pelas razões medidas pelo estimador.
+        """
+        pedido, preparo = future.pedido, future.preparo
+        prato = self.cardapio[pedido.indice_prato]
+        media, alta = self.estimador.razao(prato)
+        preparo_tabela = self._tempo_tabela(prato, math.ceil(pedido.quantidade / preparo.num_partes))
+        
+        if a_frente is None:
+            decorrido = time.monotonic() - preparo.iniciado_em if preparo.em_preparo else 0.0
+            tipica, pessimista = preparo_tabela * media - decorrido, preparo_tabela * alta - decorrido
+        else:
+            estacao = self.estacao_do_prato[pedido.indice_prato]
+            espera_tabela = a_frente[1] / max(estacao.pool.tamanho, 1)
+            media_fila, alta_fila = self.estimador.razao()
+            tipica = espera_tabela * media_fila + preparo_tabela * media
+            pessimista = espera_tabela * alta_fila + preparo_tabela * alta
+        return {'previsao_s': round(max(tipica, 0.0), 2), 'previsao_p90_s': round(max(pessimista, 0.0), 2)}
+    
+    def _finalizar_preparo(self, preparo):
+        """Junta as partes: o pedido fica pronto quando a última termina"""
+        pedido, future = preparo.pedido, preparo.future
+        if preparo.erro is not None:
+            # O pedido vai para os prontos antes de acordar quem espera o future
+            self.estado.concluir(pedido.id, {'erro': f'Falha no preparo: {str(preparo.erro)}'})
+            future.set_exception(preparo.erro)
+            return
+        
+        chef = ', '.join(preparo.chefs)
+        duracao = time.monotonic() - preparo.iniciado_em
+        resultado = Resultado(pedido.id, pedido.indice_prato, pedido.quantidade, duracao, chef)
+        self.log.info('pedido_finalizado', "✅ Pedido %s finalizado pelo %s", pedido.id, chef,
+                      pedido_id=pedido.id, chef=chef, tempo_preparo=round(duracao, 3))
+        
+        self.estado.concluir(pedido.id, resultado)
+        future.set_result(resultado)
+        if self.diario is not None:
+            self.diario.registrar_pronto(resultado)
+    
+    def _aguardar_diario(self, seq):
+        """Só confirma o pedido ao cliente depois que ele está em disco.
+        
+        Retorna a resposta de erro se o registro não chegou ao disco, ou None.
+        """
+        if self.diario is None or seq is None or self.diario.aguardar_duravel(seq):
+            return None
+        self.metricas.incrementar('falhas_diario')
+        erro = self.diario.erro
+        if erro is not None:
+            self.log.erro('erro_diario', f"❌ Falha ao gravar o diário: {erro}", erro=str(erro))
+        return {'erro': f'Pedido não confirmado: falha ao gravar o diário ({erro or "diário encerrado"})'}
+    
+    def _estado_diario(self):
+        """Estado atual no formato do snapshot do diário"""
+        pendentes, prontos = {}, {}
+        for pedido_id, future in self._em_andamento_na_ordem():
+            pedido = future.pedido
+            pendentes[pedido_id] = (pedido.indice_prato, pedido.quantidade, pedido.prazo_relogio())
+        for pedido_id, resultado in self.estado.prontos.itens():
+            if isinstance(resultado, Resultado):
+                prontos[pedido_id] = self._dados_resultado(resultado)
+        
+        with self.lock:
+            contador = self.contador_pedidos
+        return {'contador': contador, 'pendentes': pendentes, 'prontos': prontos}
+    
+    def _em_andamento_na_ordem(self):
+        """Pedidos em andamento na ordem em que a cozinha os prepararia.
+        
+        Os que já começaram vêm primeiro; os da fila seguem a chave do
+        escalonador, para que um sucessor os reenfileire na mesma ordem.
+        """
+        itens = []
+        for pedido_id, future in self.estado.itens_em_andamento():
+            estacao = self.estacao_do_prato[future.pedido.indice_prato]
+            chave = estacao.fila.chave((pedido_id, 0))
+            ordem = (0, future.pedido.criado_em) if chave is None else (1, chave)
+            itens.append((ordem, pedido_id, future))
+        itens.sort(key=lambda item: item[0])
+        return [(pedido_id, future) for _, pedido_id, future in itens]
+    
+    @staticmethod
+    def _prazo_restante(prazo_relogio):
+        """Converte o prazo em horário de parede de volta para segundos a partir de agora"""
+        return prazo_relogio - time.time() if prazo_relogio is not None else None
+    
+    @staticmethod
+    def _dados_resultado(resultado):
+        return (resultado.indice_prato, resultado.quantidade,
+                round(resultado.tempo_preparo, 3), resultado.chef)
+    
+    def _recuperar_diario(self):
+        """Restaura contador e pedidos do diário, reenfileirando os não finalizados"""
+        estado = self.diario.recuperar()
+        self.contador_pedidos = estado['contador']
+        
+        for pedido_id, (indice, quantidade, tempo_preparo, chef) in estado['prontos'].items():
+            self.estado.restaurar_pronto(pedido_id, Resultado(pedido_id, indice, quantidade, tempo_preparo, chef))
+        
+        for pedido_id, (indice, quantidade, prazo) in estado['pendentes'].items():
+            self._submeter_pedido(pedido_id, self.cardapio[indice], quantidade,
+                                  self._prazo_restante(prazo), registrar=False)
+        
+        if estado['contador']:
+            self.log.info('diario_recuperado',
+                          f"💾 Diário recuperado: {len(estado['prontos'])} prontos, "
+                          f"{len(estado['pendentes'])} reenfileirados, contador em {estado['contador']}",
+                          prontos=len(estado['prontos']), pendentes=len(estado['pendentes']),
+                          contador=estado['contador'])
+    
+    @staticmethod
+    def _erro_pedido(quantidade, prazo):
+        """Mensagem de erro se a quantidade ou o prazo do pedido são inválidos, senão None"""
+        if isinstance(quantidade, bool) or not isinstance(quantidade, int) or quantidade < 1:
+            return 'quantidade deve ser um número inteiro >= 1'
+        if prazo is not None and (isinstance(prazo, bool) or not isinstance(prazo, (int, float))
+                                  or not math.isfinite(prazo) or prazo < 0):
+            return 'prazo deve ser um número de segundos >= 0'
+        return None
+    
+    def fazer_pedido(self, prato, quantidade=1, prazo=None, conexao=None):
+        """Adiciona um novo pedido à fila de processamento (acompanhado pela `conexao`, se dada)"""
         if prato not in self.cardapio:
             return {
                 'erro': f'Prato "{prato}" não está no cardápio',
                 'cardapio': self.cardapio
             }
+        erro = self._erro_pedido(quantidade, prazo)
+        if erro is not None:
+            return {'erro': erro}
         
-        with self.lock:
-            self.contador_pedidos += 1
-            pedido_id = f"P{self.contador_pedidos:03d}"
-        
-        pedido = {
-            'id': pedido_id,
-            'prato': prato,
-            'quantidade': quantidade,
-            'timestamp_pedido': time.strftime('%H:%M:%S')
-        }
-        
-        print(f"🍽️  Novo pedido #{pedido_id}: {quantidade}x {prato}")
+        estacao = self.estacao_do_prato[self.indices_cardapio[prato]]
+        recusa = self.admissao.avaliar(estacao, self.tempos_preparo[prato] * quantidade)
+        if recusa is not None:
+            self.metricas.incrementar('pedidos_rejeitados')
+            return recusa
         
-        # Submete o pedido para processamento assíncrono
-        future = self.executor.submit(self.preparar_prato, pedido)
-        self.pedidos_em_andamento[pedido_id] = future
+        pedido_id = self._reservar_ids(1)[0]
+        falha = self._aguardar_diario(
+            self._submeter_pedido(pedido_id, prato, quantidade, prazo, conexao=conexao)
+        )
+        if falha is not None:
+            return dict(falha, pedido_id=pedido_id)
         
-        return {
+        resposta = {
             'sucesso': True,
             'pedido_id': pedido_id,
             'mensagem': f'Pedido {pedido_id} adicionado à fila'
         }
+        future = self.estado.em_andamento_de(pedido_id)
+        if future is not None and not future.done():
+            resposta.update(self._previsao(future, estacao.fila.a_frente((pedido_id, 0))))
+        return resposta
+    
+    def fazer_pedidos_lote(self, itens, conexao=None):
+        """Adiciona vários pedidos de uma vez; itens inválidos recebem um erro próprio"""
+        if not isinstance(itens, list) or not itens:
+            return {'erro': 'Informe uma lista de itens com prato e quantidade'}
+        
+        # Admissão item a item, contando os itens anteriores do lote como já na fila
+        recusas = {}
+        validos = set()
+        admitidos = {}
+        for i, item in enumerate(itens):
+            if not isinstance(item, dict) or item.get('prato') not in self.cardapio:
+                prato = item.get('prato') if isinstance(item, dict) else item
+                recusas[i] = {'erro': f'Prato "{prato}" não está no cardápio'}
+                continue
+            erro = self._erro_pedido(item.get('quantidade', 1), item.get('prazo'))
+            if erro is not None:
+                recusas[i] = {'erro': erro}
+                continue
+            estacao = self.estacao_do_prato[self.indices_cardapio[item['prato']]]
+            custo = self.tempos_preparo[item['prato']] * item.get('quantidade', 1)
+            pedidos_lote, trabalho_lote = admitidos.get(estacao.nome, (0, 0.0))
+            recusa = self.admissao.avaliar(estacao, custo, pedidos_lote, trabalho_lote)
+            if recusa is not None:
+                recusas[i] = recusa
+                continue
+            validos.add(i)
+            admitidos[estacao.nome] = (pedidos_lote + 1, trabalho_lote + custo)
+        rejeitados = sum(recusa.get('status') == 'rejeitado' for recusa in recusas.values())
+        if rejeitados:
+            self.metricas.incrementar('pedidos_rejeitados', rejeitados)
+        ids = iter(self._reservar_ids(len(validos)))
+        
+        resultados = []
+        ultimo_seq = None
+        for i, item in enumerate(itens):
+            if i in recusas:
+                resultados.append(recusas[i])
+                continue
+            
+            pedido_id = next(ids)
+            ultimo_seq = self._submeter_pedido(
+                pedido_id, item['prato'], item.get('quantidade', 1), item.get('prazo'), conexao=conexao
+            )
+            resultados.append({'sucesso': True, 'pedido_id': pedido_id})
+        
+        # Um único fsync cobre o lote inteiro
+        falha = self._aguardar_diario(ultimo_seq)
+        if falha is not None:
+            return dict(falha, pedidos=resultados)
+        
+        return {
+            'sucesso': bool(validos),
+            'pedidos': resultados,
+            'total': len(validos),
+            'mensagem': f'{len(validos)} de {len(itens)} pedidos adicionados à fila'
+        }
     
     def verificar_pedido(self, pedido_id):
         """Verifica o status de um pedido específico"""
-        if pedido_id in self.pedidos_prontos:
-            return self.pedidos_prontos[pedido_id]
-        elif pedido_id in self.pedidos_em_andamento:
-            future = self.pedidos_em_andamento[pedido_id]
+        future = self.estado.em_andamento_de(pedido_id)
+        if future is not None:
             if future.done():
-                resultado = future.result()
-                self.pedidos_prontos[pedido_id] = resultado
-                del self.pedidos_em_andamento[pedido_id]
-                return resultado
+                return self._para_resposta(self._resultado_future(future))
             else:
-                return {'status': 'preparando', 'pedido_id': pedido_id}
+                resposta = {'status': 'preparando', 'pedido_id': pedido_id}
+                a_frente = None
+                if not future.preparo.em_preparo:
+                    # Antes de qualquer parte começar, vale a posição da primeira
+                    estacao = self.estacao_do_prato[future.pedido.indice_prato]
+                    a_frente = estacao.fila.a_frente((pedido_id, 0))
+                if a_frente is not None:
+                    resposta.update({'etapa': 'na_fila', 'posicao_fila': a_frente[0]})
+                else:
+                    resposta['etapa'] = 'em_preparo'
+                resposta.update(self._previsao(future, a_frente))
+                return resposta
+        
+        # Pedidos concluídos ficam no armazém de retenção (memória ou arquivo)
+        resultado = self.estado.pronto(pedido_id)
+        if resultado is not None:
+            return self._para_resposta(resultado)
+        return {'erro': 'Pedido não encontrado'}
+    
+    def subscrever_pedido(self, pedido_id, conexao):
+        """Envia um evento 'pedido_pronto' pela conexão quando o pedido terminar"""
+        if conexao is None:
+            return {'erro': 'Notificações exigem uma conexão ativa'}
+        
+        future = self.estado.em_andamento_de(pedido_id)
+        if future is not None:
+            future.add_done_callback(
+                lambda f: conexao.enviar(self._evento_pedido_pronto(pedido_id, self._resultado_future(f)))
+            )
         else:
-            return {'erro': 'Pedido não encontrado'}
+            resultado = self.estado.pronto(pedido_id)
+            if resultado is None:
+                return {'erro': 'Pedido não encontrado'}
+            conexao.enviar(self._evento_pedido_pronto(pedido_id, resultado))
+        
+        return {
+            'sucesso': True,
+            'pedido_id': pedido_id,
+            'mensagem': f'Você será notificado quando o pedido {pedido_id} ficar pronto'
+        }
+    
+    @staticmethod
+    def _resultado_future(future):
+        """Resultado de um pedido concluído, mesmo se o preparo falhou"""
+        if future.cancelled():
+            return dict(PEDIDO_TRANSFERIDO, pedido_id=future.pedido.id)
+        try:
+            return future.result()
+        except Exception as e:
+            return {'erro': f'Falha no preparo: {str(e)}'}
+    
+    def _para_resposta(self, resultado):
+        """Converte um Resultado no dicionário enviado ao cliente"""
+        if isinstance(resultado, Resultado):
+            return resultado.para_dict(self.cardapio)
+        return resultado
+    
+    def _evento_pedido_pronto(self, pedido_id, resultado):
+        return {'evento': 'pedido_pronto', 'pedido_id': pedido_id, 'resultado': self._para_resposta(resultado)}
+    
+    def verificar_pedidos_lote(self, pedido_ids):
+        """Verifica o status de vários pedidos em uma única resposta"""
+        if not isinstance(pedido_ids, list):
+            return {'erro': 'Informe uma lista de ids de pedido'}
+        
+        return {'pedidos': [self.verificar_pedido(pedido_id) for pedido_id in pedido_ids]}
     
     def listar_pedidos_pendentes(self):
-        """Lista todos os pedidos em andamento"""
+        """Lista todos os pedidos em andamento (fotografia consistente)"""
+        pendentes = self.estado.pendentes()
         return {
-            'pedidos_pendentes': list(self.pedidos_em_andamento.keys()),
-            'total': len(self.pedidos_em_andamento)
+            'pedidos_pendentes': pendentes,
+            'total': len(pendentes)
         }
     
-    def aguardar_todos_pedidos(self):
-        """Aguarda todos os pedidos serem finalizados"""
-        total_pedidos = len(self.pedidos_em_andamento)
+    @staticmethod
+    def _timeout_espera(timeout):
+        """Valida o timeout enviado pelo cliente: None (sem limite) ou segundos >= 0"""
+        if timeout is None:
+            return None
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout < 0:
+            raise ValueError('timeout deve ser um número de segundos >= 0')
+        return timeout
+    
+    def aguardar_pedido(self, pedido_id, timeout=None):
+        """Long-poll de um pedido: responde quando ele ficar pronto ou o timeout vencer"""
+        timeout = self._timeout_espera(timeout)
+        future = self.estado.em_andamento_de(pedido_id)
+        if future is not None:
+            # Espera só este future, sem segurar nenhum lock do servidor
+            wait([future], timeout)
+        return self._resposta_aguardar_pedido(pedido_id)
+    
+    def _resposta_aguardar_pedido(self, pedido_id):
+        resposta = self.verificar_pedido(pedido_id)
+        if resposta.get('status') == 'preparando':
+            resposta['timeout'] = True
+        return resposta
+    
+    def aguardar_meus_pedidos(self, conexao, timeout=None):
+        """Aguarda os pedidos feitos por esta conexão, até o timeout.
         
-        for pedido_id, future in list(self.pedidos_em_andamento.items()):
-            if not future.done():
-                resultado = future.result()  # Bloqueia até completar
-                self.pedidos_prontos[pedido_id] = resultado
+        Devolve os que ficaram prontos desde a última chamada (que deixam de
+        ser acompanhados pela conexão) e os ids ainda em preparo, com
+        'timeout': True se sobrou algum.
+        """
+        if conexao is None:
+            return {'erro': 'aguardar_meus_pedidos exige uma conexão ativa'}
+        timeout = self._timeout_espera(timeout)
         
-        self.pedidos_em_andamento.clear()
+        meus = dict(conexao.pedidos)
+        wait(meus.values(), timeout)
+        return self._resposta_meus_pedidos(conexao, meus)
+    
+    def _resposta_meus_pedidos(self, conexao, meus):
+        for pedido_id, future in meus.items():
+            if future.done():
+                # O callback do future pode ainda não ter rodado quando a espera termina
+                conexao.pedido_concluido(pedido_id)
+        prontos = [self.verificar_pedido(pedido_id) for pedido_id in conexao.retirar_concluidos()]
+        pendentes = list(conexao.pedidos)
         
+        return {
+            'sucesso': True,
+            'prontos': prontos,
+            'pendentes': pendentes,
+            'timeout': bool(pendentes),
+            'mensagem': f'{len(prontos)} de {len(prontos) + len(pendentes)} pedidos finalizados'
+        }
+    
+    def aguardar_todos_pedidos(self):
+        """Aguarda todos os pedidos do restaurante serem finalizados"""
+        em_andamento = self.estado.itens_em_andamento()
+        total_pedidos = len(em_andamento)
+        
+        # Os chefs movem cada pedido para os prontos ao terminar
+        wait([future for _, future in em_andamento])
+        return self._resposta_aguardar_todos(total_pedidos)
+    
+    @staticmethod
+    def _resposta_aguardar_todos(total_pedidos):
         return {
             'sucesso': True,
             'mensagem': f'Todos os {total_pedidos} pedidos foram finalizados'
         }
     
+    # Versões das esperas para o motor asyncio: aguardam os futures no próprio
+    # event loop, sem prender uma thread do executor durante o long-poll
+    
+    async def processar_espera_async(self, comando, conexao=None):
+        """processar_comando das ações de ACOES_BLOQUEANTES no motor asyncio"""
+        inicio = time.perf_counter()
+        acao = comando.get('acao')
+        try:
+            if acao == 'aguardar_todos':
+                return await self.aguardar_todos_pedidos_async()
+            elif acao == 'aguardar_pedido':
+                return await self.aguardar_pedido_async(comando.get('pedido_id'), comando.get('timeout'))
+            return await self.aguardar_meus_pedidos_async(conexao, comando.get('timeout'))
+        except Exception as e:
+            return {'erro': f'Erro ao processar comando: {str(e)}'}
+        finally:
+            self.metricas.observar_comando(acao, time.perf_counter() - inicio)
+    
+    @staticmethod
+    async def _esperar_async(futures, timeout=None):
+        """Espera futures dos chefs no event loop até o timeout.
+        
+        Usa asyncio.wait, que não cancela o que ainda está pendente quando o
+        tempo acaba: com wait_for, o cancelamento chegaria ao pedido.
+        """
+        aguardados = [asyncio.wrap_future(future) for future in futures]
+        if aguardados:
+            await asyncio.wait(aguardados, timeout=timeout)
+    
+    async def aguardar_pedido_async(self, pedido_id, timeout=None):
+        timeout = self._timeout_espera(timeout)
+        future = self.estado.em_andamento_de(pedido_id)
+        if future is not None:
+            await self._esperar_async([future], timeout)
+        return self._resposta_aguardar_pedido(pedido_id)
+    
+    async def aguardar_meus_pedidos_async(self, conexao, timeout=None):
+        if conexao is None:
+            return {'erro': 'aguardar_meus_pedidos exige uma conexão ativa'}
+        timeout = self._timeout_espera(timeout)
+        
+        meus = dict(conexao.pedidos)
+        await self._esperar_async(meus.values(), timeout)
+        return self._resposta_meus_pedidos(conexao, meus)
+    
+    async def aguardar_todos_pedidos_async(self):
+        em_andamento = self.estado.itens_em_andamento()
+        await self._esperar_async([future for _, future in em_andamento])
+        return self._resposta_aguardar_todos(len(em_andamento))
+    
+    def total_chefs(self):
+        return sum(estacao.pool.tamanho for estacao in self.estacoes.values())
+    
+    def ajustar_chefs(self, minimo=None, maximo=None, estacao=None):
+        """Ação administrativa: muda os limites da autoescala de uma estação.
+        
+        Sem limites, só consulta. Com uma única estação, `estacao` é opcional.
+        """
+        for valor in (minimo, maximo):
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, int)):
+                return {'erro': 'minimo e maximo devem ser números inteiros de chefs'}
+        if estacao is None and len(self.estacoes) == 1:
+            estacao = ESTACAO_GERAL
+        if estacao is not None and estacao not in self.estacoes:
+            return {'erro': f'Estação "{estacao}" não existe, use uma de {tuple(self.estacoes)}'}
+        
+        if minimo is not None or maximo is not None:
+            if estacao is None:
+                return {'erro': f'Informe a estação: {", ".join(self.estacoes)}'}
+            autoescala = self.estacoes[estacao].autoescala
+            if self.pool_processos is not None and maximo is not None:
+                outras = sum(e.autoescala.maximo for nome, e in self.estacoes.items() if nome != estacao)
+                if outras + maximo > self.pool_processos._max_workers:
+                    return {'erro': f'O backend de processos comporta no máximo '
+                                    f'{self.pool_processos._max_workers} chefs no total'}
+            try:
+                autoescala.ajustar_limites(minimo, maximo)
+            except ValueError as e:
+                return {'erro': str(e)}
+        
+        estacoes = {
+            nome: {'chefs': e.pool.tamanho, 'minimo': e.autoescala.minimo, 'maximo': e.autoescala.maximo}
+            for nome, e in self.estacoes.items()
+        }
+        resposta = {
+            'sucesso': True,
+            'chefs': self.total_chefs(),
+            'estacoes': estacoes,
+            'mensagem': ', '.join(
+                f"{nome}: {dados['chefs']} chefs (entre {dados['minimo']} e {dados['maximo']})"
+                for nome, dados in estacoes.items()
+            )
+        }
+        if estacao is not None:
+            resposta.update(estacoes[estacao])
+        return resposta
+    
+    def _registrar_autoescala(self, estacao, anterior, tamanho, motivo, observacoes):
+        self.metricas.incrementar('autoescala_mudancas')
+        self.log.info('autoescala', f"👨‍🍳 Chefs ({estacao.nome}): {anterior} -> {tamanho} ({motivo})",
+                      estacao=estacao.nome, anterior=anterior, chefs=tamanho, motivo=motivo, **observacoes)
+    
+    def drenar(self):
+        """Modo de drenagem: recusa pedidos novos e continua respondendo às consultas"""
+        with self.cond_submissoes:
+            self.drenando = True
+        pendentes = self.estado.total_em_andamento()
+        self.log.info('drenagem', f"🚰 Drenagem iniciada: {pendentes} pedidos em andamento", pendentes=pendentes)
+        return {
+            'sucesso': True,
+            'pedidos_em_andamento': pendentes,
+            'mensagem': f'Servidor em drenagem: {pendentes} pedidos em andamento'
+        }
+    
+    def encerrar(self):
+        """Encerramento gracioso (SIGTERM): drena, espera os pedidos em andamento e para.
+        
+        Até o fim da espera, o servidor continua aceitando conexões e respondendo consultas.
+        """
+        self.drenar()
+        self.aguardar_todos_pedidos()
+        self._parar_motor()
+    
+    def _parar_motor(self):
+        """Encerra o laço de conexões do motor"""
+        self.executando = False
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._parada_async.set)
+        else:
+            self._despertar()
+    
+    def _parar_de_aceitar(self):
+        """Deixa de aceitar conexões novas, mantendo as que já existem"""
+        self.aceitando = False
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._servidor_async.close)
+        else:
+            self._despertar()
+    
+    def _despertar(self):
+        try:
+            self._despertador[1].send(b'\0')
+        except OSError:
+            pass
+    
+    def reiniciar(self):
+        """Reinício sem indisponibilidade (SIGHUP ou ação 'reiniciar').
+        
+        Um processo novo, com os mesmos argumentos, herda o socket de escuta
+        (o mesmo descritor e a mesma fila de conexões, então nenhuma conexão é
+        recusada) e os pedidos: os que ainda estão na fila passam a ser
+        preparados por ele, e os já em preparo terminam aqui e têm o
+        resultado repassado. Este processo deixa de aceitar conexões, atende as
+        que já tem até os seus pedidos terminarem e então para.
+        """
+        with self.lock_conexoes:
+            if self.argv_reinicio is None or not hasattr(signal, 'SIGHUP'):
+                erro = 'Reinício disponível só para o servidor iniciado pela linha de comando, em POSIX'
+            elif self.reiniciando or self.parado or not self.executando:
+                erro = 'Servidor já está reiniciando ou parando'
+            else:
+                erro = None
+                self.reiniciando = True
+        if erro is not None:
+            self.log.erro('erro_reinicio', f"❌ {erro}", erro=erro)
+            return {'erro': erro}
+        
+        threading.Thread(target=self._reiniciar, name="Reinicio", daemon=True).start()
+        return {'sucesso': True, 'mensagem': 'Reinício iniciado: um novo processo vai assumir o servidor'}
+    
+    def _reiniciar(self):
+        canal, canal_sucessor = socket.socketpair()
+        escuta = self.server_socket.fileno()
+        comando = [
+            sys.executable, os.path.abspath(__file__), *self.argv_reinicio,
+            '--herdar-socket', str(escuta), '--canal-reinicio', str(canal_sucessor.fileno())
+        ]
+        self.log.info('reinicio', "🔄 Reiniciando: iniciando o novo processo do servidor")
+        try:
+            processo = subprocess.Popen(comando, pass_fds=(escuta, canal_sucessor.fileno()))
+        except OSError as e:
+            self.log.erro('erro_reinicio', f"❌ Falha ao iniciar o novo processo: {e}", erro=str(e))
+            self.reiniciando = False
+            canal.close()
+            return
+        finally:
+            canal_sucessor.close()
+        
+        # O sucessor avisa quando está pronto para receber o estado; até lá, nada muda aqui
+        canal.settimeout(TIMEOUT_REINICIO)
+        leitor = LeitorMensagens(canal)
+        try:
+            pronto = leitor.ler_mensagem()
+        except (OSError, ErroProtocolo):
+            pronto = None
+        if pronto != {'etapa': 'pronto'}:
+            self.log.erro('erro_reinicio', "❌ O novo processo não respondeu; reinício cancelado")
+            processo.kill()
+            canal.close()
+            self.reiniciando = False
+            return
+        
+        # A partir daqui, nenhum pedido novo entra: espera os que já estão sendo aceitos
+        with self.cond_submissoes:
+            self.drenando = True
+            self.cond_submissoes.wait_for(lambda: self.submissoes_ativas == 0)
+        if self.diario is not None:
+            # O sucessor continua o mesmo diário
+            self.diario.fechar()
+            self.diario = None
+        
+        self.sucessor = canal
+        estado, em_preparo = self._transferir_pedidos()
+        try:
+            enviar_mensagem(canal, estado)
+            leitor.ler_mensagem()
+        except (OSError, ErroProtocolo) as e:
+            self.log.erro('erro_reinicio', f"❌ Falha ao transferir o estado: {e}", erro=str(e))
+        # Só depois do estado: o sucessor lê os resultados repassados na ordem em que chegam
+        for pedido_id, future in em_preparo:
+            future.add_done_callback(lambda f, pedido_id=pedido_id: self._repassar_resultado(pedido_id, f))
+        
+        # As conexões novas ficam com o sucessor, que aceita da mesma fila
+        self._parar_de_aceitar()
+        self.log.info('reinicio',
+                      f"🔄 Processo {processo.pid} assumiu o servidor: {len(estado['pendentes'])} pedidos "
+                      f"transferidos, {len(estado['em_preparo'])} terminando aqui",
+                      sucessor=processo.pid, transferidos=len(estado['pendentes']),
+                      em_preparo=len(estado['em_preparo']))
+        self.aguardar_todos_pedidos()
+        
+        # Conexões curtas aceitas antes da troca terminam aqui; as persistentes reconectam
+        limite = time.monotonic() + ESPERA_CONEXOES_REINICIO
+        while self.conexoes_ativas and time.monotonic() < limite:
+            time.sleep(0.05)
+        self._parar_motor()
+    
+    def _transferir_pedidos(self):
+        """Estado enviado ao sucessor no reinício e os futures que terminam aqui.
+        
+        Os pedidos na fila são cancelados aqui e vão em `pendentes`, na ordem
+        da fila e com o prazo em horário de parede; os que já começaram vão em
+        `em_preparo` e terão o resultado repassado.
+        """
+        pendentes, em_preparo, futures = [], [], []
+        for pedido_id, future in self._em_andamento_na_ordem():
+            dados = [pedido_id, future.pedido.indice_prato, future.pedido.quantidade]
+            if future.cancel():
+                self.estado.concluir(pedido_id, dict(PEDIDO_TRANSFERIDO, pedido_id=pedido_id))
+                pendentes.append(dados + [future.pedido.prazo_relogio()])
+            else:
+                em_preparo.append(dados)
+                futures.append((pedido_id, future))
+        
+        estado = self._estado_diario()
+        return {
+            'contador': estado['contador'],
+            'pendentes': pendentes,
+            'em_preparo': em_preparo,
+            'prontos': [[pedido_id, *dados] for pedido_id, dados in estado['prontos'].items()],
+        }, futures
+    
+    def _repassar_resultado(self, pedido_id, future):
+        """Envia ao sucessor o resultado de um pedido que terminou neste processo"""
+        resultado = self._resultado_future(future)
+        if isinstance(resultado, Resultado):
+            mensagem = {'pronto': [pedido_id, *self._dados_resultado(resultado)]}
+        else:
+            mensagem = {'falhou': [pedido_id, resultado.get('erro')]}
+        with self.lock_sucessor:
+            try:
+                enviar_mensagem(self.sucessor, mensagem)
+            except OSError as e:
+                self.log.erro('erro_reinicio', f"❌ Falha ao repassar o pedido {pedido_id}: {e}",
+                              pedido_id=pedido_id, erro=str(e))
+    
+    def _receber_heranca(self):
+        """No processo novo de um reinício: recebe o estado antes de aceitar conexões"""
+        enviar_mensagem(self.canal_reinicio, {'etapa': 'pronto'})
+        estado = self.leitor_reinicio.ler_mensagem()
+        if estado is None:
+            raise ConnectionError('O processo anterior encerrou o canal de reinício')
+        
+        self.contador_pedidos = estado['contador']
+        for pedido_id, indice, quantidade, tempo_preparo, chef in estado['prontos']:
+            self.estado.restaurar_pronto(pedido_id, Resultado(pedido_id, indice, quantidade, tempo_preparo, chef))
+        for pedido_id, indice, quantidade, prazo in estado['pendentes']:
+            self._submeter_pedido(pedido_id, self.cardapio[indice], quantidade,
+                                  self._prazo_restante(prazo), registrar=False)
+        
+        # Pedidos em preparo no processo anterior: só aguardam o resultado repassado
+        for pedido_id, indice, quantidade in estado['em_preparo']:
+            future = Future()
+            future.pedido = Pedido(pedido_id, indice, quantidade)
+            future.preparo = Preparo(future.pedido, future, 1)
+            future.preparo.iniciar_parte()
+            self.estado.adicionar(pedido_id, future)
+            self.herdados[pedido_id] = future
+        
+        if self.diario is not None:
+            self.diario.iniciar()
+        self.log.info('reinicio',
+                      f"🔄 Estado herdado: {len(estado['prontos'])} prontos, {len(estado['pendentes'])} "
+                      f"na fila, {len(estado['em_preparo'])} em preparo no processo anterior",
+                      prontos=len(estado['prontos']), pendentes=len(estado['pendentes']),
+                      em_preparo=len(estado['em_preparo']))
+    
+    def _confirmar_heranca(self):
+        """Avisa o processo anterior que este já aceita conexões"""
+        if self.canal_reinicio is None:
+            return
+        enviar_mensagem(self.canal_reinicio, {'etapa': 'aceitando'})
+        threading.Thread(target=self._receber_repassados, name="Antecessor", daemon=True).start()
+    
+    def _receber_repassados(self):
+        """Conclui os pedidos herdados conforme o processo anterior termina de prepará-los"""
+        try:
+            while True:
+                mensagem = self.leitor_reinicio.ler_mensagem()
+                if mensagem is None:
+                    break
+                if 'pronto' in mensagem:
+                    pedido_id, indice, quantidade, tempo_preparo, chef = mensagem['pronto']
+                    future = self.herdados.pop(pedido_id, None)
+                    if future is None:
+                        continue
+                    resultado = Resultado(pedido_id, indice, quantidade, tempo_preparo, chef)
+                    self.estado.concluir(pedido_id, resultado)
+                    future.set_result(resultado)
+                    if self.diario is not None:
+                        self.diario.registrar_pronto(resultado)
+                elif 'falhou' in mensagem:
+                    pedido_id, erro = mensagem['falhou']
+                    future = self.herdados.pop(pedido_id, None)
+                    if future is None:
+                        continue
+                    self.estado.concluir(pedido_id, {'erro': erro})
+                    future.set_exception(RuntimeError(erro))
+        except (OSError, ErroProtocolo):
+            pass
+        finally:
+            self.canal_reinicio.close()
+        
+        # O processo anterior terminou (ou caiu) sem repassar estes: a cozinha daqui os prepara
+        for pedido_id, herdado in list(self.herdados.items()):
+            del self.herdados[pedido_id]
+            self._submeter_pedido(pedido_id, self.cardapio[herdado.pedido.indice_prato],
+                                  herdado.pedido.quantidade, registrar=False)
+            novo = self.estado.em_andamento_de(pedido_id)
+            novo.add_done_callback(lambda f, herdado=herdado: self._copiar_resultado(f, herdado))
+    
+    @staticmethod
+    def _copiar_resultado(origem, destino):
+        erro = origem.exception()
+        if erro is not None:
+            destino.set_exception(erro)
+        else:
+            destino.set_result(origem.result())
+    
+    def _versao_cardapio(self):
+        """ETag do cardápio: muda sempre que a lista de pratos muda"""
+        chave = tuple(self.cardapio)
+        if self._cache_versao_cardapio[0] != chave:
+            versao = hashlib.sha1(json.dumps(chave).encode('utf-8')).hexdigest()[:12]
+            self._cache_versao_cardapio = (chave, versao)
+        return self._cache_versao_cardapio[1]
+    
+    def obter_cardapio(self, versao_conhecida=None):
+        """Cardápio e sua versão; se o cliente já tem a versão atual, só a confirma"""
+        versao = self._versao_cardapio()
+        resposta = {'versao_cardapio': versao, 'shard': self.shard}
+        if versao_conhecida == versao:
+            resposta['nao_modificado'] = True
+        else:
+            resposta['cardapio'] = self.cardapio
+        return resposta
+    
+    def negociar_codec(self, codecs, conexao, versao_conhecida=None):
+        """Aperto de mão: escolhe o primeiro codec da lista do cliente que o servidor conhece.
+        
+        A resposta ainda vai no codec atual; a conexão troca de codec logo depois.
+        """
+        if conexao is None:
+            return {'erro': 'Negociação exige uma conexão ativa'}
+        if not isinstance(codecs, list):
+            return {'erro': 'Informe a lista de codecs aceitos, em ordem de preferência'}
+        if conexao.codec is not CODEC_JSON:
+            return {'erro': f'Codec já negociado: {conexao.codec.nome}'}
+        
+        escolhido = next((nome for nome in codecs if nome in CODECS), 'json')
+        conexao.codec_negociado = criar_codec(escolhido, self.cardapio)
+        return dict(self.obter_cardapio(versao_conhecida), sucesso=True, codec=escolhido)
+    
+    def _interpretar_quadro(self, payload, client_address, codec=CODEC_JSON):
+        """Decodifica um quadro recebido; retorna (comando, resposta de erro)"""
+        try:
+            comando = decodificar_payload(payload, codec)
+            if not isinstance(comando, dict):
+                raise ValueError('comando deve ser um objeto JSON')
+        except (ValueError, UnicodeDecodeError, ErroProtocolo):
+            return None, {'erro': 'Formato JSON inválido' if codec is CODEC_JSON else 'Mensagem binária inválida'}
+        
+        acao = comando.get('acao')
+        self.log.info('comando_recebido', "📨 Comando recebido de %s: %s", client_address,
+                      acao if acao is not None else 'desconhecido', cliente=client_address, acao=acao)
+        return comando, None
+    
+    @staticmethod
+    def _marcar_resposta(resposta, comando):
+        """Copia o id de correlação do comando para a resposta"""
+        if comando is not None and CAMPO_CORRELACAO in comando:
+            return dict(resposta, **{CAMPO_CORRELACAO: comando[CAMPO_CORRELACAO]})
+        return resposta
+    
+    def _reservar_conexao(self):
+        """Conta uma nova conexão; retorna False se o limite foi atingido"""
+        with self.lock_conexoes:
+            if self.max_conexoes is not None and self.conexoes_ativas >= self.max_conexoes:
+                return False
+            self.conexoes_ativas += 1
+        self.metricas.incrementar('conexoes_aceitas')
+        return True
+    
+    def _liberar_conexao(self, conexao):
+        with self.lock_conexoes:
+            self.conexoes_ativas -= 1
+            self.conexoes.discard(conexao)
+    
+    def _acompanhar_conexao(self, conexao):
+        conexao.limitador = self._novo_limitador()
+        with self.lock_conexoes:
+            self.conexoes.add(conexao)
+    
+    def _registrar_despejo(self, conexao, motivo):
+        self.metricas.incrementar('conexoes_despejadas')
+        self.metricas.incrementar(f'conexoes_despejadas_{motivo}')
+        self.log.aviso('despejo', f"🚪 Cliente {conexao.endereco} desconectado ({motivo})",
+                       cliente=conexao.endereco, motivo=motivo)
+    
+    def _pode_expirar(self, conexao, motivo):
+        """Diz aos leitores se o prazo de leitura da conexão pode vencer agora"""
+        # Com respostas por enviar, quem decide é o prazo de escrita ou o
+        # limite do buffer: o cliente que não lê também para de enviar
+        if conexao.bytes_pendentes:
+            return False
+        if conexao.bytes_no_kernel:
+            if conexao.saida_parada(self.timeout_escrita):
+                conexao.despejar('escrita')
+            return False
+        # Quem tem pedidos em preparo está esperando o resultado, não ocioso
+        if motivo == 'ociosa' and conexao.pedidos_em_andamento():
+            return False
+        return True
+    
     def handle_client(self, client_socket, client_address):
         """Gerencia a conexão com um cliente específico"""
-        print(f"🔗 Cliente conectado: {client_address}")
+        self.log.info('conexao', f"🔗 Cliente conectado: {client_address}", cliente=client_address)
+        
+        # Não bloqueante: a leitura espera com prazo e o envio nunca prende a thread
+        client_socket.setblocking(False)
+        conexao = ConexaoThreads(client_socket, client_address, self.buffer_saida, self.timeout_escrita,
+                                 self.escritor, self._registrar_despejo)
+        leitor = LeitorMensagens(client_socket, timeout_ocioso=self.timeout_ocioso,
+                                 timeout_leitura=self.timeout_leitura,
+                                 pode_expirar=lambda motivo: self._pode_expirar(conexao, motivo))
+        self._acompanhar_conexao(conexao)
+        
+        try:
+            while self.executando:
+                # Recebe o próximo quadro completo do cliente
+                try:
+                    payload = leitor.ler_quadro()
+                except TempoEsgotado as e:
+                    conexao.despejar(e.motivo)
+                    break
+                if payload is None:
+                    break
+                
+                conexao.processando = True
+                comando, resposta = self._interpretar_quadro(payload, client_address, conexao.codec)
+                if comando is not None:
+                    try:
+                        resposta = self.processar_comando(comando, conexao)
+                    except Exception as e:
+                        resposta = {'erro': f'Erro interno: {str(e)}'}
+                
+                # Envia resposta marcada com o id de correlação do comando
+                conexao.enviar(self._marcar_resposta(resposta, comando))
+                conexao.aplicar_codec_negociado()
+                conexao.processando = False
+        
+        except Exception as e:
+            # Depois de um despejo, o fim abrupto da conexão é esperado
+            if conexao.despejada is None:
+                self.log.erro('erro_conexao', f"❌ Erro na conexão com {client_address}: {e}",
+                              cliente=client_address, erro=str(e))
+        
+        finally:
+            conexao.fechar()
+            self._liberar_conexao(conexao)
+            self.log.info('desconexao', f"🔌 Cliente desconectado: {client_address}", cliente=client_address)
+    
+    async def handle_client_async(self, reader, writer):
+        """Gerencia a conexão com um cliente no motor asyncio"""
+        client_address = writer.get_extra_info('peername')
+        
+        if not self._reservar_conexao():
+            writer.write(codificar_mensagem({'erro': 'Limite de conexões atingido'}))
+            writer.close()
+            return
+        
+        self.log.info('conexao', f"🔗 Cliente conectado: {client_address}", cliente=client_address)
+        loop = asyncio.get_running_loop()
+        conexao = ConexaoAsync(writer, loop, self.buffer_saida, self._registrar_despejo)
+        self._acompanhar_conexao(conexao)
+        leitor = LeitorQuadrosAsync(reader, self.timeout_ocioso, self.timeout_leitura,
+                                    pode_expirar=lambda motivo: self._pode_expirar(conexao, motivo))
         
         try:
             while self.executando:
-                # Recebe dados do cliente
-                data = client_socket.recv(1024).decode('utf-8')
-                if not data:
+                try:
+                    payload = await leitor.ler_quadro()
+                except TempoEsgotado as e:
+                    conexao.despejar(e.motivo)
                     break
+                if payload is None:
+                    break
+                
+                conexao.processando = True
+                comando, resposta = self._interpretar_quadro(payload, client_address, conexao.codec)
+                if comando is not None:
+                    try:
+                        # Comandos rápidos rodam direto no loop e as esperas longas são
+                        # aguardadas nele; o que ainda bloqueia (o fsync do diário) vai para uma thread
+                        acao = comando.get('acao')
+                        if acao in self.ACOES_BLOQUEANTES:
+                            resposta = await self.processar_espera_async(comando, conexao)
+                        elif acao in self.acoes_bloqueantes:
+                            resposta = await loop.run_in_executor(
+                                None, self.processar_comando, comando, conexao
+                            )
+                        else:
+                            resposta = self.processar_comando(comando, conexao)
+                    except Exception as e:
+                        resposta = {'erro': f'Erro interno: {str(e)}'}
                 
+                conexao.enviar(self._marcar_resposta(resposta, comando))
+                conexao.aplicar_codec_negociado()
+                conexao.processando = False
+                if not conexao.bytes_pendentes:
+                    # Tudo já saiu para o socket: drain retorna na hora, sem precisar de prazo
+                    await writer.drain()
+                    continue
                 try:
-                    comando = json.loads(data)
-                    print(f"📨 Comando recebido de {client_address}: {comando.get('acao', 'desconhecido')}")
-                    
-                    # Processa o comando
-                    resposta = self.processar_comando(comando)
-                    
-                    # Envia resposta
-                    resposta_json = json.dumps(resposta, ensure_ascii=False)
-                    client_socket.send(resposta_json.encode('utf-8'))
-                    
-                except json.JSONDecodeError:
-                    erro = {'erro': 'Formato JSON inválido'}
-                    client_socket.send(json.dumps(erro).encode('utf-8'))
-                except Exception as e:
-                    erro = {'erro': f'Erro interno: {str(e)}'}
-                    client_socket.send(json.dumps(erro).encode('utf-8'))
+                    await asyncio.wait_for(writer.drain(), self.timeout_escrita)
+                except asyncio.TimeoutError:
+                    conexao.despejar('escrita')
+                    break
         
+        except asyncio.CancelledError:
+            # Loop sendo encerrado pelo parar_servidor
+            pass
         except Exception as e:
-            print(f"❌ Erro na conexão com {client_address}: {e}")
+            # Depois de um despejo, o fim abrupto da conexão é esperado
+            if conexao.despejada is None:
+                self.log.erro('erro_conexao', f"❌ Erro na conexão com {client_address}: {e}",
+                              cliente=client_address, erro=str(e))
         
         finally:
-            client_socket.close()
-            print(f"🔌 Cliente desconectado: {client_address}")
+            leitor.fechar()
+            conexao.fechar()
+            self._liberar_conexao(conexao)
+            self.log.info('desconexao', f"🔌 Cliente desconectado: {client_address}", cliente=client_address)
+    
+    def _anunciar_inicio(self):
+        shard = f", shard {self.shard}" if self.shard is not None else ""
+        self.log.info('inicio',
+                      f"🚀 Servidor do restaurante iniciado em {self.host}:{self.port} (motor {self.motor}{shard})\n"
+                      + "".join(
+                          f"👨‍🍳 {estacao.nome}: {estacao.pool.tamanho} chefs (entre {estacao.autoescala.minimo} "
+                          f"e {estacao.autoescala.maximo}) para {', '.join(sorted(estacao.pratos))}\n"
+                          for estacao in self.estacoes.values()
+                      )
+                      + f"📋 Escalonador {self.escalonador}, backend {self.backend_chefs}\n"
+                      + (f"🔥 Fornadas com janela de {self.agrupador.janela}s e fator {self.agrupador.fator}\n"
+                         if self.agrupador is not None else "")
+                      + "="*50,
+                      host=self.host, port=self.port, motor=self.motor, shard=self.shard,
+                      chefs=self.total_chefs(), estacoes=list(self.estacoes))
     
     def iniciar_servidor(self):
         """Inicia o servidor e aceita conexões"""
         try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
-            self.executando = True
+            if self.porta_metricas:
+                self.servidor_metricas = ServidorMetricasHTTP(self.metricas, self.host, self.porta_metricas)
+                self.servidor_metricas.iniciar()
+                self.log.info('metricas', f"📊 Métricas Prometheus em http://{self.host}:{self.porta_metricas}/metrics",
+                              porta=self.porta_metricas)
             
-            print(f"🚀 Servidor do restaurante iniciado em {self.host}:{self.port}")
-            print(f"👨‍🍳 {self.executor._max_workers} chefs disponíveis")
-            print("="*50)
+            if self.canal_reinicio is not None:
+                self._receber_heranca()
             
-            while self.executando:
-                try:
-                    client_socket, client_address = self.server_socket.accept()
-                    
-                    # Cria uma thread para cada cliente
-                    client_thread = threading.Thread(
-                        target=self.handle_client,
-                        args=(client_socket, client_address),
-                        daemon=True
-                    )
-                    client_thread.start()
-                    
-                except socket.error as e:
-                    if self.executando:
-                        print(f"❌ Erro ao aceitar conexão: {e}")
+            if self.motor == 'asyncio':
+                asyncio.run(self._executar_async())
+            else:
+                self._executar_threads()
                         
         except Exception as e:
-            print(f"❌ Erro ao iniciar servidor: {e}")
+            self.log.erro('erro_inicio', f"❌ Erro ao iniciar servidor: {e}", erro=str(e))
         finally:
             self.parar_servidor()
     
+    def _executar_threads(self):
+        """Motor clássico: uma thread por conexão"""
+        if self.socket_herdado is not None:
+            self.server_socket = self.socket_herdado
+        else:
+            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server_socket.bind((self.host, self.port))
+            self.server_socket.listen(self.backlog)
+        # Não bloqueante: no reinício, dois processos aceitam da mesma fila
+        self.server_socket.setblocking(False)
+        self.escritor = EscritorConexoes()
+        self.executando = True
+        
+        self._anunciar_inicio()
+        self._confirmar_heranca()
+        
+        despertador = self._despertador[0]
+        while self.executando:
+            try:
+                leitura = [despertador, self.server_socket] if self.aceitando else [despertador]
+                prontos, _, _ = select.select(leitura, [], [])
+                if despertador in prontos:
+                    despertador.recv(4096)
+                    continue
+                try:
+                    client_socket, client_address = self.server_socket.accept()
+                except BlockingIOError:
+                    # Outro processo aceitou a conexão primeiro
+                    continue
+                client_socket.setblocking(True)
+                
+                if not self._reservar_conexao():
+                    enviar_mensagem(client_socket, {'erro': 'Limite de conexões atingido'})
+                    client_socket.close()
+                    continue
+                
+                # Cria uma thread para cada cliente
+                client_thread = threading.Thread(
+                    target=self.handle_client,
+                    args=(client_socket, client_address),
+                    daemon=True
+                )
+                client_thread.start()
+                
+            except socket.error as e:
+                if self.executando:
+                    self.log.erro('erro_accept', f"❌ Erro ao aceitar conexão: {e}", erro=str(e))
+    
+    async def _executar_async(self):
+        """Motor asyncio: todas as conexões em um único event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._parada_async = asyncio.Event()
+        
+        if self.socket_herdado is not None:
+            servidor = await asyncio.start_server(
+                self.handle_client_async, sock=self.socket_herdado, backlog=self.backlog
+            )
+        else:
+            servidor = await asyncio.start_server(
+                self.handle_client_async, self.host, self.port,
+                backlog=self.backlog, reuse_address=True
+            )
+        self._servidor_async = servidor
+        self.server_socket = servidor.sockets[0]
+        self.executando = True
+        
+        self._anunciar_inicio()
+        self._confirmar_heranca()
+        
+        async with servidor:
+            await self._parada_async.wait()
+    
     def parar_servidor(self):
         """Para o servidor e fecha todas as conexões"""
-        print("\n🛑 Parando servidor...")
-        self.executando = False
+        with self.lock_conexoes:
+            if self.parado:
+                return
+            self.parado = True
         
-        if self.server_socket:
-            self.server_socket.close()
+        self.log.info('parada', "\n🛑 Parando servidor...")
+        with self.cond_submissoes:
+            self.drenando = True
         
-        # Aguarda pedidos pendentes serem finalizados
-        if self.pedidos_em_andamento:
-            print("⏳ Aguardando pedidos pendentes serem finalizados...")
+        # Aguarda pedidos pendentes serem finalizados, ainda respondendo às consultas
+        if self.estado.total_em_andamento():
+            self.log.info('parada', "⏳ Aguardando pedidos pendentes serem finalizados...",
+                          pendentes=self.estado.total_em_andamento())
             self.aguardar_todos_pedidos()
         
-        self.executor.shutdown(wait=True)
-        print("✅ Servidor parado com sucesso!")
+        self._parar_motor()
+        if self.motor == 'threads' and self.server_socket:
+            # Sem shutdown: depois de um reinício, o socket de escuta é do processo novo também
+            self.server_socket.close()
+        
+        for estacao in self.estacoes.values():
+            estacao.parar()
+        if self.escritor is not None:
+            self.escritor.parar()
+        if self.servidor_metricas is not None:
+            self.servidor_metricas.parar()
+        if self.pool_processos is not None:
+            self.pool_processos.shutdown(wait=True)
+        self.estado.fechar()
+        if self.diario is not None:
+            self.diario.fechar()
+        if self.sucessor is not None:
+            with self.lock_sucessor:
+                self.sucessor.close()
+        for extremidade in self._despertador:
+            extremidade.close()
+        self.log.info('parada', "✅ Servidor parado com sucesso!")
+        self.log.fechar()
 
 def main():
     """Função principal do servidor"""
-    servidor = RestauranteServidor()
+    parser = argparse.ArgumentParser(description='Servidor do restaurante distribuído')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--chefs', type=int, default=4, help='número inicial de chefs')
+    parser.add_argument('--chefs-min', type=int, default=None,
+                        help='mínimo de chefs da autoescala (padrão: --chefs)')
+    parser.add_argument('--chefs-max', type=int, default=None,
+                        help='máximo de chefs da autoescala (padrão: --chefs, sem autoescala)')
+    parser.add_argument('--espera-alvo', type=float, default=None,
+                        help='espera por um chef acima da qual a cozinha cresce (padrão: 2s x escala de tempo)')
+    parser.add_argument('--resfriamento-autoescala', type=float, default=2.0,
+                        help='segundos sem novas mudanças depois de redimensionar os chefs')
+    parser.add_argument('--estacoes', action='store_true',
+                        help='cozinha em estações (forno, chapa, fogão, bancada), cada uma com seus chefs')
+    parser.add_argument('--capacidade-estacao', action='append', default=[], metavar='ESTACAO=N',
+                        help='chefs de uma estação no modo --estacoes (pode repetir)')
+    parser.add_argument('--janela-agrupamento', type=float, default=None, metavar='SEGUNDOS',
+                        help='agrupa pedidos do mesmo prato que chegam nesse intervalo em uma fornada')
+    parser.add_argument('--capacidade-fornada', action='append', default=[], metavar='PRATO=N',
+                        help='itens de um prato por fornada (pode repetir)')
+    parser.add_argument('--fator-fornada', type=float, default=FATOR_FORNADA,
+                        help='fração do tempo base que cada item a mais custa em uma fornada')
+    parser.add_argument('--motor', choices=MOTORES, default='threads',
+                        help='motor de rede: uma thread por conexão ou asyncio')
+    parser.add_argument('--backlog', type=int, default=128,
+                        help='fila de conexões pendentes do listen()')
+    parser.add_argument('--max-conexoes', type=int, default=None,
+                        help='limite de conexões simultâneas')
+    parser.add_argument('--timeout-ocioso', type=float, default=None, metavar='SEGUNDOS',
+                        help='desconecta clientes sem comandos nem pedidos em preparo por esse tempo')
+    parser.add_argument('--timeout-leitura', type=float, default=30.0, metavar='SEGUNDOS',
+                        help='prazo para um comando começado chegar inteiro')
+    parser.add_argument('--timeout-escrita', type=float, default=30.0, metavar='SEGUNDOS',
+                        help='prazo para o cliente ler as respostas pendentes')
+    parser.add_argument('--buffer-saida', type=int, default=BUFFER_SAIDA_PADRAO, metavar='BYTES',
+                        help='bytes pendentes de envio por conexão antes de desconectar o cliente')
+    parser.add_argument('--escalonador', choices=tuple(POLITICAS), default='fifo',
+                        help='ordem de preparo: chegada, menor tarefa ou prazo mais cedo')
+    parser.add_argument('--envelhecimento', type=float, default=0.1,
+                        help='segundos de prioridade ganhos por segundo de espera na fila')
+    parser.add_argument('--max-prontos', type=int, default=10000,
+                        help='pedidos prontos mantidos em memória (LRU)')
+    parser.add_argument('--ttl-prontos', type=float, default=3600.0,
+                        help='segundos que um pedido pronto fica em memória')
+    parser.add_argument('--arquivo-prontos', default=None,
+                        help='arquivo onde os pedidos despejados continuam consultáveis')
+    parser.add_argument('--faixas-estado', type=int, default=16,
+                        help='faixas de lock do estado dos pedidos (1 = lock global)')
+    parser.add_argument('--backend-chefs', choices=BACKENDS_CHEFS, default='threads',
+                        help='chefs como threads ou como processos (escala além do GIL)')
+    parser.add_argument('--diario', default=None, metavar='DIRETORIO',
+                        help='diretório do diário durável de pedidos (recupera o estado ao iniciar)')
+    parser.add_argument('--snapshot-a-cada', type=int, default=10000,
+                        help='registros do diário entre snapshots')
+    parser.add_argument('--escala-tempo', type=float, default=1.0,
+                        help='multiplica os tempos de preparo simulados (ex.: 0.01 em benchmarks)')
+    parser.add_argument('--porta-metricas', type=int, default=None,
+                        help='porta HTTP para expor /metrics no formato Prometheus')
+    parser.add_argument('--nivel-log', choices=tuple(NIVEIS), default='info',
+                        help='nível mínimo dos registros de log')
+    parser.add_argument('--arquivo-log', default=None,
+                        help='grava o log neste arquivo em vez da saída padrão')
+    parser.add_argument('--formato-log', choices=('texto', 'json'), default='texto',
+                        help='mensagens legíveis ou uma linha JSON por registro')
+    parser.add_argument('--amostragem-log', action='append', default=[], metavar='EVENTO=FRACAO',
+                        help='registra só uma fração de um evento (ex.: comando_recebido=0.01)')
+    parser.add_argument('--max-log-por-segundo', type=_inteiro_positivo, default=None, metavar='N',
+                        help='descarta (e conta) os registros de log acima deste número por segundo')
+    parser.add_argument('--silencioso', action='store_true',
+                        help='registra apenas erros')
+    parser.add_argument('--max-fila', type=_inteiro_positivo, default=None,
+                        help='recusa pedidos quando a fila da cozinha tem este tamanho')
+    parser.add_argument('--max-espera', type=_numero_positivo, default=None,
+                        help='recusa pedidos cuja espera estimada passaria destes segundos')
+    parser.add_argument('--taxa-pedidos', type=_numero_positivo, default=None,
+                        help='pedidos por segundo aceitos de cada conexão')
+    parser.add_argument('--rajada-pedidos', type=_inteiro_positivo, default=None,
+                        help='rajada de pedidos permitida por conexão (padrão: a taxa)')
+    parser.add_argument('--shard', type=int, default=None,
+                        help='número do shard desta instância (prefixo S{shard} nos ids)')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='inicia N instâncias locais, uma por shard, nas portas port..port+N-1')
+    parser.add_argument('--herdar-socket', type=int, default=None, metavar='FD',
+                        help='uso interno do reinício: socket de escuta herdado do processo anterior')
+    parser.add_argument('--canal-reinicio', type=int, default=None, metavar='FD',
+                        help='uso interno do reinício: canal com o processo anterior')
+    args = parser.parse_args()
+    
+    opcoes = dict(
+        host=args.host, port=args.port, num_chefs=args.chefs, motor=args.motor,
+        backlog=args.backlog, max_conexoes=args.max_conexoes,
+        timeout_ocioso=args.timeout_ocioso, timeout_leitura=args.timeout_leitura,
+        timeout_escrita=args.timeout_escrita, buffer_saida=args.buffer_saida,
+        escalonador=args.escalonador, envelhecimento=args.envelhecimento,
+        max_prontos=args.max_prontos, ttl_prontos=args.ttl_prontos,
+        arquivo_prontos=args.arquivo_prontos, faixas_estado=args.faixas_estado,
+        diretorio_diario=args.diario, snapshot_a_cada=args.snapshot_a_cada,
+        backend_chefs=args.backend_chefs, shard=args.shard, escala_tempo=args.escala_tempo,
+        porta_metricas=args.porta_metricas,
+        nivel_log=args.nivel_log, arquivo_log=args.arquivo_log, formato_log=args.formato_log,
+        amostragem_log=_interpretar_amostragem(args.amostragem_log, parser),
+        max_log_por_segundo=args.max_log_por_segundo,
+        silencioso=args.silencioso,
+        max_fila=args.max_fila, max_espera=args.max_espera,
+        taxa_pedidos=args.taxa_pedidos, rajada_pedidos=args.rajada_pedidos,
+        chefs_min=args.chefs_min, chefs_max=args.chefs_max, espera_alvo=args.espera_alvo,
+        resfriamento_autoescala=args.resfriamento_autoescala,
+        estacoes=args.estacoes,
+        capacidade_estacoes=_interpretar_capacidades(args.capacidade_estacao, '--capacidade-estacao', parser),
+        janela_agrupamento=args.janela_agrupamento,
+        capacidade_fornadas=_interpretar_capacidades(args.capacidade_fornada, '--capacidade-fornada', parser),
+        fator_fornada=args.fator_fornada
+    )
+    
+    if args.shards:
+        iniciar_cluster(args.shards, opcoes)
+    else:
+        executar_servidor(**opcoes, herdar_socket=args.herdar_socket, canal_reinicio=args.canal_reinicio,
+                          argv_reinicio=_argumentos_reinicio(sys.argv[1:]))
+
+def _argumentos_reinicio(argv):
+    """Argumentos da linha de comando para o processo novo, sem os do reinício anterior"""
+    argumentos = []
+    pular = False
+    for argumento in argv:
+        if pular:
+            pular = False
+        elif argumento in ('--herdar-socket', '--canal-reinicio'):
+            pular = True
+        elif not argumento.startswith(('--herdar-socket=', '--canal-reinicio=')):
+            argumentos.append(argumento)
+    return argumentos
+
+def _inteiro_positivo(texto):
+    """type= do argparse para limites que não aceitam zero"""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'número inteiro inválido: "{texto}"')
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f'deve ser >= 1, recebeu {valor}')
+    return valor
+
+
+def _numero_positivo(texto):
+    """type= do argparse para taxas e tempos que não aceitam zero"""
+    try:
+        valor = float(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'número inválido: "{texto}"')
+    if not valor > 0 or not math.isfinite(valor):
+        raise argparse.ArgumentTypeError(f'deve ser > 0, recebeu {texto}')
+    return valor
+
+
+def _interpretar_capacidades(valores, opcao, parser):
+    """Converte ['forno=3', ...] em {'forno': 3}"""
+    capacidades = {}
+    for valor in valores:
+        nome, _, capacidade = valor.partition('=')
+        try:
+            capacidades[nome] = int(capacidade)
+        except ValueError:
+            parser.error(f'{opcao} espera NOME=N, recebeu "{valor}"')
+    return capacidades
+
+
+def _interpretar_amostragem(valores, parser):
+    """Converte ['comando_recebido=0.01', ...] em {'comando_recebido': 0.01}"""
+    amostragem = {}
+    for valor in valores:
+        evento, _, fracao = valor.partition('=')
+        try:
+            amostragem[evento] = float(fracao)
+        except ValueError:
+            parser.error(f'--amostragem-log espera EVENTO=FRACAO, recebeu "{valor}"')
+    return amostragem
+
+def executar_servidor(**opcoes):
+    """Cria e executa uma instância do servidor até ser interrompida"""
+    servidor = RestauranteServidor(**opcoes)
+    
+    # SIGTERM drena e encerra; SIGHUP reinicia sem indisponibilidade (só na thread principal)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: _em_segundo_plano(servidor.encerrar))
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda *_: _em_segundo_plano(servidor.reiniciar))
     
     try:
         servidor.iniciar_servidor()
     except KeyboardInterrupt:
-        print("\n🛑 Recebido sinal de interrupção...")
+        servidor.log.info('parada', "\n🛑 Recebido sinal de interrupção...")
     finally:
         servidor.parar_servidor()
 
+def _em_segundo_plano(funcao):
+    """Tratadores de sinal não podem bloquear o laço do motor"""
+    threading.Thread(target=funcao, daemon=True).start()
+
+def iniciar_cluster(num_shards, opcoes):
+    """Inicia uma instância por shard, cada uma em seu processo e porta"""
+    processos = []
+    for shard in range(num_shards):
+        opcoes_shard = dict(opcoes, port=opcoes['port'] + shard, shard=shard)
+        if opcoes['porta_metricas']:
+            opcoes_shard['porta_metricas'] = opcoes['porta_metricas'] + shard
+        for chave in ('diretorio_diario', 'arquivo_prontos', 'arquivo_log'):
+            if opcoes[chave]:
+                opcoes_shard[chave] = f"{opcoes[chave]}.shard{shard}"
+        
+        processo = multiprocessing.Process(
+            target=executar_servidor, kwargs=opcoes_shard, name=f"Shard-{shard}"
+        )
+        processo.start()
+        processos.append(processo)
+    
+    try:
+        for processo in processos:
+            processo.join()
+    except KeyboardInterrupt:
+        # No terminal, o Ctrl+C chega a todo o grupo; se o sinal veio só para
+        # este processo, repassa para as instâncias que ainda não encerraram
+        for processo in processos:
+            processo.join(timeout=1)
+            if processo.is_alive():
+                os.kill(processo.pid, signal.SIGINT)
+        for processo in processos:
+            processo.join()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Teste de regressão: pedidos acompanhados pela conexão com o diário ativo
+Pedidos rápidos podem terminar durante o fsync do diário, antes de o
+fazer_pedido responder; aguardar_meus_pedidos ainda precisa devolvê-los
+
+    python3 -m unittest teste_pedidos_conexao
+"""
+
+import tempfile
+import unittest
+
+from conexoes import ConexaoThreads
+from servidor import RestauranteServidor
+
+
+class TestePedidosConexaoComDiario(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.servidor = RestauranteServidor(
+            port=0, silencioso=True, escala_tempo=0.0001, num_chefs=4,
+            diretorio_diario=self.diretorio.name
+        )
+        self.conexao = ConexaoThreads(None, ('teste', 0))
+
+    def tearDown(self):
+        self.servidor.parar_servidor()
+        self.diretorio.cleanup()
+
+    def _comando(self, **comando):
+        resposta = self.servidor.processar_comando(comando, self.conexao)
+        self.assertNotIn('erro', resposta)
+        return resposta
+
+    def test_pedidos_concluidos_durante_o_fsync(self):
+        ids = [self._comando(acao='fazer_pedido', prato='salada')['pedido_id'] for _ in range(50)]
+
+        resposta = self._comando(acao='aguardar_meus_pedidos', timeout=5)
+        self.assertEqual(resposta['pendentes'], [])
+        self.assertEqual(sorted(pronto['pedido_id'] for pronto in resposta['prontos']), sorted(ids))
+
+    def test_lote_concluido_durante_o_fsync(self):
+        resposta = self._comando(acao='fazer_pedidos_lote', itens=[{'prato': 'salada'}] * 10)
+        ids = [item['pedido_id'] for item in resposta['pedidos']]
+
+        resposta = self._comando(acao='aguardar_meus_pedidos', timeout=5)
+        self.assertEqual(resposta['pendentes'], [])
+        self.assertEqual(sorted(pronto['pedido_id'] for pronto in resposta['prontos']), sorted(ids))
+
+
+if __name__ == "__main__":
+    unittest.main()